@@ -10,6 +10,8 @@ from errors import ENVNotFoundError
 API_PORT: Final[str] = os.getenv("API_PORT")  # type: ignore
 API_HOST: Final[str] = os.getenv("API_HOST")  # type: ignore
 API_HOST_URL: Final = f"http://{API_HOST}:{API_PORT}"
+# No. of gunicorn worker processes (see `gunicorn.conf.py`)
+API_WORKERS: Final = int(os.getenv("API_WORKERS", str(os.cpu_count() or 1)))
 
 # Database Configs
 MONGODB_URL: Final[str] = os.getenv("MONGODB_URL")  # type: ignore
@@ -17,14 +19,69 @@ DB_YOUTUBE: Final = "YoutubeDB"
 COLLECTION_YT_VIDEO: Final = "YtVideosDetails"
 COLLECTION_YT_CHANNEL_VIDEO: Final = "YtChannelsVideoIds"
 COLLECTION_CTT_CHANNELS: Final = "CttChannels"
+COLLECTION_YT_API_QUOTA: Final = "YtApiQuota"
+COLLECTION_YT_API_FETCH_PROGRESS: Final = "YtApiFetchProgress"
+# Max. no. of operations sent in one `bulk_write`
+BULK_WRITE_CHUNK_SIZE: Final = int(os.getenv("BULK_WRITE_CHUNK_SIZE", "1000"))
+# Default no. of documents read at a time by cursor of streaming routes
+DB_STREAM_BATCH_SIZE: Final = int(os.getenv("DB_STREAM_BATCH_SIZE", "1000"))
 
 # YouTube API configs
+YT_API_BASE_URL: Final = "https://www.googleapis.com/youtube/v3"
+# Max. no. of concurrent requests to YouTube API (shared by all the API requests)
+YT_API_MAX_CONCURRENCY: Final = int(os.getenv("YT_API_MAX_CONCURRENCY", "8"))
+# Max. no. of open connections in pool, HTTP/2 multiplexes requests over them
+YT_API_MAX_CONNECTIONS: Final = int(os.getenv("YT_API_MAX_CONNECTIONS", "4"))
+# Quota units per API key per day (resets at midnight Pacific Time)
+YT_API_DAILY_QUOTA: Final = int(os.getenv("YT_API_DAILY_QUOTA", "10000"))
+# Token bucket (per API key) to stay under per-second limits of YouTube API
+YT_API_REQUESTS_PER_SEC: Final = float(os.getenv("YT_API_REQUESTS_PER_SEC", "10"))
+YT_API_MAX_RETRIES: Final = int(os.getenv("YT_API_MAX_RETRIES", "5"))
 YT_API_KEY_AS_API_HEADER = Header(
     alias="YT-API-KEY",
     description="YouTube Data v3 API Key",
     min_length=30,
 )
 
+# Background jobs configs
+JOBS_MAX_WORKERS: Final = int(os.getenv("JOBS_MAX_WORKERS", "4"))
+# Max. no. of jobs waiting in queue, new jobs are rejected when it is full
+JOBS_MAX_QUEUED: Final = int(os.getenv("JOBS_MAX_QUEUED", "100"))
+# Max. no. of finished jobs kept in memory (older ones are only in SQLite, if set)
+JOBS_MAX_FINISHED: Final = int(os.getenv("JOBS_MAX_FINISHED", "1000"))
+# Optional SQLite file to keep jobs (with their results) across app restarts. It is
+# shared by gunicorn workers, so set it when `API_WORKERS` > 1 to poll (or cancel)
+# a job from any worker.
+JOBS_DB_PATH: Final[str | None] = os.getenv("JOBS_DB_PATH")
+# How often a process saves progress of its running jobs into `JOBS_DB_PATH`
+JOBS_HEARTBEAT_SEC: Final = float(os.getenv("JOBS_HEARTBEAT_SEC", "2"))
+
+# CTT model inference configs, concurrent predictions are coalesced into batches
+# which run on a "process" or "thread" pool. Normalizer, vectorizer and naive bayes
+# hold the GIL most of the time, so only a process pool scales with CPU cores.
+# Every gunicorn worker has its own pool, so by default the cores are split between
+# the `API_WORKERS` pools. Keep `API_WORKERS` x workers <= cores.
+CTT_INFERENCE_EXECUTOR: Final = os.getenv("CTT_INFERENCE_EXECUTOR", "process")
+CTT_INFERENCE_WORKERS: Final = int(
+    os.getenv(
+        "CTT_INFERENCE_WORKERS", str(max(1, (os.cpu_count() or 1) // API_WORKERS))
+    )
+)
+# Max. no. of titles in a batch, a bigger single request still runs as one batch
+CTT_INFERENCE_MAX_BATCH_SIZE: Final = int(
+    os.getenv("CTT_INFERENCE_MAX_BATCH_SIZE", "2048")
+)
+# Max. time a request waits for other requests to fill its batch
+CTT_INFERENCE_MAX_WAIT_MS: Final = float(os.getenv("CTT_INFERENCE_MAX_WAIT_MS", "10"))
+# No. of labelled channels (with titles of their stored videos) per batch of CTT
+# incremental training
+CTT_TRAINING_BATCH_SIZE: Final = int(os.getenv("CTT_TRAINING_BATCH_SIZE", "500"))
+
+# Model registry of `/ml` routes: how often artifacts are checked for new versions
+# and how many previous versions are kept in memory for rollback.
+MODELS_POLL_INTERVAL_SEC: Final = float(os.getenv("MODELS_POLL_INTERVAL_SEC", "10"))
+MODELS_KEEP_VERSIONS: Final = int(os.getenv("MODELS_KEEP_VERSIONS", "2"))
+
 
 def check_setup_settings() -> None:
     """Check settings before intializing the app."""
@@ -0,0 +1,222 @@
+"""
+Micro-batching for model inference.
+
+Predictions are CPU bound, so running them inside `async def` handlers blocks the
+event loop, and many small concurrent requests pay the vectorizer overhead one by
+one. `MicroBatcher` queues the items of concurrent requests, coalesces them into a
+batch (until it is full or the oldest request waited `max_wait_ms`) and runs the
+batch on a thread or process pool. Every request gets back the results of its own
+items in order.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import statistics
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Literal, Sequence
+
+# No. of recent batches/requests used to compute latency percentiles
+_METRICS_WINDOW = 1000
+
+
+@dataclass(eq=False)
+class _Request:
+    items: Sequence[Any]
+    future: asyncio.Future
+    enqueued_at: float
+
+
+def _window() -> deque:
+    return deque(maxlen=_METRICS_WINDOW)
+
+
+@dataclass
+class _Metrics:
+    requests: int = 0
+    items: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+    max_batch_size: int = 0
+    batch_sizes: deque[int] = field(default_factory=_window)
+    queue_latencies: deque[float] = field(default_factory=_window)
+    inference_latencies: deque[float] = field(default_factory=_window)
+
+
+def _latency_summary(values: deque[float]) -> dict[str, float | None]:
+    if not values:
+        return {"mean": None, "p50": None, "p95": None, "max": None}
+    ms = sorted(i * 1000 for i in values)
+    return {
+        "mean": round(statistics.fmean(ms), 3),
+        "p50": round(ms[len(ms) // 2], 3),
+        "p95": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+        "max": round(ms[-1], 3),
+    }
+
+
+def create_executor(kind: Literal["thread", "process"], max_workers: int) -> Executor:
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers)
+    return ThreadPoolExecutor(max_workers, thread_name_prefix="inference")
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent calls of `func` into batches. `func` takes a list of items
+    and returns a sequence of results (one for each item). It runs on `executor`,
+    so it must be picklable for a `ProcessPoolExecutor`.
+    """
+
+    def __init__(
+        self,
+        func: Callable[[list[Any]], Sequence[Any]],
+        executor: Executor,
+        *,
+        max_batch_size: int,
+        max_wait_ms: float,
+        max_concurrency: int,
+    ) -> None:
+        self.func = func
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._pending: deque[_Request] = deque()
+        self._pending_items = 0
+        self._not_empty = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._loop_task: asyncio.Task | None = None
+        self._batch_tasks: set[asyncio.Task] = set()
+        self._metrics = _Metrics()
+
+    def _update_events(self) -> None:
+        if self._pending:
+            self._not_empty.set()
+        else:
+            self._not_empty.clear()
+        if self._pending_items >= self.max_batch_size:
+            self._batch_full.set()
+        else:
+            self._batch_full.clear()
+
+    async def _collect_batch(self) -> list[_Request]:
+        """
+        Wait for a request, then until there are enough items for a full batch or
+        the oldest request reaches its deadline.
+        """
+        await self._not_empty.wait()
+        timeout = (
+            self._pending[0].enqueued_at
+            + self.max_wait
+            - asyncio.get_running_loop().time()
+        )
+        if timeout > 0:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._batch_full.wait(), timeout)
+
+        batch, size = [], 0
+        while self._pending:
+            n_items = len(self._pending[0].items)
+            if batch and size + n_items > self.max_batch_size:
+                break
+            batch.append(self._pending.popleft())
+            size += n_items
+        self._pending_items -= size
+        self._update_events()
+        return batch
+
+    async def _run_batch(self, batch: list[_Request]) -> None:
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        batch = [i for i in batch if not i.future.done()]  # Skip cancelled requests
+        items = [j for i in batch for j in i.items]
+        if not items:
+            self._slots.release()
+            return
+        try:
+            results = await loop.run_in_executor(self.executor, self.func, items)
+        except Exception as e:  # noqa: BLE001
+            self._metrics.failed_batches += 1
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+
+        m = self._metrics
+        m.batches += 1
+        m.max_batch_size = max(m.max_batch_size, len(items))
+        m.batch_sizes.append(len(items))
+        m.inference_latencies.append(loop.time() - started_at)
+        start = 0
+        for request in batch:
+            m.queue_latencies.append(started_at - request.enqueued_at)
+            end = start + len(request.items)
+            if not request.future.done():
+                request.future.set_result(list(results[start:end]))
+            start = end
+
+    async def _batch_loop(self) -> None:
+        while True:
+            # Requests keep piling up (into a bigger batch) while all workers are busy
+            await self._slots.acquire()
+            try:
+                batch = await self._collect_batch()
+            except BaseException:
+                self._slots.release()
+                raise
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    def start(self) -> None:
+        self._loop_task = asyncio.create_task(self._batch_loop())
+
+    async def stop(self) -> None:
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._loop_task
+            self._loop_task = None
+        await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+        for request in self._pending:
+            request.future.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def submit(self, items: Sequence[Any]) -> list[Any]:
+        """Queue `items` into a batch and wait for their results."""
+        if not items:
+            return []
+        loop = asyncio.get_running_loop()
+        request = _Request(items, loop.create_future(), loop.time())
+        self._metrics.requests += 1
+        self._metrics.items += len(items)
+        self._pending.append(request)
+        self._pending_items += len(items)
+        self._update_events()
+        return await request.future
+
+    def metrics(self) -> dict[str, Any]:
+        m = self._metrics
+        return {
+            "requests": m.requests,
+            "items": m.items,
+            "batches": m.batches,
+            "failedBatches": m.failed_batches,
+            "queuedRequests": len(self._pending),
+            "queuedItems": self._pending_items,
+            "runningBatches": len(self._batch_tasks),
+            "batchSize": {
+                "mean": round(statistics.fmean(m.batch_sizes), 3)
+                if m.batch_sizes
+                else None,
+                "max": m.max_batch_size,
+            },
+            "queueLatencyMs": _latency_summary(m.queue_latencies),
+            "inferenceLatencyMs": _latency_summary(m.inference_latencies),
+        }
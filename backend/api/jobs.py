@@ -0,0 +1,316 @@
+"""
+In-process background jobs.
+
+Long-running work (like fetching and storing videos details) is submitted as a job
+which runs on a bounded pool of asyncio workers, outside of the request. Every job
+has an id to poll its status, progress and result (or error), and can be cancelled.
+
+Jobs are optionally kept in a SQLite file which is shared by all the processes (like
+gunicorn workers) of the app. A job runs in the process which accepted it, that
+process saves its progress and heartbeat into the file every `JOBS_HEARTBEAT_SEC`,
+so any process can return the job's status and request its cancellation. Jobs whose
+process stopped (e.g. on app restart) stop heart-beating and are failed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable
+
+from fastapi import HTTPException, Request
+
+from api.configs import (
+    JOBS_DB_PATH,
+    JOBS_HEARTBEAT_SEC,
+    JOBS_MAX_FINISHED,
+    JOBS_MAX_QUEUED,
+    JOBS_MAX_WORKERS,
+)
+from api.models.job import Job, JobStatusEnum
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+JobFunc = Callable[[Job], Awaitable[Any]]
+# No. of missed heartbeats after which an unfinished job is failed
+JOBS_MISSED_HEARTBEATS = 5
+
+_UNFINISHED = (JobStatusEnum.Queued.value, JobStatusEnum.Running.value)
+
+
+class JobStore:
+    """
+    Persist jobs into a SQLite file. Every job is stored as a JSON document, with
+    the `owner` (process) which runs it and the last `heartbeat` of that owner.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        heartbeat_timeout: float = JOBS_HEARTBEAT_SEC * JOBS_MISSED_HEARTBEATS,
+    ) -> None:
+        self.heartbeat_timeout = heartbeat_timeout
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            # Readers of other processes do not block the writer (and vice versa)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, data TEXT, "
+                "status TEXT, owner TEXT, heartbeat REAL NOT NULL DEFAULT 0, "
+                "cancelRequested INTEGER NOT NULL DEFAULT 0)"
+            )
+
+    def _save(self, job: Job, owner: str | None = None) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, data, status, owner, heartbeat) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET "
+                "data = excluded.data, status = excluded.status, "
+                "owner = coalesce(excluded.owner, owner), "
+                "heartbeat = excluded.heartbeat",
+                (job.id, job.model_dump_json(), job.status.value, owner, time.time()),
+            )
+
+    def _fail(self, job: Job) -> Job:
+        job.status = JobStatusEnum.Failed
+        job.error = "Interrupted by app restart."
+        job.finishedAt = datetime.now()
+        self._save(job)
+        return job
+
+    def _load(self, job_id: str) -> Job | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, heartbeat FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = Job.model_validate_json(row[0])
+        if not job.is_finished and row[1] < time.time() - self.heartbeat_timeout:
+            return self._fail(job)
+        return job
+
+    def _fail_unfinished(self) -> None:
+        """Fail the unfinished jobs of processes which stopped heart-beating."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM jobs WHERE status IN (?, ?) AND heartbeat < ?",
+                (*_UNFINISHED, time.time() - self.heartbeat_timeout),
+            ).fetchall()
+        for (data,) in rows:
+            self._fail(Job.model_validate_json(data))
+
+    def _heartbeat(self, owner: str, jobs: list[tuple[str, str]]) -> list[str]:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE jobs SET data = ? WHERE id = ? AND status IN (?, ?)",
+                [(data, job_id, *_UNFINISHED) for job_id, data in jobs],
+            )
+            self._conn.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status IN (?, ?)",
+                (time.time(), owner, *_UNFINISHED),
+            )
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE owner = ? AND cancelRequested = 1 "
+                "AND status IN (?, ?)",
+                (owner, *_UNFINISHED),
+            ).fetchall()
+        return [i[0] for i in rows]
+
+    def _request_cancel(self, job_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET cancelRequested = 1 WHERE id = ?", (job_id,)
+            )
+
+    async def save(self, job: Job, owner: str | None = None) -> None:
+        await asyncio.to_thread(self._save, job, owner)
+
+    async def load(self, job_id: str) -> Job | None:
+        return await asyncio.to_thread(self._load, job_id)
+
+    async def fail_unfinished(self) -> None:
+        await asyncio.to_thread(self._fail_unfinished)
+
+    async def heartbeat(self, owner: str, jobs: list[Job]) -> list[str]:
+        """
+        Save progress of `owner`'s running `jobs` and keep all of its unfinished jobs
+        alive. Returns ids of its jobs whose cancellation is requested.
+        """
+        # Serialize here, jobs are updated by the event loop
+        data = [(job.id, job.model_dump_json()) for job in jobs]
+        return await asyncio.to_thread(self._heartbeat, owner, data)
+
+    async def request_cancel(self, job_id: str) -> None:
+        await asyncio.to_thread(self._request_cancel, job_id)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class JobQueue:
+    def __init__(
+        self,
+        *,
+        max_workers: int = JOBS_MAX_WORKERS,
+        max_queued: int = JOBS_MAX_QUEUED,
+        max_finished: int = JOBS_MAX_FINISHED,
+        store: JobStore | None = None,
+        heartbeat_interval: float = JOBS_HEARTBEAT_SEC,
+    ) -> None:
+        self.max_workers = max_workers
+        self.max_finished = max_finished
+        self.store = store
+        self.heartbeat_interval = heartbeat_interval
+        # Identifies this process' jobs in the store shared with other processes
+        self.owner = uuid.uuid4().hex
+        self._queue: asyncio.Queue[tuple[Job, JobFunc]] = asyncio.Queue(max_queued)
+        self._jobs: dict[str, Job] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._workers: list[asyncio.Task] = []
+
+    async def _save(self, job: Job) -> None:
+        if self.store is not None:
+            await self.store.save(job, self.owner)
+
+    def _evict_finished(self) -> None:
+        finished = [i for i, job in self._jobs.items() if job.is_finished]
+        for job_id in finished[: max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    async def _finish(self, job: Job, status: JobStatusEnum) -> None:
+        job.status = status
+        job.finishedAt = datetime.now()
+        await self._save(job)
+        self._evict_finished()
+
+    async def _run(self, job: Job, func: JobFunc) -> None:
+        job.status = JobStatusEnum.Running
+        job.startedAt = datetime.now()
+        task = asyncio.create_task(func(job))
+        self._tasks[job.id] = task
+        try:
+            await self._save(job)
+            await asyncio.wait([task])
+        finally:
+            # Worker itself is cancelled when app shuts down
+            task.cancel()
+            del self._tasks[job.id]
+
+        if task.cancelled():
+            await self._finish(job, JobStatusEnum.Cancelled)
+        elif (e := task.exception()) is not None:
+            logging.exception(f"Job {job.id} ({job.kind}) failed.", exc_info=e)
+            job.error = e.detail if isinstance(e, HTTPException) else str(e)
+            await self._finish(job, JobStatusEnum.Failed)
+        else:
+            job.result = task.result()
+            await self._finish(job, JobStatusEnum.Succeeded)
+
+    async def _worker(self) -> None:
+        while True:
+            job, func = await self._queue.get()
+            try:
+                if job.status is JobStatusEnum.Queued:  # Not cancelled while queued
+                    await self._run(job, func)
+            finally:
+                self._queue.task_done()
+
+    async def _heartbeat(self, store: JobStore) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            running = [self._jobs[i] for i in self._tasks]
+            try:
+                cancel_ids = await store.heartbeat(self.owner, running)
+            except sqlite3.Error:
+                logging.exception("Saving heartbeat of jobs failed.")
+                continue
+            for job_id in cancel_ids:
+                await self.cancel(job_id)
+
+    def start(self) -> None:
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.max_workers)
+        ]
+        if self.store is not None:
+            self._workers.append(asyncio.create_task(self._heartbeat(self.store)))
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, kind: str, func: JobFunc) -> Job:
+        """
+        Queue `func` to run as a job. `func` receives the `Job`, so it can update the
+        `progress` counters, and its return value is stored as the job's result.
+
+        Raises:
+            HTTPException: With 503 status code when queue is full.
+        """
+        job = Job(kind=kind)
+        try:
+            self._queue.put_nowait((job, func))
+        except asyncio.QueueFull:
+            raise HTTPException(
+                503, {"error": "Too many queued jobs, try again later."}
+            ) from None
+        self._jobs[job.id] = job
+        await self._save(job)
+        return job
+
+    async def get(self, job_id: str) -> Job | None:
+        if job_id in self._jobs:
+            return self._jobs[job_id]
+        if self.store is not None:
+            return await self.store.load(job_id)
+        return None
+
+    async def cancel(self, job_id: str) -> Job | None:
+        """
+        Cancel a job of this process, or request cancellation of a job of another
+        process (which cancels it on its next heartbeat).
+        """
+        job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = await self.store.load(job_id)
+            if job is not None and not job.is_finished:
+                await self.store.request_cancel(job_id)
+            return job
+        if job is None or job.is_finished:
+            return job
+        if job_id in self._tasks:
+            self._tasks[job_id].cancel()
+        else:  # Still in queue, worker skips it
+            await self._finish(job, JobStatusEnum.Cancelled)
+        return job
+
+
+@asynccontextmanager
+async def job_queue_lifespan() -> AsyncIterator[JobQueue]:
+    store = JobStore(JOBS_DB_PATH) if JOBS_DB_PATH else None
+    if store is not None:
+        await store.fail_unfinished()
+    queue = JobQueue(store=store)
+    queue.start()
+    try:
+        yield queue
+    finally:
+        await queue.stop()
+        if store is not None:
+            store.close()
+
+
+def get_job_queue(request: Request) -> JobQueue:
+    """Dependency to get the job queue created in app's lifespan."""
+    return request.state.job_queue
@@ -0,0 +1,60 @@
+import uuid
+from datetime import datetime
+from enum import Enum
+from typing import Annotated, Any, Literal
+
+from pydantic import BaseModel, Field
+
+from api.models.ctt import CttChannelData
+from api.models.youtube import YtChannelVideoData
+
+
+class JobStatusEnum(Enum):
+    Queued = "queued"
+    Running = "running"
+    Succeeded = "succeeded"
+    Failed = "failed"
+    Cancelled = "cancelled"
+
+
+class Job(BaseModel):
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    kind: str
+    status: JobStatusEnum = JobStatusEnum.Queued
+    progress: dict[str, Any] = {}
+    result: Any = None
+    error: Any = None
+    createdAt: datetime = Field(default_factory=datetime.now)
+    startedAt: datetime | None = None
+    finishedAt: datetime | None = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (
+            JobStatusEnum.Succeeded,
+            JobStatusEnum.Failed,
+            JobStatusEnum.Cancelled,
+        )
+
+
+class YtVideoStoreJobRequest(BaseModel):
+    kind: Literal["ytVideoStore"]
+    ids: list[str]
+    part: str | None = None
+    excludeExisting: bool = True
+
+
+class YtChannelVideoJobRequest(BaseModel):
+    kind: Literal["dbYtChannelVideo"]
+    data: list[YtChannelVideoData]
+
+
+class CttChannelsJobRequest(BaseModel):
+    kind: Literal["dbCttChannels"]
+    data: list[CttChannelData]
+
+
+JobRequest = Annotated[
+    YtVideoStoreJobRequest | YtChannelVideoJobRequest | CttChannelsJobRequest,
+    Field(discriminator="kind"),
+]
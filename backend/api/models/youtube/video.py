@@ -1,8 +1,117 @@
-import asyncio
+import re
 from datetime import datetime
-from typing import Self
+from typing import Any, Final, Self
 
-from pydantic import BaseModel
+import polars as pl
+from pydantic import BaseModel, TypeAdapter, model_validator
+
+# ISO 8601 duration as returned by YouTube API (e.g. "P1DT2H3M4S"). Frontend does
+# not parse it, it uses `durationInSec` which is always sent with the details.
+ISO_8601_DURATION_PATTERN: Final = (
+    r"^P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?"
+    r"(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+)
+_ISO_8601_DURATION_RE: Final = re.compile(ISO_8601_DURATION_PATTERN)
+_DURATION_UNIT_IN_SEC: Final = {
+    "weeks": 604800,
+    "days": 86400,
+    "hours": 3600,
+    "minutes": 60,
+    "seconds": 1,
+}
+# Schema of flattened items of YouTube API response
+YT_VIDEO_DETAILS_API_SCHEMA: Final = {
+    "categoryId": pl.Utf8,
+    "channelId": pl.Utf8,
+    "channelTitle": pl.Utf8,
+    "description": pl.Utf8,
+    "duration": pl.Utf8,
+    "id": pl.Utf8,
+    "publishedAt": pl.Utf8,
+    "tags": pl.List(pl.Utf8),
+    "title": pl.Utf8,
+}
+# Tags never contain the "unit separator" control character
+_TAGS_SEPARATOR: Final = "\x1f"
+_YT_VIDEO_DETAILS_COLUMNS_SCHEMA: Final = {
+    **YT_VIDEO_DETAILS_API_SCHEMA,
+    "durationInSec": pl.Int64,
+    "tags": pl.Utf8,
+}
+
+
+def parse_iso8601_duration(duration: str, /) -> int | None:
+    """
+    Convert ISO 8601 duration into seconds, `None` if it is not valid (including
+    "P" and "PT" which have no value).
+    """
+    match = _ISO_8601_DURATION_RE.match(duration)
+    if match is None or not any(match.groups()):
+        return None
+    return sum(
+        int(value) * _DURATION_UNIT_IN_SEC[unit]
+        for unit, value in match.groupdict().items()
+        if value is not None
+    )
+
+
+def duration_in_sec(duration: pl.Expr) -> pl.Expr:
+    """Same as `parse_iso8601_duration` but with native polars expressions."""
+    groups = duration.str.extract_groups(ISO_8601_DURATION_PATTERN)
+    values = [groups.struct.field(unit) for unit in _DURATION_UNIT_IN_SEC]
+    total_sec = pl.sum_horizontal(
+        value.cast(pl.Int64).fill_null(0) * sec
+        for value, sec in zip(values, _DURATION_UNIT_IN_SEC.values())
+    )
+    return pl.when(pl.any_horizontal(i.is_not_null() for i in values)).then(total_sec)
+
+
+def fill_duration_in_sec(df: pl.DataFrame, /) -> pl.DataFrame:
+    """
+    Fill `durationInSec` of details which are stored without it (by older versions)
+    by parsing their `duration`.
+    """
+    stored = (
+        pl.col("durationInSec")
+        if "durationInSec" in df.columns
+        else pl.lit(None, pl.Int64)
+    )
+    return df.with_columns(
+        pl.coalesce(stored, duration_in_sec(pl.col("duration"))).alias("durationInSec")
+    )
+
+
+def _null_item(id: str | None = None) -> dict[str, Any]:
+    return {
+        "categoryId": None,
+        "channelId": None,
+        "channelTitle": None,
+        "description": None,
+        "duration": None,
+        "id": "N/A" if id is None else id,
+        "publishedAt": None,
+        "tags": [],
+        "title": "N/A",
+    }
+
+
+def flatten_item(item: dict, /) -> dict[str, Any]:
+    """Pick fields of `YtVideoDetails` from an item of YouTube API response."""
+    try:
+        snippet, content_details = item["snippet"], item["contentDetails"]
+        return {
+            "categoryId": snippet.get("categoryId"),
+            "channelId": snippet.get("channelId"),
+            "channelTitle": snippet.get("channelTitle"),
+            "description": snippet.get("description"),
+            "duration": content_details.get("duration"),
+            "id": item["id"],
+            "publishedAt": snippet.get("publishedAt"),
+            "tags": snippet.get("tags"),
+            "title": snippet.get("title"),
+        }
+    except KeyError:
+        return _null_item(item.get("id"))
 
 
 class YtVideoDetails(BaseModel):
@@ -11,42 +120,62 @@ class YtVideoDetails(BaseModel):
     channelTitle: str | None
     description: str | None
     duration: str | None
+    durationInSec: int | None = None
     id: str
     publishedAt: datetime | None
     tags: list[str] | None
     title: str | None
 
+    @model_validator(mode="after")
+    def parse_duration_in_sec(self) -> Self:
+        """Parse `duration` once, so it is stored in database with the details."""
+        if self.durationInSec is None and self.duration is not None:
+            self.durationInSec = parse_iso8601_duration(self.duration)
+        return self
+
     @classmethod
     def null(cls, id: str | None = None) -> Self:
-        return cls(
-            categoryId=None,
-            channelId=None,
-            channelTitle=None,
-            description=None,
-            duration=None,
-            id="N/A" if id is None else id,
-            publishedAt=None,
-            tags=[],
-            title="N/A",
-        )
+        return cls(**_null_item(id))
 
     @classmethod
-    async def from_dict(cls, item: dict, /) -> Self:
-        try:
-            return cls(
-                categoryId=item["snippet"].get("categoryId"),
-                channelId=item["snippet"].get("channelId"),
-                channelTitle=item["snippet"].get("channelTitle"),
-                description=item["snippet"].get("description"),
-                duration=item["contentDetails"].get("duration"),
-                id=item["id"],
-                publishedAt=item["snippet"].get("publishedAt"),
-                tags=item["snippet"].get("tags"),
-                title=item["snippet"].get("title"),
-            )
-        except KeyError:
-            return cls.null(item.get("id"))
+    def from_dict(cls, item: dict, /) -> Self:
+        return cls(**flatten_item(item))
 
     @classmethod
-    async def from_dicts(cls, items: list[dict], /) -> list[Self]:
-        return await asyncio.gather(*[cls.from_dict(i) for i in items])
+    def from_dicts(cls, items: list[dict], /) -> list[Self]:
+        """Validate all the items of YouTube API response in one go."""
+        return _YT_VIDEO_DETAILS_LIST.validate_python([flatten_item(i) for i in items])
+
+    @staticmethod
+    def frame_from_dicts(items: list[dict], /) -> pl.DataFrame:
+        """
+        Columnar version of `from_dicts` which never builds a model. Use it when
+        the details are only serialized (e.g. as Arrow).
+        """
+        rows = [flatten_item(i) for i in items]
+        columns = {
+            name: [i[name] for i in rows] for name in YT_VIDEO_DETAILS_API_SCHEMA
+        }
+        columns["durationInSec"] = [
+            None if i is None else parse_iso8601_duration(i)
+            for i in columns["duration"]
+        ]
+        # Building a list column from lists is slow, split joined tags instead
+        columns["tags"] = [
+            None if i is None else _TAGS_SEPARATOR.join(i) for i in columns["tags"]
+        ]
+        tags = pl.col("tags")
+        return (
+            pl.DataFrame(columns, schema=_YT_VIDEO_DETAILS_COLUMNS_SCHEMA)
+            .with_columns(
+                pl.col("publishedAt").str.to_datetime(),
+                pl.when(tags == "")
+                .then(pl.lit([], pl.List(pl.Utf8)))
+                .otherwise(tags.str.split(_TAGS_SEPARATOR))
+                .alias("tags"),
+            )
+            .select(list(YtVideoDetails.model_fields))
+        )
+
+
+_YT_VIDEO_DETAILS_LIST: Final = TypeAdapter(list[YtVideoDetails])
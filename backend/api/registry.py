@@ -0,0 +1,268 @@
+"""
+Registry of the models served by `/ml` routes.
+
+Every model is an artifact (see `ml.artifacts`) whose manifest a background thread
+polls. A new version is loaded and warmed up on that thread while requests keep
+using the current one, then it replaces the current one by swapping a reference,
+so a rollout costs no downtime and no slow first request. A failed load is logged
+and the current model keeps serving.
+
+Previous versions are kept in memory. `rollback` publishes one of them again as the
+artifact, so every process (gunicorn workers, inference pools) which serves the
+artifact swaps back to it from memory, without loading it.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Callable, Generic, TypeVar
+
+import numpy as np
+import polars as pl
+from fastapi import HTTPException
+from scipy.sparse import spmatrix
+
+from api.configs import MODELS_KEEP_VERSIONS, MODELS_POLL_INTERVAL_SEC
+from ml import artifacts
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+T = TypeVar("T")
+
+
+def _is_mapped(array: np.ndarray) -> bool:
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base  # type: ignore
+    return False
+
+
+def model_memory(model: Any) -> tuple[int, int]:
+    """
+    Estimated bytes used by arrays, frames and containers reachable from `model`,
+    and the part of them which is memory-mapped (shared between processes).
+    """
+    total = mapped = 0
+    seen: set[int] = set()
+    stack = [model]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, np.ndarray):
+            total += obj.nbytes
+            mapped += obj.nbytes if _is_mapped(obj) else 0
+        elif isinstance(obj, spmatrix):
+            stack.extend(vars(obj).values())
+        elif isinstance(obj, pl.DataFrame):
+            total += obj.estimated_size()
+        elif isinstance(obj, str | bytes | int | float):
+            total += sys.getsizeof(obj)
+        elif isinstance(obj, dict):
+            total += sys.getsizeof(obj)
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, list | tuple | set):
+            total += sys.getsizeof(obj)
+            stack.extend(obj)
+        elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+            stack.extend(vars(obj).values())
+    return total, mapped
+
+
+@dataclass(eq=False)
+class LoadedModel(Generic[T]):
+    model: T
+    version: str
+    meta: dict[str, Any]
+    loadedAt: datetime = field(default_factory=datetime.now)
+    loadSeconds: float = 0
+    memoryBytes: int = 0
+    mappedBytes: int = 0
+
+    def info(self) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "loadedAt": self.loadedAt,
+            "loadSeconds": round(self.loadSeconds, 3),
+            "memoryBytes": self.memoryBytes,
+            "mappedBytes": self.mappedBytes,
+        }
+
+
+class ModelRegistry(Generic[T]):
+    """
+    Serve the model of artifact at `path`. `loader` loads the model from `path`,
+    `saver` saves a model into `path` (with the meta of its artifact) and returns its
+    version, and `warm_up` makes a dummy prediction before the model is served.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        path: str | Path,
+        *,
+        loader: Callable[[str | Path], T],
+        saver: Callable[[T, str | Path, dict[str, Any]], str],
+        warm_up: Callable[[T], Any] | None = None,
+        keep: int = MODELS_KEEP_VERSIONS,
+        poll_interval: float = MODELS_POLL_INTERVAL_SEC,
+    ) -> None:
+        self.name = name
+        self.path = path
+        self.loader = loader
+        self.saver = saver
+        self.warm_up = warm_up
+        self.poll_interval = poll_interval
+        self._current: LoadedModel[T] | None = None
+        self._previous: deque[LoadedModel[T]] = deque(maxlen=keep)
+        self._failed_version: str | None = None
+        self._watch = False
+        self._reset_threads()
+        # Lock may be held by the watcher while a worker (or pool) process is forked
+        os.register_at_fork(after_in_child=self._reset_threads)
+
+    def _reset_threads(self) -> None:
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: threading.Thread | None = None
+
+    def _load(self, version: str, meta: dict[str, Any]) -> LoadedModel[T]:
+        start = time.perf_counter()
+        model = self.loader(self.path)
+        if self.warm_up is not None:
+            self.warm_up(model)
+        memory, mapped = model_memory(model)
+        return LoadedModel(
+            model,
+            version,
+            meta,
+            loadSeconds=time.perf_counter() - start,
+            memoryBytes=memory,
+            mappedBytes=mapped,
+        )
+
+    def _swap(self, loaded: LoadedModel[T]) -> None:
+        if loaded in self._previous:
+            self._previous.remove(loaded)
+        if self._current is not None:
+            self._previous.append(self._current)
+        self._current = loaded
+
+    def refresh(self) -> bool:
+        """Serve the version of artifact if it is new. Returns whether it swapped."""
+        with self._lock:
+            manifest = artifacts.read_manifest(self.path)
+            if manifest is None or manifest["version"] == self._failed_version:
+                return False
+            version = manifest["version"]
+            if self._current is not None and version == self._current.version:
+                return False
+            for loaded in self._previous:
+                if loaded.version == version:
+                    self._swap(loaded)
+                    logging.info(f"Model {self.name!r} swapped back to {version}.")
+                    return True
+            try:
+                loaded = self._load(version, manifest["meta"])
+            except Exception:
+                logging.exception(f"Loading version {version} of {self.name!r} failed.")
+                self._failed_version = version
+                return False
+            self._swap(loaded)
+        logging.info(
+            f"Model {self.name!r} of version {version} loaded and warmed up in "
+            f"{loaded.loadSeconds:.3f}s."
+        )
+        return True
+
+    def _watch_loop(self) -> None:
+        self.refresh()
+        while not self._stop.wait(self.poll_interval):
+            self.refresh()
+
+    def start(self) -> None:
+        """Load the current version, then watch the artifact on a daemon thread."""
+        self._watch = True
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch_loop,
+            name=f"registry-{self.name}",
+            daemon=True,
+        )
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._watch = False
+        self._stop.set()
+
+    def get(self) -> T:
+        """
+        Model which is being served. Loads it (only) if no version is loaded yet.
+
+        Raises:
+            HTTPException: With 404 status code if there is no artifact.
+        """
+        # Processes forked from a watching process (like inference pool) watch too
+        if self._watch and self._watcher is None:
+            self.start()
+        loaded = self._current
+        if loaded is None:
+            self.refresh()
+            loaded = self._current
+        if loaded is None:
+            raise HTTPException(404, {"error": "Model not found.", "model": self.name})
+        return loaded.model
+
+    def rollback(self, version: str | None = None) -> LoadedModel[T]:
+        """
+        Publish a previous `version` (last one by default) as the artifact again and
+        serve it. Takes as long as saving the model.
+
+        Raises:
+            HTTPException: With 404 status code if no such version is kept.
+        """
+        with self._lock:
+            loaded = next(
+                (
+                    i
+                    for i in reversed(self._previous)
+                    if version is None or i.version == version
+                ),
+                None,
+            )
+            if loaded is None:
+                raise HTTPException(
+                    404,
+                    {
+                        "error": "No such previous version of model.",
+                        "model": self.name,
+                        "version": version,
+                    },
+                )
+            loaded.version = self.saver(loaded.model, self.path, loaded.meta)
+            self._failed_version = None
+            self._swap(loaded)
+        logging.info(f"Model {self.name!r} rolled back to {loaded.version}.")
+        return loaded
+
+    def info(self) -> dict[str, Any]:
+        current = self._current
+        return {
+            "name": self.name,
+            "path": str(self.path),
+            "artifactVersion": artifacts.version(self.path),
+            "failedVersion": self._failed_version,
+            "current": current.info() if current is not None else None,
+            "previous": [i.info() for i in reversed(self._previous)],
+        }
@@ -1 +1 @@
-from . import db, ml, youtube
+from . import db, jobs, ml, youtube
@@ -1,9 +1,10 @@
 from fastapi import APIRouter
 
-from . import ctt, youtube
+from . import ctt, indexes, youtube
 
 db_route = APIRouter(prefix="/db", tags=["mongodb"])
 
 
 db_route.include_router(youtube.db_yt_route)
 db_route.include_router(ctt.router)
+db_route.include_router(indexes.router)
@@ -2,17 +2,23 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pymongo import UpdateOne
 
 from api.configs import COLLECTION_CTT_CHANNELS, DB_YOUTUBE
+from api.jobs import JobQueue, get_job_queue
 from api.models.ctt import CttChannelData
+from api.models.job import Job
 
 from .connect import get_db_client
+from .stream import StreamParams, ndjson_stream_response
 
 if TYPE_CHECKING:
     from motor.motor_asyncio import AsyncIOMotorCollection
 
+    from api.jobs import JobFunc
+
 
 router = APIRouter(prefix="/ctt", tags=["ctt"])
 
@@ -36,6 +42,21 @@ async def get_all_channel_data(
     return data
 
 
+@router.post(
+    "/stream",
+    response_class=StreamingResponse,
+    description=(
+        "Stream CttChannelData from database as NDJSON, sorted by `_id`. Pass `_id` "
+        "of the last document as `after_id` to get the next page."
+    ),
+)
+async def stream_all_channel_data(
+    params: StreamParams = Depends(),
+    collection: AsyncIOMotorCollection = Depends(get_collection),
+) -> StreamingResponse:
+    return await ndjson_stream_response(collection, params)
+
+
 @router.put(
     "/",
     status_code=204,
@@ -50,24 +71,46 @@ async def update_one_channel_data(
     )
 
 
+async def upsert_channels_data(
+    data: list[CttChannelData],
+    collection: AsyncIOMotorCollection,
+) -> None:
+    operations = [
+        UpdateOne({"channelId": i.channelId}, {"$set": i.model_dump()}, upsert=True)
+        for i in data
+    ]
+    await collection.bulk_write(operations)
+
+
+def upsert_channels_data_job(
+    data: list[CttChannelData],
+    collection: AsyncIOMotorCollection,
+) -> JobFunc:
+    """Job function to upsert CttChannelData, see `api.jobs`."""
+
+    async def job_func(job: Job) -> None:
+        job.progress["total"] = len(data)
+        await upsert_channels_data(data, collection)
+        job.progress["done"] = len(data)
+
+    return job_func
+
+
 @router.put(
     "/many",
-    status_code=204,
-    description="Update or Insert CttChannelData in many into database.",
+    status_code=202,
+    description=(
+        "Update or Insert CttChannelData in many into database. Runs as a background "
+        "job, poll it at `/jobs/{job_id}`."
+    ),
 )
 async def update_many_channels_data(
     data: list[CttChannelData],
-    bg_tasks: BackgroundTasks,
     collection: AsyncIOMotorCollection = Depends(get_collection),
-):
+    job_queue: JobQueue = Depends(get_job_queue),
+) -> Job:
     if not data:
         raise HTTPException(400, {"error": "Provide data to add into database."})
-
-    async def perform_bulk_write(data: list[CttChannelData]):
-        operations = [
-            UpdateOne({"channelId": i.channelId}, {"$set": i.model_dump()}, upsert=True)
-            for i in data
-        ]
-        await collection.bulk_write(operations)
-
-    bg_tasks.add_task(perform_bulk_write, data)
+    return await job_queue.submit(
+        "dbCttChannels", upsert_channels_data_job(data, collection)
+    )
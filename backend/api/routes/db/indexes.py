@@ -0,0 +1,165 @@
+"""
+Indexes of `YoutubeDB` collections.
+
+Every lookup filters on `id`, `channelId` or `videoIds` (with `$in` over thousands
+of values), so these are indexed to avoid collection scans. Indexes are ensured in
+app's lifespan and `/db/indexes` reports whether the lookups actually use them.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any
+
+from fastapi import APIRouter, Depends
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from api.configs import (
+    COLLECTION_CTT_CHANNELS,
+    COLLECTION_YT_API_FETCH_PROGRESS,
+    COLLECTION_YT_API_QUOTA,
+    COLLECTION_YT_CHANNEL_VIDEO,
+    COLLECTION_YT_VIDEO,
+    DB_YOUTUBE,
+)
+
+from .connect import get_db_client
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+
+
+router = APIRouter(prefix="/indexes", tags=["indexes"])
+
+INDEXES: dict[str, list[IndexModel]] = {
+    COLLECTION_YT_VIDEO: [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # Titles of labelled channels for CTT incremental training
+        IndexModel([("channelId", ASCENDING)], name="channelId"),
+    ],
+    COLLECTION_YT_CHANNEL_VIDEO: [
+        IndexModel([("channelId", ASCENDING)], name="channelId_unique", unique=True),
+        # Multikey index, as `videoIds` is an array
+        IndexModel([("videoIds", ASCENDING)], name="videoIds"),
+    ],
+    COLLECTION_CTT_CHANNELS: [
+        IndexModel([("channelId", ASCENDING)], name="channelId_unique", unique=True),
+    ],
+    COLLECTION_YT_API_QUOTA: [
+        IndexModel(
+            [("key", ASCENDING), ("day", ASCENDING)], name="key_day_unique", unique=True
+        ),
+    ],
+    COLLECTION_YT_API_FETCH_PROGRESS: [
+        IndexModel(
+            [("token", ASCENDING), ("seq", ASCENDING)],
+            name="token_seq_unique",
+            unique=True,
+        ),
+    ],
+}
+
+# Sample of the queries made by routes, explained by `/db/indexes`
+_EXPLAIN_QUERIES: dict[str, list[dict[str, Any]]] = {
+    COLLECTION_YT_VIDEO: [{"id": {"$in": [""]}}, {"channelId": {"$in": [""]}}],
+    COLLECTION_YT_CHANNEL_VIDEO: [
+        {"channelId": {"$in": [""]}},
+        {"videoIds": {"$in": [""]}},
+    ],
+    COLLECTION_CTT_CHANNELS: [{"channelId": {"$in": [""]}}],
+}
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    """
+    Create indexes of all the collections (if not exist). If existing documents
+    violate a unique index, a non-unique index is created instead with a warning.
+    """
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        for index in indexes:
+            try:
+                await collection.create_indexes([index])
+            except DuplicateKeyError as e:
+                name = index.document["name"].removesuffix("_unique")
+                logging.warning(
+                    f"Duplicate documents in {collection_name!r}, creating "
+                    f"non-unique index {name!r} instead. {e}"
+                )
+                keys = list(index.document["key"].items())
+                await collection.create_index(keys, name=name)
+
+
+async def ensure_indexes_on_startup() -> None:
+    """Ensure indexes without stopping the app from starting if DB is down."""
+    try:
+        await ensure_indexes(get_db_client()[DB_YOUTUBE])
+    except PyMongoError as e:
+        logging.warning(f"Could not ensure database indexes. {e!r}")
+
+
+def _winning_stages(plan: dict[str, Any]) -> list[str]:
+    """
+    Flatten stages of the winning plan, e.g. `["FETCH", "IXSCAN"]`. Unknown shapes
+    of plan give no stages instead of failing.
+    """
+    # Slot based engine (MongoDB >= 5.1) nests the plan under `queryPlan`
+    plan = plan.get("queryPlan", plan)
+    stages = [plan["stage"]] if "stage" in plan else []
+    if "inputStage" in plan:
+        stages.extend(_winning_stages(plan["inputStage"]))
+    for i in plan.get("inputStages", []):
+        stages.extend(_winning_stages(i))
+    return stages
+
+
+async def _explain(
+    collection: AsyncIOMotorCollection, query: dict[str, Any]
+) -> dict[str, Any]:
+    explain = await collection.find(query).explain()
+    stages = _winning_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+    execution_stats = explain.get("executionStats", {})
+    return {
+        "query": query,
+        "stages": stages,
+        "usesIndex": "COLLSCAN" not in stages if stages else None,
+        "totalKeysExamined": execution_stats.get("totalKeysExamined"),
+        "totalDocsExamined": execution_stats.get("totalDocsExamined"),
+        "executionTimeMillis": execution_stats.get("executionTimeMillis"),
+    }
+
+
+async def get_db() -> AsyncIOMotorDatabase:
+    return get_db_client()[DB_YOUTUBE]
+
+
+@router.get(
+    "/",
+    description=(
+        "Indexes of the collections with their usage stats, and the explained "
+        "query plan of the lookups made by routes."
+    ),
+)
+async def get_indexes_diagnostics(
+    db: AsyncIOMotorDatabase = Depends(get_db),
+) -> dict[str, Any]:
+    diagnostics = {}
+    for collection_name in INDEXES:
+        collection = db[collection_name]
+        index_stats = await collection.aggregate([{"$indexStats": {}}]).to_list(None)
+        diagnostics[collection_name] = {
+            "indexes": {
+                i["name"]: {
+                    "key": i["key"],
+                    "ops": i["accesses"]["ops"],
+                    "since": i["accesses"]["since"],
+                }
+                for i in index_stats
+            },
+            "explain": [
+                await _explain(collection, query)
+                for query in _EXPLAIN_QUERIES.get(collection_name, [])
+            ],
+        }
+    return diagnostics
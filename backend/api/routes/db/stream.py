@@ -0,0 +1,130 @@
+"""
+Stream documents of a collection instead of loading them all with `to_list(None)`.
+
+Cursor is iterated with a fixed `batch_size`, each document is serialized and sent
+as soon as it is read, so memory of backend stays constant whatever the size of the
+collection. Documents are sorted by `_id`, pass the `_id` of last received document
+as `after_id` to request the next page.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, AsyncIterator
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pymongo import ASCENDING
+
+from api.configs import DB_STREAM_BATCH_SIZE
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorCursor
+
+
+class StreamParams:
+    """Query params (as dependency) of the routes which stream a collection."""
+
+    def __init__(
+        self,
+        fields: list[str] | None = Query(
+            None, description="Fields to return (projection), `_id` is always sent."
+        ),
+        after_id: str | None = Query(
+            None, description="Return documents after this `_id` (exclusive)."
+        ),
+        before_id: str | None = Query(
+            None, description="Return documents before this `_id` (exclusive)."
+        ),
+        limit: int = Query(0, description="Max. no. of documents, 0 for all.", ge=0),
+        batch_size: int = Query(
+            DB_STREAM_BATCH_SIZE,
+            description="No. of documents read from database at a time.",
+            gt=0,
+            le=10_000,
+        ),
+    ) -> None:
+        self.fields = fields
+        self.after_id = _parse_object_id(after_id, "after_id")
+        self.before_id = _parse_object_id(before_id, "before_id")
+        self.limit = limit
+        self.batch_size = batch_size
+
+    @property
+    def filter(self) -> dict[str, Any]:
+        id_range = {}
+        if self.after_id is not None:
+            id_range["$gt"] = self.after_id
+        if self.before_id is not None:
+            id_range["$lt"] = self.before_id
+        return {"_id": id_range} if id_range else {}
+
+    @property
+    def projection(self) -> dict[str, int] | None:
+        if not self.fields:
+            return None
+        return dict.fromkeys(self.fields, 1)
+
+
+def _parse_object_id(value: str | None, name: str) -> ObjectId | None:
+    if value is None:
+        return None
+    try:
+        return ObjectId(value)
+    except InvalidId:
+        raise HTTPException(400, {"error": f"Invalid {name}.", name: value}) from None
+
+
+def _json_default(o: Any) -> str:
+    if isinstance(o, ObjectId):
+        return str(o)
+    if isinstance(o, datetime):
+        return o.isoformat()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def find_sorted_by_id(
+    collection: AsyncIOMotorCollection,
+    params: StreamParams,
+) -> AsyncIOMotorCursor:
+    """Cursor over `_id` range of `params`, uses the default `_id` index."""
+    return collection.find(
+        params.filter,
+        params.projection,
+        sort=[("_id", ASCENDING)],
+        limit=params.limit,
+        batch_size=params.batch_size,
+    )
+
+
+async def _ndjson_documents(
+    first: dict,
+    cursor: AsyncIOMotorCursor,
+) -> AsyncIterator[str]:
+    try:
+        yield json.dumps(first, default=_json_default) + "\n"
+        async for doc in cursor:
+            yield json.dumps(doc, default=_json_default) + "\n"
+    finally:
+        await cursor.close()
+
+
+async def ndjson_stream_response(
+    collection: AsyncIOMotorCollection,
+    params: StreamParams,
+) -> StreamingResponse:
+    """
+    Stream documents as NDJSON. First document is read before the response starts,
+    so an empty result still responds with 404.
+    """
+    cursor = find_sorted_by_id(collection, params)
+    first = await anext(cursor, None)
+    if first is None:
+        await cursor.close()
+        raise HTTPException(404, {"error": "No data from database."})
+    return StreamingResponse(
+        _ndjson_documents(first, cursor), media_type="application/x-ndjson"
+    )
@@ -3,10 +3,20 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Iterable
 
 import polars as pl
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile
-from pymongo import InsertOne, UpdateOne
-
-from api.configs import COLLECTION_YT_CHANNEL_VIDEO, DB_YOUTUBE
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile
+from pymongo import UpdateOne
+
+from api._utils import batch_iter
+from api.arrow import (
+    accepts_arrow,
+    arrow_response,
+    check_columns,
+    is_arrow_content,
+    read_arrow,
+)
+from api.configs import BULK_WRITE_CHUNK_SIZE, COLLECTION_YT_CHANNEL_VIDEO, DB_YOUTUBE
+from api.jobs import JobQueue, get_job_queue
+from api.models.job import Job
 from api.models.youtube import YtChannelVideoData
 from api.models.youtube.video import YtVideoDetails
 from api.routes.db.connect import get_db_client
@@ -14,12 +24,17 @@ from api.routes.db.connect import get_db_client
 if TYPE_CHECKING:
     from motor.motor_asyncio import AsyncIOMotorCollection
 
+    from api.jobs import JobFunc
+
 
 db_yt_channel_video_route = APIRouter(
     prefix="/channel/video",
     tags=["channel", "channelVideo"],
 )
 
+# No. of candidate ids looked up in database at a time while excluding existing ids
+_EXCLUDE_IDS_BATCH_SIZE = 10_000
+
 
 async def get_collection() -> AsyncIOMotorCollection:
     collection = get_db_client()[DB_YOUTUBE][COLLECTION_YT_CHANNEL_VIDEO]
@@ -43,77 +58,117 @@ async def get_channels_videos_data(
     )
 
 
-async def __update_channels_videos_data(
+async def upsert_channels_videos_data(
     data: Iterable[YtChannelVideoData],
     collection: AsyncIOMotorCollection,
 ) -> None:
-    existing_channels = await collection.find(
-        {"channelId": {"$in": [ch_data.channelId for ch_data in data]}}
-    ).to_list(None)
-    existing_channels_dict = {
-        channel["channelId"]: channel for channel in existing_channels
-    }
-
-    operations = []
-    for i in data:
-        existing_channel = existing_channels_dict.get(i.channelId)
-        if existing_channel is None:
-            operations.append(InsertOne(i.model_dump()))
-            continue
-        existing_video_ids = set(existing_channel.get("videoIds", []))
-        new_video_ids = set(i.videoIds)
-        if new_video_ids - existing_video_ids:
-            operations.append(
-                UpdateOne(
-                    {"channelId": i.channelId},
-                    {"$set": {"videoIds": list(existing_video_ids | new_video_ids)}},
-                )
+    """
+    Merge videoIds into channels' data on database side with `$addToSet`, so that
+    existing arrays are never read and concurrent updates are not lost. Title is
+    always set, so that renamed channels get their new title.
+    """
+    for batch in batch_iter(list(data), BULK_WRITE_CHUNK_SIZE):
+        operations = [
+            UpdateOne(
+                {"channelId": i.channelId},
+                {
+                    "$set": {"channelTitle": i.channelTitle},
+                    "$addToSet": {"videoIds": {"$each": i.videoIds}},
+                },
+                upsert=True,
             )
-    if operations:
-        await collection.bulk_write(operations)
+            for i in batch
+        ]
+        await collection.bulk_write(operations, ordered=False)
+
+
+def upsert_channels_videos_data_job(
+    data: list[YtChannelVideoData],
+    collection: AsyncIOMotorCollection,
+) -> JobFunc:
+    """Job function to upsert channels videos data, see `api.jobs`."""
+
+    async def job_func(job: Job) -> None:
+        job.progress["total"] = len(data)
+        await upsert_channels_videos_data(data, collection)
+        job.progress["done"] = len(data)
+
+    return job_func
 
 
 @db_yt_channel_video_route.put(
     "/",
-    status_code=204,
-    description="Update or Insert Channel Data into Database.",
+    status_code=202,
+    description=(
+        "Update or Insert Channel Data into Database. Runs as a background job, poll "
+        "it at `/jobs/{job_id}`."
+    ),
 )
 async def update_channels_videos_data(
     data: list[YtChannelVideoData],
-    bg_tasks: BackgroundTasks,
     collection: AsyncIOMotorCollection = Depends(get_collection),
-):
-    if data:
-        bg_tasks.add_task(__update_channels_videos_data, data, collection)
+    job_queue: JobQueue = Depends(get_job_queue),
+) -> Job:
+    if not data:
+        raise HTTPException(400, {"error": "Provide data to add into database."})
+    return await job_queue.submit(
+        "dbYtChannelVideo", upsert_channels_videos_data_job(data, collection)
+    )
 
 
 @db_yt_channel_video_route.put(
     "/usingVideosDetails",
-    status_code=204,
-    description="Insert or Update Multiple Channels Videos Data in Database Using Video Details.",
+    status_code=202,
+    description=(
+        "Insert or Update Multiple Channels Videos Data in Database Using Video "
+        "Details. Runs as a background job, poll it at `/jobs/{job_id}`."
+    ),
 )
 async def update_using_videos_details(
     data: list[YtVideoDetails],
-    bg_tasks: BackgroundTasks,
     collection: AsyncIOMotorCollection = Depends(get_collection),
-):
-    if data:
-        ch_video_data = list(YtChannelVideoData.from_video_details(data))
-        bg_tasks.add_task(__update_channels_videos_data, ch_video_data, collection)
+    job_queue: JobQueue = Depends(get_job_queue),
+) -> Job:
+    if not data:
+        raise HTTPException(400, {"error": "Provide data to add into database."})
+    ch_video_data = list(YtChannelVideoData.from_video_details(data))
+    return await job_queue.submit(
+        "dbYtChannelVideo", upsert_channels_videos_data_job(ch_video_data, collection)
+    )
+
+
+async def exclude_existing_video_ids(
+    ids: Iterable[str],
+    collection: AsyncIOMotorCollection,
+) -> list[str]:
+    """
+    Check candidate ids in batches against the multikey `videoIds` index. Only the
+    ids found in each matched channel are returned by database, not whole arrays.
+    """
+    ids_from_data = list(dict.fromkeys(ids))
+    ids_from_db = set()
+    for batch in batch_iter(ids_from_data, _EXCLUDE_IDS_BATCH_SIZE):
+        pipeline = [
+            {"$match": {"videoIds": {"$in": batch}}},
+            {
+                "$project": {
+                    "_id": 0,
+                    "hits": {"$setIntersection": ["$videoIds", batch]},
+                }
+            },
+        ]
+        async for i in collection.aggregate(pipeline):
+            ids_from_db.update(i["hits"])
+    return [i for i in ids_from_data if i not in ids_from_db]
 
 
 async def exclude_ids_exists_in_db(
     data: list[YtChannelVideoData],
     collection: AsyncIOMotorCollection,
 ) -> list[str]:
-    ids_from_data = {j for i in data for j in i.videoIds}
-    pipeline = [
-        {"$match": {"channelId": {"$in": [i.channelId for i in data]}}},
-        {"$group": {"_id": None, "videoIds": {"$addToSet": "$videoIds"}}},
-    ]
-    ch_data = await collection.aggregate(pipeline).to_list(None)
-    ids_from_db = {j for i in ch_data[0]["videoIds"] for j in i} if ch_data else set()
-    return list(ids_from_data - ids_from_db)
+    return await exclude_existing_video_ids(
+        (j for i in data for j in i.videoIds), collection
+    )
 
 
 @db_yt_channel_video_route.post(
@@ -132,27 +187,31 @@ async def exclude_existing_ids_using_list(
 
 @db_yt_channel_video_route.post(
     "/excludeExistingIds/frame",
-    description="Exclude VideosId which exists already in database using dataframe.",
+    description=(
+        "Exclude VideosId which exists already in database using dataframe. Upload "
+        "it as row-oriented JSON or as an Arrow IPC stream (with its content type). "
+        "Response is an Arrow IPC stream (`videoId` column) if it is in `Accept` "
+        "header."
+    ),
 )
 async def exclude_ids_exists_in_database_using_df(
+    request: Request,
     data: UploadFile,
     collection: AsyncIOMotorCollection = Depends(get_collection),
 ) -> list[str]:
-    uploaded_df = pl.read_json(await data.read())
-
-    # Validate dataframe
-    _ = {"channelId", "channelTitle", "videoId"}
-    if not all(i in uploaded_df.columns for i in _):
-        raise HTTPException(
-            400,
-            {
-                "error": "DataFrame must have the required columns.",
-                "requiredColumns": _ - set(uploaded_df.columns),
-            },
-        )
-
-    ch_video_data = list(YtChannelVideoData.from_df(uploaded_df))
-    id_not_exists = await exclude_ids_exists_in_db(ch_video_data, collection)
-    if id_not_exists:
-        return id_not_exists
-    raise HTTPException(204)
+    content = await data.read()
+    if is_arrow_content(data.headers):
+        uploaded_df = read_arrow(content)
+    else:
+        uploaded_df = pl.read_json(content)
+    check_columns(uploaded_df, ("channelId", "channelTitle", "videoId"))
+
+    # Same ids as `YtChannelVideoData.from_df` but without building models
+    id_not_exists = await exclude_existing_video_ids(
+        uploaded_df.drop_nulls(["channelId", "videoId"])["videoId"], collection
+    )
+    if not id_not_exists:
+        raise HTTPException(204)
+    if accepts_arrow(request):
+        return arrow_response(pl.DataFrame({"videoId": id_not_exists}))
+    return id_not_exists
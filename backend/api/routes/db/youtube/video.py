@@ -2,12 +2,18 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from fastapi import APIRouter, Depends, HTTPException
-from pymongo import InsertOne, UpdateOne
+import polars as pl
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pymongo import UpdateOne
 
-from api.configs import COLLECTION_YT_VIDEO, DB_YOUTUBE
+from api._utils import batch_iter
+from api.arrow import accepts_arrow, arrow_response
+from api.configs import BULK_WRITE_CHUNK_SIZE, COLLECTION_YT_VIDEO, DB_YOUTUBE
 from api.models.youtube import YtVideoDetails
+from api.models.youtube.video import fill_duration_in_sec
 from api.routes.db.connect import get_db_client
+from api.routes.db.stream import StreamParams, ndjson_stream_response
 
 if TYPE_CHECKING:
     from motor.motor_asyncio import AsyncIOMotorCollection
@@ -34,18 +40,63 @@ async def get_all_video_details(
     return data
 
 
+@db_yt_video_route.post(
+    "/all/stream",
+    response_class=StreamingResponse,
+    description=(
+        "Stream video details from database as NDJSON, sorted by `_id`. Pass `_id` "
+        "of the last document as `after_id` to get the next page."
+    ),
+)
+async def stream_all_video_details(
+    params: StreamParams = Depends(),
+    collection: AsyncIOMotorCollection = Depends(get_collection),
+) -> StreamingResponse:
+    return await ndjson_stream_response(collection, params)
+
+
 @db_yt_video_route.post(
     "/",
-    description="Get Videos Details from Database with VideosId.",
+    description=(
+        "Get Videos Details from Database with VideosId. Response is an Arrow IPC "
+        "stream if it is in `Accept` header."
+    ),
 )
 async def get_yt_videos_details(
+    request: Request,
     ids: list[str],
     collection: AsyncIOMotorCollection = Depends(get_collection),
 ) -> list[YtVideoDetails]:
-    details = await collection.find({"id": {"$in": ids}}).to_list(None)
-    if details:
-        return details
-    raise HTTPException(404, {"message": "Details not found in database.", "id": ids})
+    projection = {"_id": 0, **dict.fromkeys(YtVideoDetails.model_fields, 1)}
+    details = await collection.find({"id": {"$in": ids}}, projection).to_list(None)
+    if not details:
+        raise HTTPException(
+            404, {"message": "Details not found in database.", "id": ids}
+        )
+    if accepts_arrow(request):
+        # Documents are stored from `YtVideoDetails`, no need to validate them again
+        df = pl.DataFrame(details, infer_schema_length=None)
+        return arrow_response(fill_duration_in_sec(df))
+    return details
+
+
+async def upsert_videos_details(
+    details: list[YtVideoDetails],
+    collection: AsyncIOMotorCollection,
+    *,
+    force_update: bool = False,
+) -> None:
+    """
+    Upsert details without reading existing documents. Existing videos are left
+    as they are unless `force_update`. Large lists are written in chunks.
+    """
+    operator = "$set" if force_update else "$setOnInsert"
+    for batch in batch_iter(details, BULK_WRITE_CHUNK_SIZE):
+        operations = [
+            UpdateOne({"id": video.id}, {operator: video.model_dump()}, upsert=True)
+            for video in batch
+        ]
+        await collection.bulk_write(operations, ordered=False)
 
 
 @db_yt_video_route.put(
@@ -58,17 +109,4 @@ async def update_videos_details(
     force_update: bool = False,
     collection: AsyncIOMotorCollection = Depends(get_collection),
 ):
-    existing_videos = await collection.find(
-        {"id": {"$in": [i.id for i in details]}}
-    ).to_list(None)
-    existing_video_ids = {video["id"]: video for video in existing_videos}
-
-    operations = []
-    for video in details:
-        existing_video = existing_video_ids.get(video.id)
-        if existing_video is None:
-            operations.append(InsertOne(video.model_dump()))
-        elif force_update is True:
-            operations.append(UpdateOne({"id": video.id}, {"$set": video.model_dump()}))
-    if operations:
-        await collection.bulk_write(operations)
+    await upsert_videos_details(details, collection, force_update=force_update)
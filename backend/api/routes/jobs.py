@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from api.jobs import JobQueue, get_job_queue
+from api.models.job import (
+    CttChannelsJobRequest,
+    Job,
+    JobRequest,
+    YtChannelVideoJobRequest,
+    YtVideoStoreJobRequest,
+)
+from api.routes.db.ctt import get_collection as get_ctt_collection
+from api.routes.db.ctt import upsert_channels_data_job
+from api.routes.db.youtube.channel_video import (
+    get_collection as get_channel_video_collection,
+)
+from api.routes.db.youtube.channel_video import upsert_channels_videos_data_job
+from api.routes.youtube.scheduler import YtApiScheduler, get_yt_api_scheduler
+from api.routes.youtube.video import fetch_and_store_videos_details_job
+
+jobs_route = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@jobs_route.post(
+    "/",
+    status_code=202,
+    description=(
+        "Submit a background job. Poll its status, progress and result at "
+        "`/jobs/{job_id}`. `ytVideoStore` job requires the `YT-API-KEY` header."
+    ),
+)
+async def submit_job(
+    job_request: JobRequest,
+    key: str | None = Header(
+        None,
+        alias="YT-API-KEY",
+        description="YouTube Data v3 API Key",
+        min_length=30,
+    ),
+    job_queue: JobQueue = Depends(get_job_queue),
+    scheduler: YtApiScheduler = Depends(get_yt_api_scheduler),
+) -> Job:
+    if isinstance(job_request, YtVideoStoreJobRequest):
+        if key is None:
+            raise HTTPException(400, {"error": "Provide YouTube API key."})
+        job_func = fetch_and_store_videos_details_job(
+            scheduler,
+            key,
+            job_request.ids,
+            part=job_request.part,
+            exclude_existing=job_request.excludeExisting,
+        )
+    elif isinstance(job_request, YtChannelVideoJobRequest):
+        job_func = upsert_channels_videos_data_job(
+            job_request.data, await get_channel_video_collection()
+        )
+    elif isinstance(job_request, CttChannelsJobRequest):
+        job_func = upsert_channels_data_job(job_request.data, get_ctt_collection())
+    return await job_queue.submit(job_request.kind, job_func)
+
+
+@jobs_route.get(
+    "/{job_id}",
+    description="Get status, progress and result (or error) of a job.",
+)
+async def get_job(
+    job_id: str,
+    job_queue: JobQueue = Depends(get_job_queue),
+) -> Job:
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(404, {"error": "Job not found.", "jobId": job_id})
+    return job
+
+
+@jobs_route.delete(
+    "/{job_id}",
+    description=(
+        "Cancel a queued or running job. Job of another worker is cancelled on its "
+        "next heartbeat, poll it to see when it is cancelled."
+    ),
+)
+async def cancel_job(
+    job_id: str,
+    job_queue: JobQueue = Depends(get_job_queue),
+) -> Job:
+    job = await job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(404, {"error": "Job not found.", "jobId": job_id})
+    return job
@@ -1,8 +1,79 @@
-from fastapi import APIRouter
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator
+
+from fastapi import APIRouter, HTTPException
 
 from . import channel_reco, ctt
 
+if TYPE_CHECKING:
+    from api.registry import ModelRegistry
+
 router = APIRouter(prefix="/ml", tags=["ml"])
 
 router.include_router(ctt.router)
 router.include_router(channel_reco.router)
+
+REGISTRIES: dict[str, ModelRegistry] = {
+    i.name: i for i in (ctt.ctt_registry, channel_reco.channel_reco_registry)
+}
+
+
+def preload_models() -> None:
+    """
+    Load the models (and warm them up) into their registries. Called in gunicorn's
+    master before forking, so that workers share the models. Missing models are
+    skipped, their routes respond with 404 as usual.
+    """
+    for name, registry in REGISTRIES.items():
+        if not registry.refresh():
+            logging.warning(f"Model {name!r} is not preloaded.")
+
+
+@asynccontextmanager
+async def registries_lifespan() -> AsyncIterator[None]:
+    """Watch artifacts of models (in background) while the app runs."""
+    for registry in REGISTRIES.values():
+        registry.start()
+    try:
+        yield
+    finally:
+        for registry in REGISTRIES.values():
+            registry.stop()
+
+
+def _get_registry(name: str) -> ModelRegistry:
+    if name not in REGISTRIES:
+        raise HTTPException(
+            404,
+            {"error": "Model not found.", "model": name, "models": list(REGISTRIES)},
+        )
+    return REGISTRIES[name]
+
+
+@router.get(
+    "/models",
+    description=(
+        "Served version, load time (with warm up) and memory (estimated, "
+        "`mappedBytes` are shared between processes) of each model, and of the "
+        "previous versions kept for rollback. Each process reports its own models."
+    ),
+)
+async def get_models() -> list[dict[str, Any]]:
+    return [i.info() for i in REGISTRIES.values()]
+
+
+@router.post(
+    "/models/{name}/rollback",
+    description=(
+        "Publish a previous version (the last one by default) of the model again. "
+        "Every process serving the model swaps to it within the poll interval."
+    ),
+)
+async def rollback_model(name: str, version: str | None = None) -> dict[str, Any]:
+    registry = _get_registry(name)
+    await asyncio.to_thread(registry.rollback, version)
+    return registry.info()
@@ -1,30 +1,35 @@
 from __future__ import annotations
 
-from functools import lru_cache
-from typing import TYPE_CHECKING
-
-import dill
 import polars as pl
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 
-from ml.channel_reco.configs import (
-    CHANNEL_RECO_CHANNELS_DATA_PATH,
-    CHANNEL_RECO_TRANSFORMER_PATH,
-)
-
-if TYPE_CHECKING:
-    from sklearn.pipeline import Pipeline
+from api.registry import ModelRegistry
+from ml.channel_reco.configs import CHANNEL_RECO_INDEX_PATH
+from ml.channel_reco.index import ChannelRecoIndex
 
 router = APIRouter(prefix="/channel_reco", tags=["channel_reco"])
 
 
-@lru_cache(1)
-def load_model_from_path() -> tuple[Pipeline, pl.DataFrame]:
-    if not CHANNEL_RECO_TRANSFORMER_PATH.exists():
-        raise HTTPException(404, {"error": "ChannelReco model not found."})
-    with CHANNEL_RECO_TRANSFORMER_PATH.open("rb") as f:
-        return dill.load(f), pl.read_parquet(CHANNEL_RECO_CHANNELS_DATA_PATH)
+def _warm_up(index: ChannelRecoIndex) -> None:
+    data = pl.DataFrame(
+        {
+            "title": ["warm up prediction"],
+            "tags": [["warm", "up"]],
+            "channelId": ["warmUp"],
+            "channelTitle": ["warmUp"],
+        }
+    )
+    index.top_k(data, 1)
+
+
+channel_reco_registry = ModelRegistry(
+    "channel_reco",
+    CHANNEL_RECO_INDEX_PATH,
+    loader=ChannelRecoIndex.load,
+    saver=lambda index, path, meta: index.save(path),
+    warm_up=_warm_up,
+)
 
 
 @router.get(
@@ -32,9 +37,9 @@ def load_model_from_path() -> tuple[Pipeline, pl.DataFrame]:
     description="Get list of channels which were used for training.",
 )
 def get_channels_list(
-    model_data: tuple[Pipeline, pl.DataFrame] = Depends(load_model_from_path),
-):
-    return model_data[1]
+    index: ChannelRecoIndex = Depends(channel_reco_registry.get),
+) -> list[dict]:
+    return index.channels.to_dicts()
 
 
 class ChannelRecoIn(BaseModel):
@@ -46,22 +51,30 @@ class ChannelRecoIn(BaseModel):
 
 @router.post(
     "/predict",
-    description="Make prediction using list of JSON data.",
+    description=(
+        "Make prediction using list of JSON data. With `channels=true`, only the "
+        "`top_k` most similar other channels are returned (sorted by similarity), "
+        "else similarity with every channel used for training. `dense=true` uses the "
+        "truncated SVD vectors of the index (if it is built with them). Without "
+        "`channels=true`, response (and its memory) grows with the no. of indexed "
+        "channels and `top_k`, `dense` are ignored, so it does not scale to large "
+        "indexes."
+    ),
 )
 async def predict_many(
     data: list[ChannelRecoIn],
     channels: bool = False,
-    model_data: tuple[Pipeline, pl.DataFrame] = Depends(load_model_from_path),
+    top_k: int = Query(10, ge=1, le=1000),
+    dense: bool = False,
+    index: ChannelRecoIndex = Depends(channel_reco_registry.get),
 ):
     df = pl.DataFrame([i.model_dump() for i in data])
     if df.group_by("channelId", "channelTitle").count().height != 1:
         raise HTTPException(400, {"error": "All channels must be same."})
 
-    similarity = model_data[0].transform(df)
     if channels:
-        return (
-            model_data[1]
-            .with_columns(pl.lit(similarity.ravel()).alias("similarity"))
-            .to_dicts()
-        )
-    return list(similarity.ravel())
+        try:
+            return index.top_k(df, top_k, dense=dense).to_dicts()
+        except ValueError as e:
+            raise HTTPException(400, {"error": str(e)}) from None
+    return index.similarity(df).ravel().tolist()
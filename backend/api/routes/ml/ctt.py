@@ -1,28 +1,83 @@
 from __future__ import annotations
 
-from functools import lru_cache
-from typing import TYPE_CHECKING
+import asyncio
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator
 
-import dill
 import polars as pl
-from fastapi import APIRouter, Depends, HTTPException
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel
 
+from api.arrow import accepts_arrow, arrow_response, frame_body, frame_body_openapi
+from api.configs import (
+    CTT_INFERENCE_EXECUTOR,
+    CTT_INFERENCE_MAX_BATCH_SIZE,
+    CTT_INFERENCE_MAX_WAIT_MS,
+    CTT_INFERENCE_WORKERS,
+    CTT_TRAINING_BATCH_SIZE,
+)
+from api.inference import MicroBatcher, create_executor
+from api.jobs import JobQueue, get_job_queue
 from api.models.ctt import ContentTypeEnum
+from api.models.job import Job
+from api.registry import ModelRegistry
+from api.routes.db.ctt import get_collection as get_ctt_collection
+from api.routes.db.stream import StreamParams, find_sorted_by_id
+from api.routes.db.youtube.video import get_collection as get_video_collection
+from ml import artifacts
+from ml.ctt.artifact import load_meta, load_model, save_model
 from ml.ctt.configs import CONTENT_TYPE_TAGS, CTT_MODEL_PATH
+from ml.ctt.incremental import partial_training
 
 if TYPE_CHECKING:
+    from pathlib import Path
+
+    from motor.motor_asyncio import AsyncIOMotorCollection
     from sklearn.pipeline import Pipeline
 
+    from api.jobs import JobFunc
+
 router = APIRouter(prefix="/ctt", tags=["ctt"])
 
 
-@lru_cache(1)
-def load_model_from_path() -> Pipeline:
-    if not CTT_MODEL_PATH.exists():
-        raise HTTPException(404, {"error": "Ctt Model not found."})
-    with CTT_MODEL_PATH.open("rb") as f:
-        return dill.load(f)
+def _save_model(model: Pipeline, path: str | Path, meta: dict[str, Any]) -> str:
+    return save_model(model, path, meta=meta)
+
+
+ctt_registry = ModelRegistry(
+    "ctt",
+    CTT_MODEL_PATH,
+    loader=load_model,
+    saver=_save_model,
+    warm_up=lambda model: model.predict(["warm up prediction"]),
+)
+
+
+def predict_titles(titles: list[str]) -> list[int]:
+    """Runs on the inference pool, with the model served by registry."""
+    return ctt_registry.get().predict(titles).tolist()
+
+
+@asynccontextmanager
+async def ctt_batcher_lifespan() -> AsyncIterator[MicroBatcher]:
+    batcher = MicroBatcher(
+        predict_titles,
+        create_executor(CTT_INFERENCE_EXECUTOR, CTT_INFERENCE_WORKERS),
+        max_batch_size=CTT_INFERENCE_MAX_BATCH_SIZE,
+        max_wait_ms=CTT_INFERENCE_MAX_WAIT_MS,
+        max_concurrency=CTT_INFERENCE_WORKERS,
+    )
+    batcher.start()
+    try:
+        yield batcher
+    finally:
+        await batcher.stop()
+
+
+def get_ctt_batcher(request: Request) -> MicroBatcher:
+    """Dependency to get the batcher created in app's lifespan."""
+    return request.state.ctt_batcher
 
 
 class PredictionIn(BaseModel):
@@ -36,17 +91,196 @@ class PredictionOut(PredictionIn):
 
 @router.post(
     "/predict",
-    description="Make prediction using list of JSON data.",
+    description=(
+        "Make prediction using list of JSON data or an Arrow IPC stream. Response is "
+        "an Arrow IPC stream if it is in `Accept` header."
+    ),
     response_model=list[PredictionOut],
+    openapi_extra=frame_body_openapi(PredictionIn),
+    # Load the model (or respond 404) before queueing the prediction
+    dependencies=[Depends(ctt_registry.get)],
 )
 async def predict(
-    data: list[PredictionIn],
-    model: Pipeline = Depends(load_model_from_path),
+    request: Request,
+    df: pl.DataFrame = Depends(frame_body(PredictionIn)),
+    batcher: MicroBatcher = Depends(get_ctt_batcher),
 ):
-    df = pl.DataFrame([i.model_dump() for i in data])
-    prediction = model.predict(df["title"])
-    return df.with_columns(
-        pl.lit(prediction)
+    prediction = await batcher.submit(df["title"].to_list())
+    df = df.with_columns(
+        pl.Series(prediction, dtype=pl.Int64)
         .map_dict(dict(enumerate(CONTENT_TYPE_TAGS)))
         .alias("contentTypePred")
-    ).to_dicts()
+    )
+    if accepts_arrow(request):
+        return arrow_response(df)
+    return df.to_dicts()
+
+
+@router.get(
+    "/metrics",
+    description=(
+        "Metrics of batched predictions: batch sizes and latencies (in ms) of recent "
+        "requests while waiting in queue and while running on the inference pool."
+    ),
+)
+async def prediction_metrics(
+    batcher: MicroBatcher = Depends(get_ctt_batcher),
+) -> dict:
+    return batcher.metrics()
+
+
+# --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- #
+# Incremental training
+# --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- #
+# Only one training at a time, each one continues from the model of the last one
+_training_lock = asyncio.Lock()
+
+
+async def _titles_of_channels(
+    channels: list[dict],
+    video_collection: AsyncIOMotorCollection,
+) -> pl.DataFrame:
+    videos = await video_collection.find(
+        {"channelId": {"$in": [i["channelId"] for i in channels]}},
+        {"_id": 0, "channelId": 1, "title": 1},
+    ).to_list(None)
+    return pl.DataFrame(
+        channels, schema={"channelId": pl.Utf8, "contentType": pl.Utf8}
+    ).join(
+        pl.DataFrame(videos, schema={"channelId": pl.Utf8, "title": pl.Utf8}),
+        on="channelId",
+    )
+
+
+async def iter_labelled_titles(
+    ctt_collection: AsyncIOMotorCollection,
+    video_collection: AsyncIOMotorCollection,
+    *,
+    after_id: str | None,
+    batch_size: int,
+) -> AsyncIterator[tuple[pl.DataFrame, int, str]]:
+    """
+    Titles of stored videos of the channels labelled (in CttChannels) after
+    `after_id`, in batches of `batch_size` channels sorted by `_id`. Yields titles,
+    no. of channels and `_id` of the last channel of every batch.
+    """
+    params = StreamParams(
+        fields=["channelId", "contentType"],
+        after_id=after_id,
+        before_id=None,
+        limit=0,
+        batch_size=batch_size,
+    )
+    channels = []
+    async for doc in find_sorted_by_id(ctt_collection, params):
+        channels.append(doc)
+        if len(channels) == batch_size:
+            titles = await _titles_of_channels(channels, video_collection)
+            yield titles, len(channels), str(channels[-1]["_id"])
+            channels = []
+    if channels:
+        titles = await _titles_of_channels(channels, video_collection)
+        yield titles, len(channels), str(channels[-1]["_id"])
+
+
+def incremental_training_job(
+    ctt_collection: AsyncIOMotorCollection,
+    video_collection: AsyncIOMotorCollection,
+    batch_size: int,
+    *,
+    after_id: str | None = None,
+) -> JobFunc:
+    """
+    Job function which updates the current model with the channels labelled since
+    its training and publishes it as a new version, see `api.jobs`. Artifact keeps
+    `_id` of the last trained channel as `trainedUntilId`. A fully trained model has
+    none, so `after_id` must be given for its first update. Model registry swaps in
+    the new version.
+    """
+
+    async def job_func(job: Job) -> dict[str, Any]:
+        async with _training_lock:
+            model = await asyncio.to_thread(load_model, CTT_MODEL_PATH, mmap=False)
+            start_id = load_meta(CTT_MODEL_PATH).get("trainedUntilId", after_id)
+            if start_id is None:
+                raise ValueError("Model has no trainedUntilId, pass after_id.")
+            job.progress.update(channels=0, titles=0)
+            last_id = None
+            async for titles, n_channels, batch_last_id in iter_labelled_titles(
+                ctt_collection,
+                video_collection,
+                after_id=start_id,
+                batch_size=batch_size,
+            ):
+                last_id = batch_last_id
+                if not titles.is_empty():
+                    await asyncio.to_thread(partial_training, model, titles)
+                job.progress["channels"] += n_channels
+                job.progress["titles"] += titles.height
+
+            if last_id is None:
+                return {"updated": False, "version": artifacts.version(CTT_MODEL_PATH)}
+            version = await asyncio.to_thread(
+                save_model, model, CTT_MODEL_PATH, meta={"trainedUntilId": last_id}
+            )
+            return {"updated": True, "version": version, "trainedUntilId": last_id}
+
+    return job_func
+
+
+@router.post(
+    "/train",
+    status_code=202,
+    description=(
+        "Update the model with titles of stored videos of the channels labelled "
+        "(in CttChannels) since its last training, with `partial_fit`. Runs as a "
+        "background job, poll it at `/jobs/{job_id}`. New version of the model is "
+        "served without restart. Model must use the hashing vectorizer.\n\n"
+        "A fully trained model does not know which channels it was trained on, so "
+        "its first update needs `after_id`: `_id` of the last channel (in "
+        "CttChannels) of its training data, or `000000000000000000000000` for all "
+        "of them. Channels labelled again keep their `_id`, so their new label is "
+        "not trained until the next full training."
+    ),
+)
+async def train_incrementally(
+    after_id: str | None = Query(
+        None,
+        description="Train channels after this `_id`, only for a fully trained model.",
+    ),
+    ctt_collection: AsyncIOMotorCollection = Depends(get_ctt_collection),
+    video_collection: AsyncIOMotorCollection = Depends(get_video_collection),
+    job_queue: JobQueue = Depends(get_job_queue),
+) -> Job:
+    if not artifacts.exists(CTT_MODEL_PATH):
+        raise HTTPException(404, {"error": "Ctt Model not found."})
+    meta = load_meta(CTT_MODEL_PATH)
+    if meta.get("vectorizer") != "hashing":
+        raise HTTPException(
+            400,
+            {"error": "Only Ctt Model with hashing vectorizer can be trained again."},
+        )
+    # Training channels before the watermark again would count them twice
+    if after_id is None and "trainedUntilId" not in meta:
+        raise HTTPException(
+            400, {"error": "Ctt Model is fully trained, pass after_id to update it."}
+        )
+    if after_id is not None and "trainedUntilId" in meta:
+        raise HTTPException(
+            400,
+            {
+                "error": "Ctt Model is trained until a channel, can not pass after_id.",
+                "trainedUntilId": meta["trainedUntilId"],
+            },
+        )
+    if after_id is not None and not ObjectId.is_valid(after_id):
+        raise HTTPException(400, {"error": "Invalid after_id.", "after_id": after_id})
+    return await job_queue.submit(
+        "mlCttTraining",
+        incremental_training_job(
+            ctt_collection,
+            video_collection,
+            CTT_TRAINING_BATCH_SIZE,
+            after_id=after_id,
+        ),
+    )
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, AsyncIterator
+
+import httpx
+from fastapi import Request
+
+from api.configs import (
+    YT_API_BASE_URL,
+    YT_API_MAX_CONCURRENCY,
+    YT_API_MAX_CONNECTIONS,
+)
+
+if TYPE_CHECKING:
+    from httpx._types import QueryParamTypes
+
+
+@dataclass(eq=False, frozen=True)
+class YtApiClient:
+    """
+    App-lifetime client for YouTube Data v3 API. Connections are pooled and kept
+    alive (over HTTP/2), and no. of in-flight requests is capped by `semaphore`.
+    """
+
+    client: httpx.AsyncClient
+    semaphore: asyncio.Semaphore
+
+    async def get(
+        self, url: str, *, params: QueryParamTypes, **kwargs: Any
+    ) -> httpx.Response:
+        async with self.semaphore:
+            return await self.client.get(url, params=params, **kwargs)
+
+
+@asynccontextmanager
+async def yt_api_client_lifespan() -> AsyncIterator[YtApiClient]:
+    limits = httpx.Limits(
+        max_connections=YT_API_MAX_CONNECTIONS,
+        max_keepalive_connections=YT_API_MAX_CONNECTIONS,
+        keepalive_expiry=60,
+    )
+    async with httpx.AsyncClient(
+        base_url=YT_API_BASE_URL,
+        http2=True,
+        limits=limits,
+        timeout=httpx.Timeout(10, pool=None),
+    ) as client:
+        yield YtApiClient(client, asyncio.Semaphore(YT_API_MAX_CONCURRENCY))
+
+
+def get_yt_api_client(request: Request) -> YtApiClient:
+    """Dependency to get the client created in app's lifespan."""
+    return request.state.yt_api_client
@@ -0,0 +1,284 @@
+"""
+Quota-aware scheduler for YouTube Data v3 API requests.
+
+- Quota units used by each API key are tracked per day (and stored in database).
+- Requests of each API key pass through a token bucket to respect per-second limits.
+- Transient failures (rate limits, 5xx, network errors) are retried with jittered
+  exponential backoff, whereas `quotaExceeded` raises `YtApiQuotaExceededError`.
+- Ids which could not be fetched can be stored as `FetchProgress` to resume later.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+from zoneinfo import ZoneInfo
+
+import httpx
+from fastapi import Request
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+
+from api._utils import batch_iter
+from api.configs import (
+    COLLECTION_YT_API_FETCH_PROGRESS,
+    COLLECTION_YT_API_QUOTA,
+    DB_YOUTUBE,
+    YT_API_DAILY_QUOTA,
+    YT_API_MAX_RETRIES,
+    YT_API_REQUESTS_PER_SEC,
+)
+from api.routes.db.connect import get_db_client
+from errors import YtApiQuotaExceededError
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorCollection
+
+    from .client import YtApiClient
+
+# YouTube API quota resets at midnight Pacific Time
+_QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+_RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+_RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+_QUOTA_EXCEEDED_REASONS = {"quotaExceeded", "dailyLimitExceeded"}
+_BACKOFF_BASE_SEC = 1.0
+_BACKOFF_MAX_SEC = 32.0
+
+
+def _hash_key(key: str) -> str:
+    """API keys are never stored in database, only their hash."""
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _quota_day() -> str:
+    return f"{datetime.now(_QUOTA_TIMEZONE):%Y-%m-%d}"
+
+
+def _error_reason(response: httpx.Response) -> str | None:
+    try:
+        return response.json()["error"]["errors"][0]["reason"]
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+
+
+def _backoff_delay(attempt: int, response: httpx.Response | None = None) -> float:
+    """Full jitter exponential backoff, honoring `Retry-After` header if present."""
+    if response is not None and "Retry-After" in response.headers:
+        try:
+            return float(response.headers["Retry-After"])
+        except ValueError:
+            pass
+    return random.uniform(0, min(_BACKOFF_MAX_SEC, _BACKOFF_BASE_SEC * 2**attempt))  # noqa: S311
+
+
+@dataclass(eq=False)
+class TokenBucket:
+    rate: float
+    capacity: float
+    tokens: float = field(init=False)
+    updated_at: float = field(init=False, default_factory=time.monotonic)
+    _lock: asyncio.Lock = field(init=False, default_factory=asyncio.Lock)
+
+    def __post_init__(self) -> None:
+        self.tokens = self.capacity
+
+    async def acquire(self, tokens: float = 1) -> None:
+        """Wait until `tokens` are available and take them."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+class YtApiQuota:
+    """
+    Track quota units used by API keys for the current (Pacific Time) day. Units are
+    reserved atomically in database, so the processes (gunicorn workers) and
+    concurrent requests sharing an API key never spend more than its quota.
+    """
+
+    def __init__(self, collection: AsyncIOMotorCollection, daily_quota: int) -> None:
+        self.collection = collection
+        self.daily_quota = daily_quota
+
+    async def used(self, key: str) -> int:
+        doc = await self.collection.find_one(
+            {"key": _hash_key(key), "day": _quota_day()}
+        )
+        return doc["used"] if doc else 0
+
+    async def reserve(self, key: str, units: int) -> None:
+        """
+        Take `units` from the remaining quota of `key`.
+
+        Raises:
+            YtApiQuotaExceededError: When less than `units` are remaining.
+        """
+        _filter = {"key": _hash_key(key), "day": _quota_day()}
+        for _ in range(2):
+            doc = await self.collection.find_one_and_update(
+                {**_filter, "used": {"$lte": self.daily_quota - units}},
+                {"$inc": {"used": units}},
+            )
+            if doc is not None:
+                return
+            # Either quota is exhausted or it is the first request of the day
+            try:
+                result = await self.collection.update_one(
+                    _filter, {"$setOnInsert": {"used": 0}}, upsert=True
+                )
+            except DuplicateKeyError:  # Inserted by a concurrent request
+                continue
+            if result.upserted_id is None:
+                break
+        raise YtApiQuotaExceededError(await self.used(key), self.daily_quota)
+
+    async def refund(self, key: str, units: int) -> None:
+        """Give back reserved `units` of a request which never reached YouTube API."""
+        await self.collection.update_one(
+            {"key": _hash_key(key), "day": _quota_day()}, {"$inc": {"used": -units}}
+        )
+
+    async def exhaust(self, key: str) -> None:
+        """Mark quota as exhausted when YouTube API says so."""
+        await self.collection.update_one(
+            {"key": _hash_key(key), "day": _quota_day()},
+            {"$max": {"used": self.daily_quota}},
+            upsert=True,
+        )
+
+
+class FetchProgress:
+    """
+    Store ids which are yet to be fetched, so that a fetch can resume later. Ids
+    are split into documents of `chunk_size` ids (keyed by token and sequence
+    number), so any no. of ids fits under the 16MB limit of a document.
+    """
+
+    def __init__(
+        self, collection: AsyncIOMotorCollection, chunk_size: int = 10_000
+    ) -> None:
+        self.collection = collection
+        self.chunk_size = chunk_size
+
+    async def save(self, pending_ids: list[str], token: str | None = None) -> str:
+        token = uuid.uuid4().hex if token is None else token
+        updated_at = datetime.now()
+        docs = [
+            {"token": token, "seq": seq, "pendingIds": ids, "updatedAt": updated_at}
+            for seq, ids in enumerate(batch_iter(pending_ids, self.chunk_size))
+        ]
+        await self.collection.delete_many({"token": token})
+        if docs:
+            await self.collection.insert_many(docs)
+        return token
+
+    async def load(self, token: str) -> list[str] | None:
+        cursor = self.collection.find({"token": token}).sort("seq", ASCENDING)
+        docs = await cursor.to_list(None)
+        return [i for doc in docs for i in doc["pendingIds"]] if docs else None
+
+    async def delete(self, token: str) -> None:
+        await self.collection.delete_many({"token": token})
+
+
+class YtApiScheduler:
+    def __init__(
+        self,
+        client: YtApiClient,
+        quota: YtApiQuota,
+        progress: FetchProgress,
+        *,
+        requests_per_sec: float = YT_API_REQUESTS_PER_SEC,
+        max_retries: int = YT_API_MAX_RETRIES,
+    ) -> None:
+        self.client = client
+        self.quota = quota
+        self.progress = progress
+        self.requests_per_sec = requests_per_sec
+        self.max_retries = max_retries
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def _bucket(self, key: str) -> TokenBucket:
+        if key not in self._buckets:
+            self._buckets[key] = TokenBucket(
+                self.requests_per_sec, capacity=self.requests_per_sec
+            )
+        return self._buckets[key]
+
+    async def get(
+        self,
+        key: str,
+        url: str,
+        *,
+        params: dict[str, Any],
+        cost: int = 1,
+    ) -> httpx.Response:
+        """
+        Make GET request with API `key` which costs `cost` quota units. Quota is
+        reserved once for the request and its retries. Returns the last response if
+        it fails even after retries.
+
+        Raises:
+            YtApiQuotaExceededError: When quota of the API key is exhausted.
+        """
+        await self.quota.reserve(key, cost)
+        attempt = 0
+        while True:
+            await self._bucket(key).acquire()
+            try:
+                response = await self.client.get(url, params={**params, "key": key})
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    await self.quota.refund(key, cost)
+                    raise
+                logging.warning(f"YouTube API request failed ({e!r}), retrying.")
+                await asyncio.sleep(_backoff_delay(attempt))
+                attempt += 1
+                continue
+
+            reason = _error_reason(response)
+            if response.status_code == 403 and reason in _QUOTA_EXCEEDED_REASONS:
+                await self.quota.exhaust(key)
+                raise YtApiQuotaExceededError(
+                    await self.quota.used(key), self.quota.daily_quota
+                )
+            if attempt < self.max_retries and (
+                response.status_code in _RETRY_STATUS_CODES
+                or reason in _RATE_LIMIT_REASONS
+            ):
+                logging.warning(
+                    f"YouTube API responded {response.status_code} ({reason}), retrying."
+                )
+                await asyncio.sleep(_backoff_delay(attempt, response))
+                attempt += 1
+                continue
+            return response
+
+
+def create_yt_api_scheduler(client: YtApiClient) -> YtApiScheduler:
+    db = get_db_client()[DB_YOUTUBE]
+    return YtApiScheduler(
+        client,
+        YtApiQuota(db[COLLECTION_YT_API_QUOTA], YT_API_DAILY_QUOTA),
+        FetchProgress(db[COLLECTION_YT_API_FETCH_PROGRESS]),
+    )
+
+
+def get_yt_api_scheduler(request: Request) -> YtApiScheduler:
+    """Dependency to get the scheduler created in app's lifespan."""
+    return request.state.yt_api_scheduler
@@ -1,52 +1,124 @@
+from __future__ import annotations
+
 import asyncio
+import json
+import logging
+from typing import TYPE_CHECKING, AsyncIterator
 
-import httpx
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import StreamingResponse
 
 from api._utils import batch_iter
-from api.configs import YT_API_KEY_AS_API_HEADER
-from api.models.youtube import YtVideoDetails
+from api.arrow import accepts_arrow, arrow_response
+from api.configs import YT_API_KEY_AS_API_HEADER, YT_API_MAX_CONCURRENCY
+from api.models.youtube import YtChannelVideoData, YtVideoDetails
+from api.routes.db.youtube.channel_video import (
+    get_collection as get_channel_video_collection,
+)
+from api.routes.db.youtube.channel_video import upsert_channels_videos_data
+from api.routes.db.youtube.video import get_collection as get_video_collection
+from api.routes.db.youtube.video import upsert_videos_details
+from errors import YtApiQuotaExceededError
+
+from .scheduler import YtApiScheduler, get_yt_api_scheduler
+
+if TYPE_CHECKING:
+    from api.jobs import JobFunc
+    from api.models.job import Job
 
 yt_video_route = APIRouter(prefix="/video", tags=["video"])
 
+# No. of ids fetched (concurrently) and stored into database at a time by `/store`
+_STORE_WINDOW_SIZE = 50 * YT_API_MAX_CONCURRENCY
+
 
 async def fetch_video_details_from_yt_api(
+    scheduler: YtApiScheduler,
     key: str,
     ids: str,
     *,
     part: str | None = None,
-) -> list[YtVideoDetails]:
+) -> list[dict]:
+    """Returns raw items of API response, convert them with `YtVideoDetails`."""
     part = "snippet,contentDetails" if part is None else part
-    url = f"https://www.googleapis.com/youtube/v3/videos?part={part}&id={ids}&key={key}"
-
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url)
-        if response.status_code == 400:
-            raise HTTPException(400, {"message": "Wrong API key.", "apiKey": key})
-        if response.status_code != 200:
-            raise HTTPException(
-                400,
-                {
-                    "message": "Error fetching data from YouTube API.",
-                    "ids": ids,
-                    "statusCode": response.status_code,
-                    "YtApiResponse": response.json(),
-                },
-            )
+    response = await scheduler.get(key, "/videos", params={"part": part, "id": ids})
+    if response.status_code == 400:
+        raise HTTPException(400, {"message": "Wrong API key.", "apiKey": key})
+    if response.status_code != 200:
+        raise HTTPException(
+            400,
+            {
+                "message": "Error fetching data from YouTube API.",
+                "ids": ids,
+                "statusCode": response.status_code,
+                "YtApiResponse": response.json(),
+            },
+        )
 
-        data = response.json()["items"]
+    data = response.json()["items"]
     if not data:
         raise HTTPException(204, {"message": "No data after request."})
-    return await YtVideoDetails.from_dicts(data)
+    return data
+
+
+async def fetch_videos_details_in_batches(
+    scheduler: YtApiScheduler,
+    key: str,
+    ids: list[str],
+    *,
+    part: str | None = None,
+) -> tuple[list[dict], list[str]]:
+    """
+    Fetch videos details of `ids` concurrently in batches of 50. Returns fetched
+    items (of API response) and the ids which could not be fetched because quota
+    exhausted.
+    """
+    batches = list(batch_iter(ids, 50))
+    results = await asyncio.gather(
+        *[
+            fetch_video_details_from_yt_api(scheduler, key, ",".join(i), part=part)
+            for i in batches
+        ],
+        return_exceptions=True,
+    )
+
+    items, pending_ids = [], []
+    for batch, result in zip(batches, results):
+        if isinstance(result, YtApiQuotaExceededError):
+            pending_ids.extend(batch)
+        elif isinstance(result, HTTPException) and result.status_code == 204:
+            continue
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            items.extend(result)
+    return items, pending_ids
 
 
 @yt_video_route.post(
     "/",
     tags=["youtubeApi"],
-    description="Get Multiple Videos Deatails using YouTube API.",
+    description=(
+        "Get Multiple Videos Deatails using YouTube API. If API key's quota exhausts "
+        "in between, fetched details are returned with 206 status code and the "
+        "`X-Resume-Token` header, pass it as `resume_token` to fetch the rest later. "
+        "A resumed fetch fetches `limit` ids of the token at a time and keeps the "
+        "rest under the same token until all of them are fetched. "
+        "Response is an Arrow IPC stream if it is in `Accept` header."
+    ),
 )
 async def get_videos_details_from_yt_api(
+    request: Request,
     ids: list[str],
+    response: Response,
     limit: int = Query(
         200,
         description="Maximum No. of Videos Details being Fetch.",
@@ -55,10 +127,198 @@ async def get_videos_details_from_yt_api(
     ),
     key: str = YT_API_KEY_AS_API_HEADER,
     part: str | None = None,
+    resume_token: str | None = None,
+    scheduler: YtApiScheduler = Depends(get_yt_api_scheduler),
 ) -> list[YtVideoDetails]:
-    tasks = []
-    for _50_ids in batch_iter(ids[:limit], 50):
-        vids = fetch_video_details_from_yt_api(key, ",".join(_50_ids), part=part)
-        tasks.append(vids)
-    details = await asyncio.gather(*tasks)
-    return [j for i in details for j in i]
+    if resume_token is not None:
+        pending_ids = await scheduler.progress.load(resume_token)
+        if pending_ids is None:
+            raise HTTPException(404, {"error": "Invalid resume_token."})
+        ids = pending_ids
+
+    items, pending_ids = await fetch_videos_details_in_batches(
+        scheduler, key, ids[:limit], part=part
+    )
+    if resume_token is not None:  # Rest of the token's ids are fetched later
+        pending_ids.extend(ids[limit:])
+
+    if pending_ids:
+        token = await scheduler.progress.save(pending_ids, resume_token)
+        response.status_code = 206
+        response.headers["X-Resume-Token"] = token
+    elif resume_token is not None:
+        await scheduler.progress.delete(resume_token)
+    if not items and not pending_ids:
+        raise HTTPException(204, {"message": "No data after request."})
+    if accepts_arrow(request):
+        # Skip building models, details are only serialized
+        arrow_r = arrow_response(
+            YtVideoDetails.frame_from_dicts(items), response.status_code or 200
+        )
+        arrow_r.headers.update(response.headers)
+        return arrow_r
+    return YtVideoDetails.from_dicts(items)
+
+
+async def fetch_and_store_videos_details(
+    scheduler: YtApiScheduler,
+    key: str,
+    ids: list[str],
+    *,
+    part: str | None = None,
+    resume_token: str | None = None,
+    exclude_existing: bool = True,
+) -> AsyncIterator[dict]:
+    """
+    Fetch videos details of `ids` window by window and store them (and channel's
+    videoIds) into database. Yields progress after every window. If quota exhausts,
+    rest of the ids are saved and the last progress has their `resumeToken`.
+    """
+    video_collection = await get_video_collection()
+    channel_video_collection = await get_channel_video_collection()
+    ids = list(dict.fromkeys(ids))  # Drop duplicates, keep order
+    progress = {"total": len(ids), "processed": 0, "fetched": 0, "skipped": 0}
+
+    pending_ids: list[str] = []
+    for window in batch_iter(ids, _STORE_WINDOW_SIZE):
+        if pending_ids:  # Quota exhausted, no need to request anymore
+            pending_ids.extend(window)
+            continue
+
+        new_ids = window
+        if exclude_existing:
+            existing_ids = set(
+                await video_collection.distinct("id", {"id": {"$in": window}})
+            )
+            new_ids = [i for i in window if i not in existing_ids]
+            progress["skipped"] += len(existing_ids)
+
+        items, pending_ids = await fetch_videos_details_in_batches(
+            scheduler, key, new_ids, part=part
+        )
+        details = YtVideoDetails.from_dicts(items)
+
+        if details:
+            await upsert_videos_details(details, video_collection)
+            await upsert_channels_videos_data(
+                list(YtChannelVideoData.from_video_details(details)),
+                channel_video_collection,
+            )
+        progress["processed"] += len(window) - len(pending_ids)
+        progress["fetched"] += len(details)
+        yield progress
+
+    progress["pending"] = len(pending_ids)
+    progress["resumeToken"] = None
+    if pending_ids:
+        progress["resumeToken"] = await scheduler.progress.save(
+            pending_ids, resume_token
+        )
+    elif resume_token is not None:
+        await scheduler.progress.delete(resume_token)
+    yield progress
+
+
+def fetch_and_store_videos_details_job(
+    scheduler: YtApiScheduler,
+    key: str,
+    ids: list[str],
+    *,
+    part: str | None = None,
+    exclude_existing: bool = True,
+) -> JobFunc:
+    """Job function of `fetch_and_store_videos_details`, see `api.jobs`."""
+
+    async def job_func(job: Job) -> dict:
+        async for progress in fetch_and_store_videos_details(
+            scheduler, key, ids, part=part, exclude_existing=exclude_existing
+        ):
+            job.progress.update(progress)
+        return {"pending": progress["pending"], "resumeToken": progress["resumeToken"]}
+
+    return job_func
+
+
+async def _ndjson_stream(progresses: AsyncIterator[dict]) -> AsyncIterator[str]:
+    """
+    Serialize progresses as NDJSON. Response has already started while streaming,
+    so errors are sent as the last line instead of an error status code.
+    """
+    try:
+        async for progress in progresses:
+            yield json.dumps(progress) + "\n"
+    except HTTPException as e:
+        yield json.dumps({"error": e.detail}) + "\n"
+    except Exception as e:
+        logging.exception("Streaming progress of storing videos details failed.")
+        yield json.dumps({"error": str(e)}) + "\n"
+
+
+@yt_video_route.post(
+    "/store",
+    tags=["youtubeApi"],
+    response_class=StreamingResponse,
+    description=(
+        "Fetch any no. of Videos Details using YouTube API and store them into "
+        "database. Progress is streamed as NDJSON, the last line has `pending` "
+        "count of ids and the `resumeToken` to fetch them later if quota exhausts."
+    ),
+)
+async def store_videos_details_from_yt_api(
+    ids: list[str],
+    key: str = YT_API_KEY_AS_API_HEADER,
+    part: str | None = None,
+    resume_token: str | None = None,
+    exclude_existing: bool = True,
+    scheduler: YtApiScheduler = Depends(get_yt_api_scheduler),
+) -> StreamingResponse:
+    if resume_token is not None:
+        pending_ids = await scheduler.progress.load(resume_token)
+        if pending_ids is None:
+            raise HTTPException(404, {"error": "Invalid resume_token."})
+        ids = pending_ids
+
+    progresses = fetch_and_store_videos_details(
+        scheduler,
+        key,
+        ids,
+        part=part,
+        resume_token=resume_token,
+        exclude_existing=exclude_existing,
+    )
+    return StreamingResponse(
+        _ndjson_stream(progresses), media_type="application/x-ndjson"
+    )
+
+
+@yt_video_route.post(
+    "/store/file",
+    tags=["youtubeApi"],
+    response_class=StreamingResponse,
+    description=(
+        "Same as `/store` but ids are uploaded as a file, either a JSON array or "
+        "one id per line."
+    ),
+)
+async def store_videos_details_from_yt_api_using_file(
+    data: UploadFile,
+    key: str = YT_API_KEY_AS_API_HEADER,
+    part: str | None = None,
+    exclude_existing: bool = True,
+    scheduler: YtApiScheduler = Depends(get_yt_api_scheduler),
+) -> StreamingResponse:
+    content = (await data.read()).decode()
+    try:
+        ids = json.loads(content)
+    except json.JSONDecodeError:
+        ids = [i.strip() for i in content.splitlines() if i.strip()]
+    if not isinstance(ids, list) or not all(isinstance(i, str) for i in ids):
+        raise HTTPException(400, {"error": "File must have a list of videoIds."})
+
+    return await store_videos_details_from_yt_api(
+        ids,
+        key=key,
+        part=part,
+        exclude_existing=exclude_existing,
+        scheduler=scheduler,
+    )
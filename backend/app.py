@@ -6,7 +6,13 @@ from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import JSONResponse
 
 from api import configs, routes
+from api.jobs import job_queue_lifespan
 from api.logger import load_logging
+from api.routes.db.indexes import ensure_indexes_on_startup
+from api.routes.ml import registries_lifespan
+from api.routes.ml.ctt import ctt_batcher_lifespan
+from api.routes.youtube.client import yt_api_client_lifespan
+from api.routes.youtube.scheduler import create_yt_api_scheduler
 
 
 @asynccontextmanager
@@ -14,7 +20,19 @@ async def main_api_lifespan(app: FastAPI):
     configs.check_setup_settings()
     load_logging()
     logging.debug("Starting FastAPI app instance.")
-    yield
+    await ensure_indexes_on_startup()
+    async with (
+        yt_api_client_lifespan() as yt_api_client,
+        job_queue_lifespan() as job_queue,
+        registries_lifespan(),
+        ctt_batcher_lifespan() as ctt_batcher,
+    ):
+        yield {
+            "yt_api_client": yt_api_client,
+            "yt_api_scheduler": create_yt_api_scheduler(yt_api_client),
+            "job_queue": job_queue,
+            "ctt_batcher": ctt_batcher,
+        }
     logging.debug("Shuting down FastAPI app instance.")
 
 
@@ -59,6 +77,7 @@ async def root():
 app.include_router(routes.db.db_route)
 app.include_router(routes.youtube.yt_route)
 app.include_router(routes.ml.router)
+app.include_router(routes.jobs.jobs_route)
 
 if __name__ == "__main__":
     import uvicorn
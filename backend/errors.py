@@ -8,3 +8,15 @@ class ENVNotFoundError(Exception):
 
     def __str__(self) -> str:
         return self.message % self.name
+
+
+class YtApiQuotaExceededError(Exception):
+    """Raise when the daily quota of YouTube API key is exhausted."""
+
+    def __init__(self, used: int, quota: int, *args: object) -> None:
+        super().__init__(*args)
+        self.used = used
+        self.quota = quota
+
+    def __str__(self) -> str:
+        return f"YouTube API quota exceeded ({self.used}/{self.quota} units used)."
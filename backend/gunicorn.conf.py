@@ -0,0 +1,48 @@
+"""
+Production serving with gunicorn (multiple uvicorn workers).
+
+Run from `backend` directory with `gunicorn -c gunicorn.conf.py app:app`.
+
+App is imported and models are loaded (and warmed up) in the master process before
+workers are forked, so that all the workers share the models' memory pages
+(copy-on-write) instead of loading a copy each.
+"""
+
+import gc
+import logging
+
+from api import configs
+from api.logger import load_logging
+
+configs.check_setup_settings()
+# Avoid "holes" in memory pages of objects created in master, see `gc.freeze`
+gc.disable()
+
+bind = f"{configs.API_HOST}:{configs.API_PORT}"
+workers = configs.API_WORKERS
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+# Predictions of big chunks may take a while
+timeout = 120
+graceful_timeout = 30
+
+
+def when_ready(server) -> None:
+    """Runs in master after the app is imported, before any worker is forked."""
+    from api.routes.ml import preload_models
+
+    load_logging()
+    if workers > 1 and not configs.JOBS_DB_PATH:
+        logging.warning(
+            "Jobs are only known to the worker which runs them, set JOBS_DB_PATH to "
+            "poll them from any worker."
+        )
+    preload_models()
+    # Objects of master are never collected, so that gc of workers does not touch
+    # (and copy) their memory pages.
+    gc.freeze()
+    logging.info(f"Forking {workers} workers.")
+
+
+def post_fork(server, worker) -> None:
+    gc.enable()
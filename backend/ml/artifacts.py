@@ -0,0 +1,260 @@
+"""
+Model artifacts stored as plain arrays instead of pickles.
+
+An artifact is a directory with a `manifest.json` and one `.npy` file per array
+(plus Parquet files for tables). Nothing is unpickled while loading, so it is safe
+to load and does not break across library versions. Arrays are memory-mapped, so
+loading is nearly instant and processes which load the same artifact share its
+pages through the OS page cache.
+
+Fitted objects (vectorizers, classifiers) are rebuilt from the code which creates
+them and only their fitted state is read from the arrays. The artifact's `version`
+is a hash of its arrays.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Self
+
+import numpy as np
+import polars as pl
+from scipy.sparse import csr_matrix
+
+if TYPE_CHECKING:
+    from sklearn.base import BaseEstimator
+    from sklearn.feature_extraction.text import TfidfTransformer, TfidfVectorizer
+
+ARTIFACT_FORMAT = 1
+MANIFEST_FILE = "manifest.json"
+
+# Only estimators from these packages can be rebuilt from an artifact
+_ALLOWED_ESTIMATOR_MODULES = ("sklearn.",)
+
+
+class ArtifactError(Exception):
+    pass
+
+
+class ArtifactWriter:
+    """
+    Write arrays and tables into a temporary directory, which replaces the artifact
+    at `path` only when `commit` is called.
+
+    ```python
+    writer = ArtifactWriter(path, "ctt")
+    writer.add_array("idf", vectorizer.idf_)
+    writer.commit()
+    ```
+    """
+
+    def __init__(self, path: str | Path, kind: str) -> None:
+        self.path = Path(path)
+        self.kind = kind
+        self.meta: dict[str, Any] = {}
+        self._tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        shutil.rmtree(self._tmp_path, ignore_errors=True)
+        self._tmp_path.mkdir(parents=True)
+        self._files: dict[str, str] = {}
+        self._hash = hashlib.sha256()
+
+    def add_array(self, name: str, array: np.ndarray) -> None:
+        array = np.ascontiguousarray(array)
+        if array.dtype == object:
+            raise ArtifactError(f"Array {name!r} of objects can not be stored.")
+        np.save(self._tmp_path / f"{name}.npy", array, allow_pickle=False)
+        self._files[name] = f"{name}.npy"
+        self._hash.update(name.encode())
+        self._hash.update(array.tobytes())
+
+    def add_frame(self, name: str, df: pl.DataFrame) -> None:
+        df.write_parquet(self._tmp_path / f"{name}.parquet")
+        self._files[name] = f"{name}.parquet"
+        self._hash.update(name.encode())
+        self._hash.update(df.hash_rows().to_numpy().tobytes())
+
+    def commit(self) -> str:
+        """Write the manifest and replace the artifact atomically. Returns version."""
+        version = self._hash.hexdigest()[:16]
+        manifest = {
+            "format": ARTIFACT_FORMAT,
+            "kind": self.kind,
+            "version": version,
+            "createdAt": datetime.now().isoformat(),
+            "files": self._files,
+            "meta": self.meta,
+        }
+        with (self._tmp_path / MANIFEST_FILE).open("w") as f:
+            json.dump(manifest, f, indent=2)
+
+        old_path = self.path.with_name(f".{self.path.name}.old")
+        shutil.rmtree(old_path, ignore_errors=True)
+        if self.path.exists():
+            self.path.rename(old_path)
+        self._tmp_path.rename(self.path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        return version
+
+
+class Artifact:
+    """Read-only view of an artifact written by `ArtifactWriter`."""
+
+    def __init__(self, path: Path, manifest: dict[str, Any], *, mmap: bool) -> None:
+        self.path = path
+        self.manifest = manifest
+        self.mmap = mmap
+
+    @classmethod
+    def load(cls, path: str | Path, kind: str, *, mmap: bool = True) -> Self:
+        path = Path(path)
+        try:
+            with (path / MANIFEST_FILE).open() as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            raise ArtifactError(f"No artifact found at {path!s}.") from None
+        if manifest.get("format") != ARTIFACT_FORMAT or manifest.get("kind") != kind:
+            raise ArtifactError(
+                f"Artifact at {path!s} is not a {kind!r} artifact of format "
+                f"{ARTIFACT_FORMAT}."
+            )
+        return cls(path, manifest, mmap=mmap)
+
+    @property
+    def version(self) -> str:
+        return self.manifest["version"]
+
+    @property
+    def meta(self) -> dict[str, Any]:
+        return self.manifest["meta"]
+
+    def array(self, name: str) -> np.ndarray:
+        return np.load(
+            self.path / self.manifest["files"][name],
+            mmap_mode="r" if self.mmap else None,
+            allow_pickle=False,
+        )
+
+    def frame(self, name: str) -> pl.DataFrame:
+        return pl.read_parquet(self.path / self.manifest["files"][name])
+
+
+def exists(path: str | Path) -> bool:
+    return (Path(path) / MANIFEST_FILE).exists()
+
+
+def read_manifest(path: str | Path) -> dict[str, Any] | None:
+    """Manifest of the artifact at `path`, if any."""
+    try:
+        with (Path(path) / MANIFEST_FILE).open() as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def version(path: str | Path) -> str | None:
+    """Version of the artifact at `path` (reads only its manifest), if any."""
+    manifest = read_manifest(path)
+    return manifest["version"] if manifest is not None else None
+
+
+# --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- #
+# Fitted state of sklearn objects
+# --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- #
+def save_csr(writer: ArtifactWriter, name: str, matrix: csr_matrix) -> None:
+    matrix = matrix.tocsr()
+    writer.add_array(f"{name}.data", matrix.data)
+    writer.add_array(f"{name}.indices", matrix.indices)
+    writer.add_array(f"{name}.indptr", matrix.indptr)
+    writer.meta[f"{name}.shape"] = list(matrix.shape)
+
+
+def load_csr(artifact: Artifact, name: str) -> csr_matrix:
+    return csr_matrix(
+        (
+            artifact.array(f"{name}.data"),
+            artifact.array(f"{name}.indices"),
+            artifact.array(f"{name}.indptr"),
+        ),
+        shape=tuple(artifact.meta[f"{name}.shape"]),
+        copy=False,
+    )
+
+
+def save_tfidf(writer: ArtifactWriter, name: str, vectorizer: TfidfVectorizer) -> None:
+    """Save `vocabulary_` (terms ordered by their index) and `idf_`."""
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.__getitem__)
+    writer.add_array(f"{name}.vocabulary", np.array(terms, dtype=np.str_))
+    writer.add_array(f"{name}.idf", vectorizer.idf_)
+
+
+def load_tfidf(
+    artifact: Artifact, name: str, vectorizer: TfidfVectorizer
+) -> TfidfVectorizer:
+    """Set fitted state on an unfitted `vectorizer` (created with same params)."""
+    terms = artifact.array(f"{name}.vocabulary").tolist()
+    vectorizer.vocabulary_ = {term: i for i, term in enumerate(terms)}
+    vectorizer.idf_ = artifact.array(f"{name}.idf")
+    return vectorizer
+
+
+def save_idf(writer: ArtifactWriter, name: str, transformer: TfidfTransformer) -> None:
+    """Save `idf_` of a transformer, which has no vocabulary (e.g. after hashing)."""
+    writer.add_array(f"{name}.idf", transformer.idf_)
+
+
+def load_idf(
+    artifact: Artifact, name: str, transformer: TfidfTransformer
+) -> TfidfTransformer:
+    idf = artifact.array(f"{name}.idf")
+    transformer.idf_ = idf
+    transformer.n_features_in_ = idf.shape[0]
+    return transformer
+
+
+def save_estimator(writer: ArtifactWriter, name: str, estimator: BaseEstimator) -> None:
+    """
+    Save class, params (must be JSON serializable) and fitted attributes (ending
+    with "_") of a fitted estimator which are arrays or scalars.
+    """
+    cls = type(estimator)
+    arrays, scalars = [], {}
+    for attr, value in vars(estimator).items():
+        if not attr.endswith("_") or attr.startswith("_"):
+            continue
+        if isinstance(value, np.ndarray):
+            writer.add_array(f"{name}.{attr}", value)
+            arrays.append(attr)
+        elif isinstance(value, int | float | str | bool):
+            scalars[attr] = value
+        elif isinstance(value, np.generic):
+            scalars[attr] = value.item()
+        elif value is not None:
+            raise ArtifactError(
+                f"Fitted attribute {attr!r} of {cls.__name__} can not be stored."
+            )
+    writer.meta[name] = {
+        "class": f"{cls.__module__}.{cls.__qualname__}",
+        "params": estimator.get_params(deep=False),
+        "arrays": arrays,
+        "scalars": scalars,
+    }
+
+
+def load_estimator(artifact: Artifact, name: str) -> BaseEstimator:
+    meta = artifact.meta[name]
+    module_name, _, cls_name = meta["class"].rpartition(".")
+    if not module_name.startswith(_ALLOWED_ESTIMATOR_MODULES):
+        raise ArtifactError(f"Estimator {meta['class']!r} is not allowed.")
+    estimator = getattr(importlib.import_module(module_name), cls_name)(
+        **meta["params"]
+    )
+    for attr in meta["arrays"]:
+        setattr(estimator, attr, artifact.array(f"{name}.{attr}"))
+    for attr, value in meta["scalars"].items():
+        setattr(estimator, attr, value)
+    return estimator
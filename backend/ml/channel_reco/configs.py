@@ -1,4 +1,4 @@
 from pathlib import Path
 
-CHANNEL_RECO_TRANSFORMER_PATH = Path("../data/channel_reco/transformer.dill")
-CHANNEL_RECO_CHANNELS_DATA_PATH = Path("../data/channel_reco/channels_df.parquet")
+# Directory of the index artifact (see `ml.artifacts`)
+CHANNEL_RECO_INDEX_PATH = Path("../data/channel_reco/index")
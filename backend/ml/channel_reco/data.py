@@ -1,5 +1,7 @@
 import polars as pl
 
+from .model import preprocess_tags, preprocess_title
+
 
 def validate_data(data: pl.DataFrame) -> pl.DataFrame:
     """
@@ -24,6 +26,10 @@ def clean_data(data: pl.DataFrame) -> pl.DataFrame:
             # Remove those channels which have no tags
             pl.col("tags").ne("null"),
         )
+        .with_columns(
+            preprocess_title.expr("title"),
+            preprocess_tags.expr("tags"),
+        )
     )
     return data
 
@@ -0,0 +1,194 @@
+"""
+Recommendation index of channels, built at training time.
+
+Rows of the TF-IDF matrix (one per channel) are L2-normalized once, so cosine
+similarity with a query is only a sparse dot product. `top_k` scores the channels
+block by block and keeps only the best `k` of each block with `argpartition`, so the
+memory and the response stay small however big the catalogue of channels grows.
+Optionally, rows are also reduced with truncated SVD into small dense vectors
+(approximate but faster scoring).
+
+Index is saved as an artifact of arrays (see `ml.artifacts`), its matrices are
+memory-mapped when loaded.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Self
+
+import numpy as np
+import polars as pl
+from scipy.sparse import hstack
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+
+from ml.artifacts import (
+    Artifact,
+    ArtifactWriter,
+    load_csr,
+    load_tfidf,
+    save_csr,
+    save_tfidf,
+)
+
+from .configs import CHANNEL_RECO_INDEX_PATH
+from .data import clean_data
+from .model import get_vectorizers
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from scipy.sparse import csr_matrix
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+ARTIFACT_KIND = "channel_reco"
+# No. of channels scored at a time by `top_k`
+_BLOCK_SIZE = 8192
+
+
+def _top_k_of(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the `k` highest `scores` (unsorted)."""
+    if k >= scores.size:
+        return np.arange(scores.size)
+    return np.argpartition(scores, -k)[-k:]
+
+
+@dataclass(eq=False)
+class ChannelRecoIndex:
+    # Fitted vectorizer of each column of channels' data
+    vectorizers: dict[str, TfidfVectorizer]
+    # L2-normalized TF-IDF rows of the channels, aligned with `channels`
+    matrix: csr_matrix
+    channels: pl.DataFrame
+    # Truncated SVD components (transposed), reduce TF-IDF rows into `vectors`
+    components: np.ndarray | None = None
+    # L2-normalized dense vectors of the channels
+    vectors: np.ndarray | None = None
+    version: str | None = None
+
+    @classmethod
+    def build(
+        cls,
+        data: pl.DataFrame,
+        vectorizers: dict[str, TfidfVectorizer],
+        *,
+        n_components: int | None = None,
+    ) -> Self:
+        """
+        Fit `vectorizers` on preprocessed `data` and index its channels. Pass
+        `n_components` to also build dense vectors with truncated SVD.
+        """
+        matrix = normalize(
+            hstack([vec.fit_transform(data[col]) for col, vec in vectorizers.items()]),
+            copy=False,
+        ).tocsr()
+        components = vectors = None
+        if n_components is not None:
+            n_components = min(n_components, *(i - 1 for i in matrix.shape))
+            svd = TruncatedSVD(n_components, random_state=42).fit(matrix)
+            components = svd.components_.T.astype(np.float32)
+            vectors = normalize(matrix @ components).astype(np.float32)
+        return cls(
+            vectorizers,
+            matrix,
+            data.select("channelId", "channelTitle"),
+            components,
+            vectors,
+        )
+
+    def embed(self, data: pl.DataFrame) -> csr_matrix:
+        """L2-normalized TF-IDF rows of the channels' videos `data`."""
+        data = clean_data(data)
+        return normalize(
+            hstack(
+                [vec.transform(data[col]) for col, vec in self.vectorizers.items()]
+            ).tocsr()
+        )
+
+    def similarity(self, data: pl.DataFrame) -> np.ndarray:
+        """Cosine similarity of every indexed channel with each channel of `data`."""
+        return (self.matrix @ self.embed(data).T).toarray()
+
+    def top_k(
+        self,
+        data: pl.DataFrame,
+        k: int,
+        *,
+        dense: bool = False,
+    ) -> pl.DataFrame:
+        """
+        `k` most similar channels to the (only) channel of `data`, sorted by
+        `similarity`. The channel itself is never recommended, even if it is
+        indexed. With `dense`, SVD vectors are used instead of TF-IDF rows.
+        """
+        if dense and self.vectors is None:
+            raise ValueError("Index is built without SVD vectors.")
+        query = self.embed(data)
+        if query.shape[0] != 1:
+            raise ValueError("Data must contain videos of exactly one channel.")
+        if dense:
+            query = normalize(query @ self.components).ravel()
+        excluded = np.flatnonzero(
+            (self.channels["channelId"] == data["channelId"][0]).to_numpy()
+        )
+
+        best_idx = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, self.matrix.shape[0], _BLOCK_SIZE):
+            stop = start + _BLOCK_SIZE
+            if dense:
+                scores = self.vectors[start:stop] @ query  # type: ignore
+            else:
+                scores = (self.matrix[start:stop] @ query.T).toarray().ravel()
+            block_excluded = excluded[(excluded >= start) & (excluded < stop)]
+            scores[block_excluded - start] = -np.inf
+            idx = _top_k_of(scores, k)
+            idx = idx[np.isfinite(scores[idx])]
+            best_idx = np.concatenate([best_idx, idx + start])
+            best_scores = np.concatenate([best_scores, scores[idx]])
+            keep = _top_k_of(best_scores, k)
+            best_idx, best_scores = best_idx[keep], best_scores[keep]
+
+        order = np.argsort(-best_scores, kind="stable")
+        return self.channels[best_idx[order]].with_columns(
+            pl.Series("similarity", best_scores[order], dtype=pl.Float64)
+        )
+
+    def save(self, path: str | Path = CHANNEL_RECO_INDEX_PATH) -> str:
+        """Save index as an artifact and return its version."""
+        writer = ArtifactWriter(path, ARTIFACT_KIND)
+        writer.meta["columns"] = list(self.vectorizers)
+        for column, vectorizer in self.vectorizers.items():
+            save_tfidf(writer, f"vectorizer.{column}", vectorizer)
+        save_csr(writer, "matrix", self.matrix)
+        writer.add_frame("channels", self.channels)
+        if self.components is not None and self.vectors is not None:
+            writer.add_array("components", self.components)
+            writer.add_array("vectors", self.vectors)
+        self.version = writer.commit()
+        return self.version
+
+    @classmethod
+    def load(
+        cls,
+        path: str | Path = CHANNEL_RECO_INDEX_PATH,
+        *,
+        mmap: bool = True,
+    ) -> Self:
+        """Load index from artifact, vectorizers are rebuilt with `get_vectorizers`."""
+        artifact = Artifact.load(path, ARTIFACT_KIND, mmap=mmap)
+        vectorizers = get_vectorizers()
+        if list(vectorizers) != artifact.meta["columns"]:
+            raise ValueError("Columns of artifact and vectorizers are not same.")
+        for column, vectorizer in vectorizers.items():
+            load_tfidf(artifact, f"vectorizer.{column}", vectorizer)
+        has_vectors = "vectors" in artifact.manifest["files"]
+        return cls(
+            vectorizers,
+            load_csr(artifact, "matrix"),
+            artifact.frame("channels"),
+            artifact.array("components") if has_vectors else None,
+            artifact.array("vectors") if has_vectors else None,
+            artifact.version,
+        )
@@ -1,48 +1,28 @@
-import re
-import string
-
-import emoji
-from sklearn.compose import ColumnTransformer
 from sklearn.feature_extraction.text import TfidfVectorizer
 
+from ml.text import TextNormalizer
 
-def preprocess_title(s: str) -> str:
-    """Preprocessor for vectorizer to preprocess titles data."""
-    s = re.sub(r"\b\w{1,3}\b", " ", s)
-    s = s.translate(str.maketrans("", "", string.punctuation + string.digits))
-    s = emoji.replace_emoji(s, "")
-    s = re.sub(r"\s+", " ", s)
-    s = s.lower()
-    return s
-
-
-def preprocess_tags(s: str) -> str:
-    """Preprocessor for vectorizer to preprocess titles data."""
-    s = re.sub(r"\b\w{1,2}\b", " ", s)
-    s = s.translate(str.maketrans("", "", string.punctuation + string.digits))
-    s = emoji.replace_emoji(s, "")
-    s = re.sub(r"\s+", " ", s)
-    s = s.lower()
-    return s
+# Applied on the columns (with `expr`) before they reach the vectorizers
+preprocess_title = TextNormalizer(max_word_len=3, lower=True)
+preprocess_tags = TextNormalizer(max_word_len=2, lower=True)
 
 
-def get_vectorizer() -> ColumnTransformer:
-    title_transformer = TfidfVectorizer(
-        max_features=7000,
-        ngram_range=(1, 2),
-        preprocessor=preprocess_title,
-        stop_words="english",
-    )
-    tags_transformer = TfidfVectorizer(
-        max_features=5000,
-        ngram_range=(1, 2),
-        preprocessor=preprocess_tags,
-        stop_words="english",
-    )
-    transformer = ColumnTransformer(
-        [
-            ("title_trf", title_transformer, "title"),
-            ("tags_trf", tags_transformer, "tags"),
-        ],
-    )
-    return transformer
+def get_vectorizers() -> dict[str, TfidfVectorizer]:
+    """
+    Unfitted vectorizer of each column, their outputs are stacked horizontally.
+    Columns must be normalized already, see `data.clean_data`.
+    """
+    return {
+        "title": TfidfVectorizer(
+            lowercase=False,
+            max_features=7000,
+            ngram_range=(1, 2),
+            stop_words="english",
+        ),
+        "tags": TfidfVectorizer(
+            lowercase=False,
+            max_features=5000,
+            ngram_range=(1, 2),
+            stop_words="english",
+        ),
+    }
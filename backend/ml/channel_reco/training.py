@@ -1,37 +1,30 @@
 from __future__ import annotations
 
-import polars as pl
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.pipeline import FunctionTransformer, Pipeline, make_pipeline
+from typing import TYPE_CHECKING
 
-from .data import clean_data, preprocess_data
-from .model import get_vectorizer
+from .data import preprocess_data
+from .index import ChannelRecoIndex
+from .model import get_vectorizers
 
+if TYPE_CHECKING:
+    import polars as pl
 
-def training(raw_data: pl.DataFrame) -> tuple[Pipeline, pl.DataFrame]:
-    data = preprocess_data(raw_data)
-    transformer = get_vectorizer()
-    transformed_data = transformer.fit_transform(data.to_pandas())
 
-    pipe = make_pipeline(
-        FunctionTransformer(clean_data),
-        transformer,
-        FunctionTransformer(lambda x: cosine_similarity(transformed_data, x)),
-    )
-    return pipe, data.select("channelId", "channelTitle")
+def training(
+    raw_data: pl.DataFrame,
+    *,
+    n_components: int | None = None,
+) -> ChannelRecoIndex:
+    data = preprocess_data(raw_data)
+    return ChannelRecoIndex.build(data, get_vectorizers(), n_components=n_components)
 
 
 if __name__ == "__main__":
-    from pathlib import Path
-
-    import dill
+    import polars as pl
 
     print("channel_reco.training")
 
     # raw_data must contain [channelId, channelTitle, title, tags] columns
     raw_data = pl.read_json("../data/channel_reco/training.json")
-    pipe, channels_df = training(raw_data)
-
-    channels_df.write_parquet("../data/channel_reco/channels_df.parquet")
-    with Path("../data/channel_reco/transformer_pipe.dill").open("wb") as f:
-        dill.dump(pipe, f)
+    index = training(raw_data, n_components=256)
+    print(f"Saved index with version {index.save()}")
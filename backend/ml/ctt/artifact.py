@@ -0,0 +1,85 @@
+"""
+Save and load the CTT model (TF-IDF + classifier pipeline) as an artifact of arrays,
+see `ml.artifacts`. Pipeline is rebuilt with `get_model`, so the params of its
+normalizer and vectorizer come from the code, only vocabulary and idf come from the
+artifact.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, get_args
+
+from ml.artifacts import (
+    Artifact,
+    ArtifactError,
+    ArtifactWriter,
+    load_estimator,
+    load_idf,
+    load_tfidf,
+    save_estimator,
+    save_idf,
+    save_tfidf,
+)
+
+from .configs import CTT_MODEL_PATH
+from .model import CttVectorizer, get_model
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from sklearn.pipeline import Pipeline
+
+ARTIFACT_KIND = "ctt"
+
+
+def save_model(
+    model: Pipeline,
+    path: str | Path = CTT_MODEL_PATH,
+    *,
+    meta: dict[str, Any] | None = None,
+) -> str:
+    """Save fitted `model` (with extra JSON serializable `meta`) and return version."""
+    writer = ArtifactWriter(path, ARTIFACT_KIND)
+    writer.meta.update(meta or {})
+    if "tfidf" in model.named_steps:
+        writer.meta["vectorizer"] = "hashing"
+        save_idf(writer, "tfidf", model["tfidf"])
+    else:
+        writer.meta["vectorizer"] = "tfidf"
+        save_tfidf(writer, "vectorizer", model["vectorizer"])
+    save_estimator(writer, "model", model["model"])
+    return writer.commit()
+
+
+def load_meta(path: str | Path = CTT_MODEL_PATH) -> dict[str, Any]:
+    return Artifact.load(path, ARTIFACT_KIND).meta
+
+
+def load_model(path: str | Path = CTT_MODEL_PATH, *, mmap: bool = True) -> Pipeline:
+    artifact = Artifact.load(path, ARTIFACT_KIND, mmap=mmap)
+    vectorizer = artifact.meta.get("vectorizer")
+    if vectorizer not in get_args(CttVectorizer):
+        raise ArtifactError(f"Artifact has no valid vectorizer, got {vectorizer!r}.")
+    model = get_model(load_estimator(artifact, "model"), vectorizer)
+    if vectorizer == "hashing":
+        load_idf(artifact, "tfidf", model["tfidf"])
+        n_features = model["vectorizer"].vectorizer.n_features
+        if model["tfidf"].idf_.shape[0] != n_features:
+            raise ArtifactError(
+                f"Artifact is not of a hashing vectorizer of {n_features} features."
+            )
+    else:
+        load_tfidf(artifact, "vectorizer", model["vectorizer"])
+    return model
+
+
+if __name__ == "__main__":
+    # Convert the pickled model of older versions into an artifact.
+    # Run from `backend` directory with `python -m ml.ctt.artifact`
+    import dill
+
+    from .configs import CTT_LEGACY_MODEL_PATH
+
+    with CTT_LEGACY_MODEL_PATH.open("rb") as f:
+        legacy_model = dill.load(f)
+    print(f"Saved model with version {save_model(legacy_model)}")
@@ -0,0 +1,43 @@
+"""
+This script does not contain any modular level code.
+Compare the "tfidf" and "hashing" vectorizers of CTT model on accuracy, training
+time and artifact size. Run from `backend` directory with `python -m ml.ctt.comparison`
+"""
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+    from pathlib import Path
+
+    import polars as pl
+    from sklearn.model_selection import train_test_split
+
+    from .artifact import save_model
+    from .data import DataCleaner
+    from .training import training
+
+    raw_data = pl.read_json("../data/ctt/channels_data.json").join(
+        pl.read_json("../data/ctt/titles_data.json"), on="channelId"
+    )
+    train_data, test_data = train_test_split(
+        raw_data,
+        test_size=0.25,
+        random_state=42,
+        stratify=raw_data["contentType"],
+    )
+    test_data = DataCleaner().transform(test_data)
+
+    print(f"{'vectorizer':<12}{'accuracy':>10}{'train time':>12}{'artifact':>12}")
+    for vectorizer in ("tfidf", "hashing"):
+        start = time.perf_counter()
+        model = training(train_data, vectorizer)
+        train_time = time.perf_counter() - start
+        accuracy = model.score(test_data["title"], test_data["contentType"])
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            save_model(model, Path(tmp_dir, "model"))
+            size = sum(i.stat().st_size for i in Path(tmp_dir, "model").iterdir())
+        print(
+            f"{vectorizer:<12}{accuracy:>10.4f}{train_time:>11.2f}s"
+            f"{size / 2**20:>10.2f}MB"
+        )
@@ -1,6 +1,9 @@
 from pathlib import Path
 
-CTT_MODEL_PATH = Path("../data/ctt/model.dill")
+# Directory of the model artifact (see `ml.artifacts`)
+CTT_MODEL_PATH = Path("../data/ctt/model")
+# Pickled model of older versions, convert it with `python -m ml.ctt.artifact`
+CTT_LEGACY_MODEL_PATH = Path("../data/ctt/model.dill")
 
 CONTENT_TYPE_TAGS = (
     "Education",
@@ -0,0 +1,60 @@
+"""
+Incremental training of the CTT model with `MultinomialNB.partial_fit`.
+
+Only a model with "hashing" vectorizer can be updated: hashing maps any new term
+into the same fixed features and idf weights are kept from the full training, so
+the feature space of new batches matches the one the classifier was trained on.
+Naive bayes only adds the (weighted) term counts of a batch to its counts, so
+updating with new titles costs as much as featurizing them. It can not forget the
+counts of a batch, so training a channel twice (or again with its new label) skews
+the model, only a full training fixes it.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .data import CttDataTransformationPipe
+
+if TYPE_CHECKING:
+    import polars as pl
+    from sklearn.pipeline import Pipeline
+
+
+def check_updatable(model: Pipeline) -> None:
+    """Raise `ValueError` if `model` can not be trained incrementally."""
+    if "tfidf" not in model.named_steps:
+        raise ValueError(
+            "Only CTT model with hashing vectorizer can be trained incrementally, "
+            "train one with `training(raw_data, 'hashing')`."
+        )
+    if not hasattr(model["model"], "partial_fit"):
+        raise ValueError(f"{type(model['model']).__name__} has no partial_fit.")
+
+
+def partial_training(model: Pipeline, raw_data: pl.DataFrame) -> None:
+    """
+    Update fitted `model` (in place) with a batch of `raw_data` which contains
+    `channelId`, `contentType` and `title` columns. Arrays of `model` must be
+    writable, so load it with `mmap=False`.
+    """
+    check_updatable(model)
+    data = CttDataTransformationPipe.fit_transform(raw_data)
+    features = model[:-1].transform(data["title"])
+    model["model"].partial_fit(features, data["contentType"])
+
+
+if __name__ == "__main__":
+    # Demonstrate incremental training with batches of the training data.
+    # Run from `backend` directory with `python -m ml.ctt.incremental`
+    import polars as pl
+
+    from .artifact import load_model, save_model
+
+    raw_data = pl.read_json("../data/ctt/channels_data.json").join(
+        pl.read_json("../data/ctt/titles_data.json"), on="channelId"
+    )
+    model = load_model(mmap=False)
+    for batch in raw_data.iter_slices(10_000):
+        partial_training(model, batch)
+    print(f"Saved model with version {save_model(model)}")
@@ -1,31 +1,103 @@
 from __future__ import annotations
 
-import re
-import string
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable, Literal, Self
 
-import emoji
-from sklearn.feature_extraction.text import TfidfVectorizer
+from scipy.sparse import vstack
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.feature_extraction.text import (
+    HashingVectorizer,
+    TfidfTransformer,
+    TfidfVectorizer,
+)
 from sklearn.pipeline import Pipeline
+from sklearn.utils.parallel import Parallel, delayed
+
+from ml.text import TextNormalizer
 
 if TYPE_CHECKING:
-    from sklearn.base import BaseEstimator
+    from scipy.sparse import csr_matrix
+
+CttVectorizer = Literal["tfidf", "hashing"]
+
+# Preprocessor of the vectorizer of older (pickled) models
+preprocessor = TextNormalizer(max_word_len=3)
+
+
+class ParallelHashingVectorizer(TransformerMixin, BaseEstimator):
+    """
+    Featurize chunks of `chunk_size` documents with `vectorizer` in parallel (with
+    `n_jobs` processes). Hashing is stateless, so chunks are independent and there
+    is no vocabulary to build, keep in memory or save.
+    """
+
+    def __init__(
+        self,
+        vectorizer: HashingVectorizer,
+        *,
+        n_jobs: int | None = 1,
+        chunk_size: int = 10_000,
+    ) -> None:
+        self.vectorizer = vectorizer
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
 
+    def fit(self, X, y=None) -> Self:
+        return self
 
-def preprocessor(s: str) -> str:
-    """Preprocessor for Vectorizer"""
-    s = re.sub(r"\b\w{1,3}\b", " ", s)
-    s = s.translate(str.maketrans("", "", string.punctuation + string.digits))
-    s = emoji.replace_emoji(s, "")
-    s = re.sub(r"\s+", " ", s)
-    return s
+    def transform(self, X: Iterable[str], y=None) -> csr_matrix:
+        if len(X) <= self.chunk_size:  # type: ignore
+            return self.vectorizer.transform(X)
+        chunks = (
+            X[i : i + self.chunk_size]  # type: ignore
+            for i in range(0, len(X), self.chunk_size)  # type: ignore
+        )
+        return vstack(
+            Parallel(self.n_jobs)(
+                delayed(self.vectorizer.transform)(chunk) for chunk in chunks
+            )
+        ).tocsr()
 
 
-def get_model(model: BaseEstimator) -> Pipeline:
-    vectorizer = TfidfVectorizer(
-        preprocessor=preprocessor,
-        stop_words="english",
-        ngram_range=(1, 2),
-        max_features=7000,
+def get_model(
+    model: BaseEstimator,
+    vectorizer: CttVectorizer = "tfidf",
+    *,
+    n_jobs: int | None = 1,
+) -> Pipeline:
+    """
+    Pipeline of `model` with "tfidf" (vocabulary of top 7000 terms) or "hashing"
+    (2**16 hashed features, then idf weighting) vectorizer. "hashing" featurizes
+    with `n_jobs` processes, keep it 1 for serving (its processes are busy with
+    requests) and parallelise only training.
+    """
+    # Titles are normalized as a whole column before the vectorizer, so it must not
+    # lowercase them again (as it does without preprocessor).
+    if vectorizer == "hashing":
+        hashing = HashingVectorizer(
+            lowercase=False,
+            stop_words="english",
+            ngram_range=(1, 2),
+            n_features=2**16,
+            # Features must be non-negative for naive bayes
+            alternate_sign=False,
+            norm=None,
+        )
+        steps = [
+            ("vectorizer", ParallelHashingVectorizer(hashing, n_jobs=n_jobs)),
+            ("tfidf", TfidfTransformer()),
+        ]
+    else:
+        tfidf = TfidfVectorizer(
+            lowercase=False,
+            stop_words="english",
+            ngram_range=(1, 2),
+            max_features=7000,
+        )
+        steps = [("vectorizer", tfidf)]
+    return Pipeline(
+        [
+            ("normalizer", TextNormalizer(max_word_len=3)),
+            *steps,
+            ("model", model),
+        ]
     )
-    return Pipeline([("vectorizer", vectorizer), ("model", model)])
@@ -5,9 +5,11 @@ deployment. They are just for comparision using `mlflow ui`.
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
+import mlflow
+
 from ml.base.monitoring import ModelMonitorBase
 
 from .model import get_model
@@ -15,15 +17,22 @@ from .model import get_model
 if TYPE_CHECKING:
     from sklearn.pipeline import Pipeline
 
+    from .model import CttVectorizer
+
 
 @dataclass
 class CttModelMonitor(ModelMonitorBase):
+    vectorizer: CttVectorizer = field(default="tfidf", kw_only=True)
+
     def get_model(self) -> Pipeline:
-        return get_model(self.model(**self.params))
+        return get_model(self.model(**self.params), self.vectorizer, n_jobs=-1)
+
+    def log_model_params(self) -> None:
+        super().log_model_params()
+        mlflow.log_param("vectorizer", self.vectorizer)
 
 
 if __name__ == "__main__":
-    import mlflow
     import polars as pl
     from sklearn.ensemble import RandomForestClassifier
     from sklearn.linear_model import LogisticRegression
@@ -57,6 +66,9 @@ if __name__ == "__main__":
         "nb_default": CttModelMonitor(MultinomialNB, {"alpha": 1.0}),
         "nb_0.1": CttModelMonitor(MultinomialNB, {"alpha": 0.1}),
         "nb_0.2": CttModelMonitor(MultinomialNB, {"alpha": 0.2}),
+        "nb_0.2_hashing": CttModelMonitor(
+            MultinomialNB, {"alpha": 0.2}, vectorizer="hashing"
+        ),
         "logistic_default": CttModelMonitor(LogisticRegression),
     }
 
@@ -4,17 +4,15 @@ This is just for to give a reference that how the prediction pipeline works.
 """
 
 if __name__ == "__main__":
-    from pathlib import Path
-
-    import dill
     import polars as pl
 
+    from .artifact import load_model
+
     raw_data = pl.read_json("../data/ctt/channels_data.json").join(
         pl.read_json("../data/ctt/titles_data.json"), on="channelId"
     )
 
-    with Path("../data/ctt_model.dill").open("rb") as f:
-        model = dill.load(f)
+    model = load_model()
 
     pred = model.predict(
         [
@@ -0,0 +1,93 @@
+"""
+Text normalization shared by the vectorizers of CTT and channel-reco models.
+
+Steps (in order): replace short words with a space, delete punctuation and digits,
+delete emojis, collapse whitespace and optionally lowercase. Regexes, translation
+table and emoji pattern are built only once.
+
+`TextNormalizer` normalizes one document (`__call__`) or a whole column with native
+polars expressions (`expr`, `transform`), so the documents are normalized before
+they reach the vectorizer instead of one by one inside it.
+"""
+
+from __future__ import annotations
+
+import re
+import string
+from functools import cache
+from typing import Iterable, Self
+
+import emoji
+import polars as pl
+from sklearn.base import BaseEstimator, TransformerMixin
+
+_STRIP_TABLE = str.maketrans("", "", string.punctuation + string.digits)
+_WHITESPACES = re.compile(r"\s+")
+
+# Python's `\w` (alphanumeric or "_") and `\s` (which also contains \x1c-\x1f) for
+# the regex engine of polars, whose `\w`, `\b` and `\s` are defined differently.
+_PL_WORD = r"\p{L}\p{N}_"
+_PL_WORD_OR_NOT = rf"[{_PL_WORD}]+|[^{_PL_WORD}]+"
+_PL_WHITESPACES = r"[\s\x1c-\x1f]+"
+# ASCII classes, same as `string.punctuation` and `string.digits`
+_PL_STRIP_CHARS = r"[[:punct:][:digit:]]"
+# `emoji.replace_emoji` also deletes variation selectors which are not part of emoji
+_PL_VARIATION_SELECTORS = "[\ufe0e\ufe0f]"
+
+
+@cache
+def _short_words(max_word_len: int) -> re.Pattern[str]:
+    return re.compile(rf"\b\w{{1,{max_word_len}}}\b")
+
+
+# Same as `emoji_pattern` of frontend's `youtube.ingest_yt_history` (see there),
+# backend and frontend are deployed separately so they can not share it.
+@cache
+def emoji_pattern() -> str:
+    emojis = sorted(emoji.EMOJI_DATA, key=len, reverse=True)
+    return "|".join(re.escape(i) for i in emojis)
+
+
+class TextNormalizer(TransformerMixin, BaseEstimator):
+    """
+    Words of up to `max_word_len` characters are removed. Instance is a valid
+    `preprocessor` of a vectorizer and a transformer of a `Pipeline`.
+    """
+
+    def __init__(self, max_word_len: int = 3, *, lower: bool = False) -> None:
+        self.max_word_len = max_word_len
+        self.lower = lower
+
+    def __call__(self, s: str) -> str:
+        s = _short_words(self.max_word_len).sub(" ", s)
+        s = s.translate(_STRIP_TABLE)
+        if not s.isascii():  # No emoji is ASCII
+            s = emoji.replace_emoji(s, "")
+        s = _WHITESPACES.sub(" ", s)
+        return s.lower() if self.lower else s
+
+    def expr(self, column: str | pl.Expr) -> pl.Expr:
+        """Same as `__call__` on each value of `column` but as polars expression."""
+        if isinstance(column, str):
+            column = pl.col(column)
+        word = pl.element()
+        short_word = word.str.len_chars().le(self.max_word_len) & word.str.contains(
+            f"^[{_PL_WORD}]"
+        )
+        expr = (
+            # Split into runs of word and non-word characters, i.e. `\b` boundaries
+            column.str.extract_all(_PL_WORD_OR_NOT)
+            .list.eval(pl.when(short_word).then(pl.lit(" ")).otherwise(word))
+            .list.join("")
+            .str.replace_all(_PL_STRIP_CHARS, "")
+            .str.replace_all(emoji_pattern(), "")
+            .str.replace_all(_PL_VARIATION_SELECTORS, "")
+            .str.replace_all(_PL_WHITESPACES, " ")
+        )
+        return expr.str.to_lowercase() if self.lower else expr
+
+    def fit(self, X, y=None) -> Self:
+        return self
+
+    def transform(self, X: Iterable[str], y=None) -> pl.Series:
+        return pl.select(self.expr(pl.Series(values=X, dtype=pl.Utf8))).to_series()
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import polars as pl
+import pytest
+
+from ml.channel_reco.data import clean_data
+from ml.channel_reco.index import ChannelRecoIndex
+from ml.channel_reco.model import get_vectorizers
+
+# Title and tags of a video of each channel, similarity with a "python" query
+# decreases from channel1 to channel4.
+VIDEOS = {
+    "channel1": ("python programming tutorial", ["python", "programming"]),
+    "channel2": ("python programming guitar", ["python", "guitar"]),
+    "channel3": ("python cooking recipes", ["cooking", "recipes"]),
+    "channel4": ("football highlights", ["football", "sports"]),
+}
+
+
+def _videos(*channel_ids: str) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "channelId": list(channel_ids),
+            "channelTitle": [i.title() for i in channel_ids],
+            "title": [VIDEOS[i][0] for i in channel_ids],
+            "tags": [VIDEOS[i][1] for i in channel_ids],
+        }
+    )
+
+
+@pytest.fixture(scope="module")
+def index() -> ChannelRecoIndex:
+    data = clean_data(_videos(*VIDEOS)).sort("channelId")
+    return ChannelRecoIndex.build(data, get_vectorizers(), n_components=3)
+
+
+def _query(channel_id: str = "query") -> pl.DataFrame:
+    return _videos("channel1").with_columns(pl.lit(channel_id).alias("channelId"))
+
+
+@pytest.mark.parametrize("dense", [False, True])
+def test_top_k_is_sorted_by_similarity(index: ChannelRecoIndex, dense: bool):
+    df = index.top_k(_query(), 3, dense=dense)
+    assert df.columns == ["channelId", "channelTitle", "similarity"]
+    assert df.height == 3
+    assert df["similarity"].is_sorted(descending=True)
+
+
+def test_top_k_ordering(index: ChannelRecoIndex):
+    df = index.top_k(_query(), 4)  # Query is same as channel1
+    assert df["channelId"].to_list() == ["channel1", "channel2", "channel3", "channel4"]
+
+
+def test_top_k_larger_than_index(index: ChannelRecoIndex):
+    df = index.top_k(_query(), 100)
+    assert sorted(df["channelId"]) == sorted(VIDEOS)
+
+
+@pytest.mark.parametrize("dense", [False, True])
+def test_top_k_excludes_query_channel(index: ChannelRecoIndex, dense: bool):
+    df = index.top_k(_query("channel1"), 100, dense=dense)
+    assert sorted(df["channelId"]) == ["channel2", "channel3", "channel4"]
+    df = index.top_k(_query("channel1"), 1, dense=dense)
+    assert df.height == 1
+    assert df["channelId"][0] != "channel1"
+
+
+def test_top_k_of_channels_in_many_blocks(
+    index: ChannelRecoIndex, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr("ml.channel_reco.index._BLOCK_SIZE", 1)
+    df = index.top_k(_query("channel1"), 2)
+    assert df["channelId"].to_list() == ["channel2", "channel3"]
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from api.routes.db.indexes import _explain, _winning_stages
+
+# Winning plans of `{"id": {"$in": [...]}}` as explained by MongoDB
+CLASSIC_PLAN = {
+    "stage": "FETCH",
+    "inputStage": {"stage": "IXSCAN", "keyPattern": {"id": 1}, "indexName": "id"},
+}
+# Slot based engine (MongoDB 5.1 - 6.x) nests the plan under `queryPlan`
+SBE_PLAN = {
+    "queryPlan": {
+        "stage": "FETCH",
+        "planNodeId": 2,
+        "inputStage": {"stage": "IXSCAN", "planNodeId": 1, "indexName": "id"},
+    },
+    "slotBasedPlan": {"slots": "$$RESULT=s11", "stages": "[2] nlj inner [] ..."},
+}
+OR_PLAN = {
+    "stage": "SUBPLAN",
+    "inputStage": {
+        "stage": "OR",
+        "inputStages": [{"stage": "IXSCAN"}, {"stage": "COLLSCAN"}],
+    },
+}
+
+
+@pytest.mark.parametrize(
+    ("plan", "stages"),
+    [
+        (CLASSIC_PLAN, ["FETCH", "IXSCAN"]),
+        (SBE_PLAN, ["FETCH", "IXSCAN"]),
+        ({"stage": "COLLSCAN"}, ["COLLSCAN"]),
+        ({"queryPlan": {"stage": "COLLSCAN"}}, ["COLLSCAN"]),
+        (OR_PLAN, ["SUBPLAN", "OR", "IXSCAN", "COLLSCAN"]),
+        ({}, []),
+        ({"slotBasedPlan": {}}, []),
+    ],
+)
+def test_winning_stages(plan: dict[str, Any], stages: list[str]):
+    assert _winning_stages(plan) == stages
+
+
+class _Cursor:
+    def __init__(self, explain: dict[str, Any]) -> None:
+        self._explain = explain
+
+    async def explain(self) -> dict[str, Any]:
+        return self._explain
+
+
+class _Collection:
+    def __init__(self, explain: dict[str, Any]) -> None:
+        self._explain = explain
+
+    def find(self, query: dict[str, Any]) -> _Cursor:
+        return _Cursor(self._explain)
+
+
+@pytest.mark.parametrize(
+    ("explain", "uses_index"),
+    [
+        ({"queryPlanner": {"winningPlan": CLASSIC_PLAN}}, True),
+        ({"queryPlanner": {"winningPlan": SBE_PLAN}}, True),
+        ({"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}, False),
+        ({"queryPlanner": {}}, None),
+        ({}, None),
+    ],
+)
+def test_explain(explain: dict[str, Any], uses_index: bool | None):
+    collection = _Collection(
+        {**explain, "executionStats": {"totalKeysExamined": 1, "totalDocsExamined": 1}}
+    )
+    result = asyncio.run(_explain(collection, {"id": {"$in": [""]}}))  # type: ignore
+    assert result["usesIndex"] is uses_index
+    assert result["totalDocsExamined"] == 1
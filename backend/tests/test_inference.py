@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import pytest
+
+from api.inference import MicroBatcher
+
+
+class _Model:
+    """Records the batches it predicts, fails on "bad" items."""
+
+    def __init__(self) -> None:
+        self.batches: list[list[Any]] = []
+        self.lock = threading.Lock()
+
+    def __call__(self, items: list[Any]) -> list[Any]:
+        with self.lock:
+            self.batches.append(items)
+        if "bad" in items:
+            raise ValueError("Bad item.")
+        return [f"{i}!" for i in items]
+
+
+def _batcher(model: _Model, **kwargs: Any) -> MicroBatcher:
+    options = {"max_batch_size": 8, "max_wait_ms": 50, "max_concurrency": 1}
+    return MicroBatcher(model, ThreadPoolExecutor(1), **{**options, **kwargs})
+
+
+def test_concurrent_requests_are_batched():
+    model = _Model()
+
+    async def main():
+        batcher = _batcher(model)
+        batcher.start()
+        results = await asyncio.gather(
+            batcher.submit(["a", "b"]), batcher.submit(["c"]), batcher.submit(["d"])
+        )
+        metrics = batcher.metrics()
+        await batcher.stop()
+        return results, metrics
+
+    results, metrics = asyncio.run(main())
+    assert results == [["a!", "b!"], ["c!"], ["d!"]]
+    assert model.batches == [["a", "b", "c", "d"]]
+    assert metrics["requests"] == 3
+    assert metrics["items"] == 4
+    assert metrics["batches"] == 1
+    assert metrics["batchSize"]["max"] == 4
+
+
+def test_batches_are_limited_to_max_batch_size():
+    model = _Model()
+
+    async def main():
+        batcher = _batcher(model, max_batch_size=3)
+        batcher.start()
+        requests = [[f"{i}{j}" for j in range(2)] for i in range(4)]
+        results = await asyncio.gather(*(batcher.submit(i) for i in requests))
+        await batcher.stop()
+        return requests, results
+
+    requests, results = asyncio.run(main())
+    assert results == [[f"{i}!" for i in request] for request in requests]
+    # Items of a request are never split between batches
+    assert model.batches == [requests[0], requests[1], requests[2], requests[3]]
+
+
+def test_bigger_request_runs_as_one_batch():
+    model = _Model()
+
+    async def main():
+        batcher = _batcher(model, max_batch_size=2)
+        batcher.start()
+        result = await batcher.submit(list("abcde"))
+        await batcher.stop()
+        return result
+
+    assert asyncio.run(main()) == ["a!", "b!", "c!", "d!", "e!"]
+    assert model.batches == [list("abcde")]
+
+
+def test_error_is_raised_in_every_request_of_batch():
+    model = _Model()
+
+    async def main():
+        batcher = _batcher(model)
+        batcher.start()
+        results = await asyncio.gather(
+            batcher.submit(["a"]), batcher.submit(["bad"]), return_exceptions=True
+        )
+        # Batcher keeps working after a failed batch
+        after = await batcher.submit(["c"])
+        metrics = batcher.metrics()
+        await batcher.stop()
+        return results, after, metrics
+
+    results, after, metrics = asyncio.run(main())
+    assert all(isinstance(i, ValueError) for i in results)
+    assert after == ["c!"]
+    assert metrics["failedBatches"] == 1
+    assert metrics["batches"] == 1
+
+
+def test_empty_request():
+    model = _Model()
+
+    async def main():
+        batcher = _batcher(model)
+        batcher.start()
+        result = await batcher.submit([])
+        await batcher.stop()
+        return result
+
+    assert asyncio.run(main()) == []
+    assert model.batches == []
+
+
+def test_stop_cancels_queued_requests():
+    async def main():
+        batcher = _batcher(_Model())  # Not started, requests stay queued
+        request = asyncio.create_task(batcher.submit(["a"]))
+        await asyncio.sleep(0)
+        await batcher.stop()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+
+    asyncio.run(main())
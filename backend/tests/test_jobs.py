@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Callable
+
+import pytest
+from fastapi import HTTPException
+
+from api.jobs import JobQueue, JobStore
+from api.models.job import Job, JobStatusEnum
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+HEARTBEAT = 0.02
+
+
+@pytest.fixture()
+def db_path(tmp_path: Path) -> Path:
+    return tmp_path / "jobs.sqlite3"
+
+
+async def _wait_for(
+    queue: JobQueue, job_id: str, predicate: Callable[[Job], bool]
+) -> Job:
+    """Poll the job (like a client does) until `predicate` is true."""
+    deadline = time.monotonic() + 5
+    while not predicate(job := await queue.get(job_id)):  # type: ignore
+        assert time.monotonic() < deadline, f"Timed out, job is {job!r}."
+        await asyncio.sleep(HEARTBEAT)
+    return job
+
+
+def test_store_persists_jobs(db_path: Path):
+    async def main():
+        store = JobStore(db_path)
+        job = Job(kind="test", progress={"done": 1}, result={"a": [1, 2]})
+        await store.save(job, "owner")
+        store.close()
+
+        store = JobStore(db_path)
+        assert await store.load(job.id) == job
+        assert await store.load("missing") is None
+        store.close()
+
+    asyncio.run(main())
+
+
+def test_fail_unfinished_only_fails_stale_jobs(db_path: Path):
+    async def main():
+        store = JobStore(db_path, heartbeat_timeout=0.2)
+        stale, live = Job(kind="test"), Job(kind="test")
+        finished = Job(kind="test", status=JobStatusEnum.Succeeded)
+        for job in (stale, finished):
+            await store.save(job, "stopped")
+        await asyncio.sleep(0.3)
+        await store.save(live, "running")
+
+        await store.fail_unfinished()
+
+        stale = await store.load(stale.id)
+        assert stale.status is JobStatusEnum.Failed
+        assert stale.error == "Interrupted by app restart."
+        assert stale.finishedAt is not None
+        assert (await store.load(finished.id)).status is JobStatusEnum.Succeeded
+        assert (await store.load(live.id)).status is JobStatusEnum.Queued
+        store.close()
+
+    asyncio.run(main())
+
+
+def test_load_fails_stale_job(db_path: Path):
+    async def main():
+        store = JobStore(db_path, heartbeat_timeout=0.1)
+        job = Job(kind="test", status=JobStatusEnum.Running)
+        await store.save(job, "stopped")
+        assert (await store.load(job.id)).status is JobStatusEnum.Running
+        await asyncio.sleep(0.2)
+        assert (await store.load(job.id)).status is JobStatusEnum.Failed
+        store.close()
+
+    asyncio.run(main())
+
+
+def test_queue_runs_jobs(db_path: Path):
+    async def succeed(job: Job) -> int:
+        job.progress["done"] = 1
+        return 42
+
+    async def fail(job: Job) -> None:
+        raise HTTPException(400, {"error": "Bad job."})
+
+    async def main():
+        store = JobStore(db_path)
+        queue = JobQueue(store=store, heartbeat_interval=HEARTBEAT)
+        queue.start()
+        succeeded = await queue.submit("succeed", succeed)
+        failed = await queue.submit("fail", fail)
+        await queue._queue.join()
+        await queue.stop()
+
+        assert succeeded.status is JobStatusEnum.Succeeded
+        assert succeeded.result == 42
+        assert failed.status is JobStatusEnum.Failed
+        assert failed.error == {"error": "Bad job."}
+        assert await store.load(succeeded.id) == succeeded
+        assert await store.load(failed.id) == failed
+        store.close()
+
+    asyncio.run(main())
+
+
+def test_queue_rejects_when_full():
+    async def main():
+        queue = JobQueue(max_queued=1)  # Not started, jobs stay in queue
+        await queue.submit("test", asyncio.sleep)
+        with pytest.raises(HTTPException) as e:
+            await queue.submit("test", asyncio.sleep)
+        assert e.value.status_code == 503
+
+    asyncio.run(main())
+
+
+def test_jobs_are_shared_between_processes(db_path: Path):
+    """Queues with their own stores act like gunicorn workers sharing a file."""
+
+    async def main():
+        done = asyncio.Event()
+
+        async def wait_until_done(job: Job) -> str:
+            job.progress["step"] = 1
+            await done.wait()
+            return "done"
+
+        owner = JobQueue(store=JobStore(db_path), heartbeat_interval=HEARTBEAT)
+        other = JobQueue(store=JobStore(db_path), heartbeat_interval=HEARTBEAT)
+        owner.start()
+        job = await owner.submit("test", wait_until_done)
+
+        # Start of another process does not fail the running job of the owner
+        await other.store.fail_unfinished()  # type: ignore
+        other.start()
+
+        job = await _wait_for(other, job.id, lambda i: i.progress == {"step": 1})
+        assert job.status is JobStatusEnum.Running
+        done.set()
+        job = await _wait_for(other, job.id, lambda i: i.is_finished)
+        assert job.status is JobStatusEnum.Succeeded
+        assert job.result == "done"
+
+        # Cancellation requested through another process
+        done.clear()
+        job = await owner.submit("test", wait_until_done)
+        assert (await other.cancel(job.id)).status is not JobStatusEnum.Cancelled
+        job = await _wait_for(other, job.id, lambda i: i.is_finished)
+        assert job.status is JobStatusEnum.Cancelled
+
+        for queue in (owner, other):
+            await queue.stop()
+            queue.store.close()  # type: ignore
+
+    asyncio.run(main())
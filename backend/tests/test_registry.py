@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from api.registry import ModelRegistry
+from ml import artifacts
+from ml.artifacts import Artifact, ArtifactWriter
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+KIND = "test"
+
+
+def save(model: np.ndarray, path: str | Path, meta: dict[str, Any]) -> str:
+    writer = ArtifactWriter(path, KIND)
+    writer.meta.update(meta)
+    writer.add_array("weights", model)
+    return writer.commit()
+
+
+class Loader:
+    """Count loads, fail loading the models with negative weights."""
+
+    def __init__(self) -> None:
+        self.loads = 0
+
+    def __call__(self, path: str | Path) -> np.ndarray:
+        self.loads += 1
+        model = Artifact.load(path, KIND, mmap=False).array("weights")
+        if (model < 0).any():
+            raise ValueError("Broken model.")
+        return model
+
+
+@pytest.fixture()
+def path(tmp_path: Path) -> Path:
+    return tmp_path / "model"
+
+
+def _registry(path: Path, loader: Loader | None = None, **kwargs) -> ModelRegistry:
+    return ModelRegistry("test", path, loader=loader or Loader(), saver=save, **kwargs)
+
+
+def test_get_without_artifact(path: Path):
+    registry = _registry(path)
+    assert not registry.refresh()
+    with pytest.raises(HTTPException) as e:
+        registry.get()
+    assert e.value.status_code == 404
+
+
+def test_refresh_serves_new_versions(path: Path):
+    loader = Loader()
+    registry = _registry(path, loader)
+    v1 = save(np.array([1.0]), path, {})
+    assert registry.get().tolist() == [1.0]  # Loaded on first use
+    assert not registry.refresh()  # Same version
+    assert loader.loads == 1
+
+    v2 = save(np.array([2.0]), path, {"epoch": 2})
+    assert registry.refresh()
+    assert registry.get().tolist() == [2.0]
+
+    info = registry.info()
+    assert info["artifactVersion"] == v2
+    assert info["current"]["version"] == v2
+    assert [i["version"] for i in info["previous"]] == [v1]
+    assert registry._current.meta == {"epoch": 2}  # type: ignore
+
+
+def test_failed_load_keeps_serving_current_version(path: Path):
+    loader = Loader()
+    registry = _registry(path, loader)
+    v1 = save(np.array([1.0]), path, {})
+    registry.refresh()
+
+    broken = save(np.array([-1.0]), path, {})
+    assert not registry.refresh()
+    assert not registry.refresh()  # Failed version is not loaded again
+    assert loader.loads == 2
+    assert registry.get().tolist() == [1.0]
+    assert registry.info()["failedVersion"] == broken
+    assert registry.info()["current"]["version"] == v1
+
+
+def test_rollback(path: Path):
+    loader = Loader()
+    registry = _registry(path, loader)
+    with pytest.raises(HTTPException) as e:
+        registry.rollback()  # No previous version
+    assert e.value.status_code == 404
+
+    v1 = save(np.array([1.0]), path, {"epoch": 1})
+    registry.refresh()
+    save(np.array([2.0]), path, {"epoch": 2})
+    registry.refresh()
+    with pytest.raises(HTTPException):
+        registry.rollback("unknown")
+
+    loaded = registry.rollback()
+    assert loaded.version == v1
+    assert registry.get().tolist() == [1.0]
+    assert artifacts.version(path) == v1  # Published for other processes
+    assert artifacts.read_manifest(path)["meta"] == {"epoch": 1}  # type: ignore
+    assert loader.loads == 2  # Served from memory
+
+
+def test_other_processes_swap_back_from_memory(path: Path):
+    """Registries of other processes swap to the version published by rollback."""
+    registry, other_loader = _registry(path), Loader()
+    other = _registry(path, other_loader)
+    save(np.array([1.0]), path, {})
+    for i in (registry, other):
+        i.refresh()
+    save(np.array([2.0]), path, {})
+    for i in (registry, other):
+        i.refresh()
+
+    v1 = registry.rollback().version
+    assert other.refresh()
+    assert other.get().tolist() == [1.0]
+    assert other.info()["current"]["version"] == v1
+    assert other_loader.loads == 2
+
+
+def test_keeps_limited_previous_versions(path: Path):
+    registry = _registry(path, keep=2)
+    versions = []
+    for i in range(4):
+        versions.append(save(np.array([float(i)]), path, {}))
+        registry.refresh()
+    previous = [i["version"] for i in registry.info()["previous"]]
+    assert previous == versions[-2::-1][:2]
+
+
+def test_watcher_loads_new_versions(path: Path):
+    registry = _registry(path, poll_interval=0.01)
+    save(np.array([1.0]), path, {})
+    registry.start()
+    try:
+        save(np.array([2.0]), path, {})
+        deadline = time.monotonic() + 5
+        while registry._current is None or registry.get().tolist() != [2.0]:
+            assert time.monotonic() < deadline, "Timed out."
+            time.sleep(0.01)
+    finally:
+        registry.stop()
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+from api.routes.youtube import scheduler
+from api.routes.youtube.scheduler import FetchProgress, YtApiScheduler
+
+KEY = "k" * 39
+
+
+class _Quota:
+    daily_quota = 10000
+
+    def __init__(self) -> None:
+        self.used = 0
+
+    async def reserve(self, key: str, units: int) -> None:
+        self.used += units
+
+    async def refund(self, key: str, units: int) -> None:
+        self.used -= units
+
+
+class _Client:
+    """Respond (or raise) with `responses` one by one."""
+
+    def __init__(self, *responses: httpx.Response | Exception) -> None:
+        self.responses = list(responses)
+        self.requests = 0
+
+    async def get(self, url: str, *, params: dict) -> httpx.Response:
+        self.requests += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture(autouse=True)
+def _no_backoff(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(scheduler, "_backoff_delay", lambda *_: 0)
+
+
+def _get(client: _Client, quota: _Quota, max_retries: int = 5) -> httpx.Response:
+    yt_scheduler = YtApiScheduler(
+        client,  # type: ignore
+        quota,  # type: ignore
+        None,  # type: ignore
+        max_retries=max_retries,
+    )
+    return asyncio.run(yt_scheduler.get(KEY, "/videos", params={}, cost=3))
+
+
+def test_retries_reserve_quota_once():
+    quota = _Quota()
+    client = _Client(
+        httpx.Response(503),
+        httpx.Response(429),
+        httpx.ConnectError("Failed."),
+        httpx.Response(200),
+    )
+    assert _get(client, quota).status_code == 200
+    assert client.requests == 4
+    assert quota.used == 3
+
+
+def test_last_response_of_failed_retries_keeps_reservation():
+    quota = _Quota()
+    client = _Client(*[httpx.Response(503)] * 3)
+    assert _get(client, quota, max_retries=2).status_code == 503
+    assert quota.used == 3
+
+
+def test_request_which_never_reached_api_is_refunded():
+    quota = _Quota()
+    client = _Client(*[httpx.ConnectError("Failed.")] * 3)
+    with pytest.raises(httpx.ConnectError):
+        _get(client, quota, max_retries=2)
+    assert client.requests == 3
+    assert quota.used == 0
+
+
+class _Cursor:
+    def __init__(self, docs: list[dict]) -> None:
+        self.docs = docs
+
+    def sort(self, key: str, direction: int) -> _Cursor:
+        return _Cursor(sorted(self.docs, key=lambda i: i[key], reverse=direction < 0))
+
+    async def to_list(self, length: int | None) -> list[dict]:
+        return self.docs[:length]
+
+
+class _Collection:
+    def __init__(self) -> None:
+        self.docs: list[dict] = []
+
+    async def insert_many(self, docs: list[dict]) -> None:
+        self.docs.extend(docs)
+
+    async def delete_many(self, _filter: dict) -> None:
+        self.docs = [i for i in self.docs if i["token"] != _filter["token"]]
+
+    def find(self, _filter: dict) -> _Cursor:
+        # Inserted in reverse, so that loading depends on sorting
+        return _Cursor([i for i in self.docs[::-1] if i["token"] == _filter["token"]])
+
+
+def test_fetch_progress_splits_ids_into_documents():
+    collection = _Collection()
+    progress = FetchProgress(collection, chunk_size=3)  # type: ignore
+    ids = [f"video{i}" for i in range(8)]
+
+    token = asyncio.run(progress.save(ids))
+    assert [len(i["pendingIds"]) for i in collection.docs] == [3, 3, 2]
+    assert asyncio.run(progress.load(token)) == ids
+
+    asyncio.run(progress.save(ids[5:], token))  # Overwrites all of the chunks
+    assert asyncio.run(progress.load(token)) == ids[5:]
+    assert len(collection.docs) == 1
+
+    asyncio.run(progress.delete(token))
+    assert asyncio.run(progress.load(token)) is None
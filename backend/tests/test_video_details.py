@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import polars as pl
+import pytest
+
+from api.models.youtube.video import (
+    duration_in_sec,
+    fill_duration_in_sec,
+    parse_iso8601_duration,
+)
+
+DURATIONS = [
+    ("PT1H2M3S", 3723),
+    ("P1DT2H", 93600),
+    ("PT45S", 45),
+    ("PT90S", 90),
+    ("P1W", 604800),
+    ("P2D", 172800),
+    # Live streams have zero duration
+    ("P0D", 0),
+    ("PT0S", 0),
+    # Not valid
+    ("PT", None),
+    ("P", None),
+    ("", None),
+    ("1H2M", None),
+    ("PT1.5S", None),
+]
+
+
+@pytest.mark.parametrize(("duration", "seconds"), DURATIONS)
+def test_parse_iso8601_duration(duration: str, seconds: int | None):
+    assert parse_iso8601_duration(duration) == seconds
+
+
+def test_duration_in_sec_matches_parse_iso8601_duration():
+    durations = pl.Series("duration", [i for i, _ in DURATIONS] + [None])
+    df = pl.DataFrame(durations).select(duration_in_sec(pl.col("duration")))
+    assert df.to_series().to_list() == [i for _, i in DURATIONS] + [None]
+
+
+@pytest.mark.parametrize("stored", [True, False])
+def test_fill_duration_in_sec(stored: bool):
+    df = pl.DataFrame({"duration": ["PT1M", "PT2M", None]})
+    if stored:
+        df = df.with_columns(pl.Series("durationInSec", [61, None, None]))
+    expected = [61 if stored else 60, 120, None]
+    assert fill_duration_in_sec(df)["durationInSec"].to_list() == expected
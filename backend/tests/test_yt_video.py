@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import httpx
+from fastapi import Request, Response
+
+from api.routes.youtube.video import get_videos_details_from_yt_api
+from errors import YtApiQuotaExceededError
+
+KEY = "k" * 39
+
+
+def _item(id: str) -> dict[str, Any]:
+    return {
+        "id": id,
+        "snippet": {"channelId": "channel", "title": id, "tags": []},
+        "contentDetails": {"duration": "PT1M"},
+    }
+
+
+class _Progress:
+    def __init__(self) -> None:
+        self.tokens: dict[str, list[str]] = {}
+
+    async def save(self, pending_ids: list[str], token: str | None = None) -> str:
+        token = f"token{len(self.tokens)}" if token is None else token
+        self.tokens[token] = pending_ids
+        return token
+
+    async def load(self, token: str) -> list[str] | None:
+        return self.tokens.get(token)
+
+    async def delete(self, token: str) -> None:
+        del self.tokens[token]
+
+
+class _Scheduler:
+    """Respond with an item per id, until `quota` requests are made."""
+
+    def __init__(self, quota: int = 100) -> None:
+        self.progress = _Progress()
+        self.quota = quota
+        self.fetched: list[str] = []
+
+    async def get(self, key: str, url: str, *, params: dict[str, Any]):
+        if self.quota == 0:
+            raise YtApiQuotaExceededError(10000, 10000)
+        self.quota -= 1
+        ids = params["id"].split(",")
+        self.fetched.extend(ids)
+        return httpx.Response(200, json={"items": [_item(i) for i in ids]})
+
+
+def _get_details(
+    scheduler: _Scheduler, ids: list[str], limit: int, token: str | None = None
+) -> tuple[list[str], Response]:
+    response = Response()
+    details = asyncio.run(
+        get_videos_details_from_yt_api(
+            Request({"type": "http", "headers": []}),
+            ids,
+            response,
+            limit=limit,
+            key=KEY,
+            resume_token=token,
+            scheduler=scheduler,  # type: ignore
+        )
+    )
+    return [i.id for i in details], response
+
+
+def test_resume_token_with_more_ids_than_limit():
+    scheduler = _Scheduler()
+    ids = [f"video{i:03d}" for i in range(250)]
+    token = asyncio.run(scheduler.progress.save(ids))
+
+    fetched = []
+    for _ in range(3):
+        assert token in scheduler.progress.tokens
+        details, response = _get_details(scheduler, [], 100, token)
+        fetched.extend(details)
+        if response.status_code == 206:
+            assert response.headers["X-Resume-Token"] == token
+    assert fetched == ids
+    assert token not in scheduler.progress.tokens  # Deleted once all are fetched
+
+
+def test_resume_keeps_rest_of_ids_when_quota_exhausts():
+    scheduler = _Scheduler(quota=1)
+    ids = [f"video{i:03d}" for i in range(250)]
+    token = asyncio.run(scheduler.progress.save(ids))
+
+    details, response = _get_details(scheduler, [], 100, token)
+    assert response.status_code == 206
+    assert details == scheduler.fetched == ids[:50]
+    assert scheduler.progress.tokens[token] == ids[50:]
+
+
+def test_ids_over_limit_are_not_kept_without_token():
+    scheduler = _Scheduler()
+    ids = [f"video{i:03d}" for i in range(150)]
+    details, response = _get_details(scheduler, ids, 100)
+    assert details == ids[:100]
+    assert response.status_code != 206
+    assert not scheduler.progress.tokens
@@ -7,5 +7,12 @@ API_HOST = os.getenv("API_HOST")
 API_PORT = os.getenv("API_PORT")
 API_HOST_URL = f"http://{API_HOST}:{API_PORT}"
 
-INGESTED_YT_HISTORY_DATA_PATH = Path("../data/userHistoryData.json")
-VIDEO_DETAILS_JSON_PATH = Path("../data/videoDetails.json")
+RAW_YT_HISTORY_DATA_PATH = Path("../data/watch-history.json")
+INGESTED_YT_HISTORY_DATA_PATH = Path("../data/userHistoryData.parquet")
+VIDEO_DETAILS_DATA_PATH = Path("../data/videoDetails.parquet")
+HISTORY_CUBE_DATA_PATH = Path("../data/userHistoryCube.parquet")
+VIDEO_DETAILS_CUBE_DATA_PATH = Path("../data/videoDetailsCube.parquet")
+
+# Paths used by older versions of app, these are migrated to parquet automatically
+LEGACY_INGESTED_YT_HISTORY_JSON_PATH = Path("../data/userHistoryData.json")
+LEGACY_VIDEO_DETAILS_JSON_PATH = Path("../data/videoDetails.json")
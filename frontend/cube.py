@@ -0,0 +1,82 @@
+"""
+Pre-computed aggregate cubes of the user's data.
+
+A cube is the history grouped by all the dimensions used by the charts, with the
+count of videos and sums of the other measures. Charts roll up the (small) cube
+to the dimensions they need instead of scanning every watched video on each rerun.
+"""
+
+from __future__ import annotations
+
+import polars as pl
+
+import storage
+from youtube import VideoDetails
+
+HISTORY_CUBE_DIMENSIONS = (
+    # Derived from `time`, gives the time range and no. of days of the data
+    "date",
+    "year",
+    "month",
+    "weekday",
+    "hour",
+    "daytime",
+    "contentTypePred",
+    "channelTitle",
+)
+VIDEO_DETAILS_CUBE_DIMENSIONS = (*HISTORY_CUBE_DIMENSIONS, "categoryName")
+
+# Boolean columns which are summed up in the cube
+_FLAG_MEASURES = (
+    "isShorts",
+    "fromWebAppActivity",
+    "fromYtSearchHistActivity",
+    "fromYtWatchHistActivity",
+)
+
+
+def build_cube(lf: pl.LazyFrame, dimensions: tuple[str, ...]) -> pl.LazyFrame:
+    """Group `lf` by all the `dimensions` and aggregate the measures."""
+    lf = lf.with_columns(pl.col("time").dt.date().alias("date"))
+    columns = lf.columns
+    measures = [pl.count().alias("count")]
+    measures.extend(pl.col(i).sum() for i in _FLAG_MEASURES if i in columns)
+    if "durationInSec" in columns:
+        measures.extend(
+            [
+                pl.col("durationInSec").sum().alias("durationSum"),
+                pl.col("durationInSec").count().alias("durationCount"),
+            ]
+        )
+    return lf.group_by(dimensions).agg(measures)
+
+
+def rollup(cube: pl.LazyFrame, *by: str) -> pl.LazyFrame:
+    """Roll up the `cube` to the `by` dimensions by summing up all the measures."""
+    dimensions = set(VIDEO_DETAILS_CUBE_DIMENSIONS)
+    measures = [i for i in cube.columns if i not in dimensions]
+    return cube.group_by(by).agg(pl.col(measures).sum())
+
+
+def materialize_history_cube() -> None:
+    cube = build_cube(storage.scan_ingested_history(), HISTORY_CUBE_DIMENSIONS)
+    storage.write_history_cube(cube.collect())
+
+
+def materialize_video_details_cube() -> None:
+    cube = build_cube(VideoDetails().lazy(), VIDEO_DETAILS_CUBE_DIMENSIONS)
+    storage.write_video_details_cube(cube.collect())
+
+
+def scan_history_cube() -> pl.LazyFrame:
+    """Scan the history cube, materialize it first if it does not exist."""
+    if not storage.history_cube_exists():
+        materialize_history_cube()
+    return storage.scan_history_cube()
+
+
+def scan_video_details_cube() -> pl.LazyFrame:
+    """Scan the videos details cube, materialize it first if it does not exist."""
+    if not storage.video_details_cube_exists():
+        materialize_video_details_cube()
+    return storage.scan_video_details_cube()
@@ -1,4 +1,5 @@
 import calendar
+import shutil
 
 import httpx
 import polars as pl
@@ -8,16 +9,21 @@ from plotly import express as px
 from polars import selectors as cs
 from wordcloud import STOPWORDS, WordCloud
 
+import cube
+import queries
 import st_utils
-from configs import API_HOST_URL, INGESTED_YT_HISTORY_DATA_PATH
+import storage
+import transport
+from configs import API_HOST_URL, RAW_YT_HISTORY_DATA_PATH
 from youtube import IngestYtHistory
 
 st.set_page_config("YT Watch History", "🐻‍❄", "wide")
-df = None
+lf = None
 
 # Import or Upload data into app
-if INGESTED_YT_HISTORY_DATA_PATH.exists():
-    df = st_utils.get_ingested_yt_history_df()
+if storage.ingested_history_exists():
+    lf = queries.scan_history()
+    history_cube = cube.scan_history_cube()
 else:
     with st.form("upload-yt-history-data"):
         df_buffer = st.file_uploader("Upload dataset (.json)", type=".json")
@@ -30,36 +36,52 @@ else:
             )
             st.stop()
         else:
-            INGESTED_YT_HISTORY_DATA_PATH.write_bytes(df_buffer.read())
+            RAW_YT_HISTORY_DATA_PATH.parent.mkdir(parents=True, exist_ok=True)
+            with RAW_YT_HISTORY_DATA_PATH.open("wb") as f:
+                shutil.copyfileobj(df_buffer, f)
 
     with st.status("Loading the data into app...", expanded=True) as status:
-        df = IngestYtHistory().initiate()
-        status.write(":green[👍 Data has been loaded.]")
+        __progress = status.empty()
+        # Ingest the data in chunks and predict the videos ContentType of each chunk
+        # so that memory usage is bounded by the chunk size.
+        with storage.IngestedHistoryWriter() as writer:
+            for chunk in IngestYtHistory(RAW_YT_HISTORY_DATA_PATH).iter_initiate(
+                on_progress=lambda n, rps: __progress.write(
+                    f":orange[🤔 Ingested {n:,} rows ({rps:,.0f} rows/sec) and "
+                    "predicting the videos ContentType.]"
+                ),
+            ):
+                try:
+                    response = httpx.post(
+                        f"{API_HOST_URL}/ml/ctt/predict",
+                        content=transport.to_arrow_stream(
+                            chunk.select("title", "videoId")
+                        ),
+                        headers=transport.ARROW_HEADERS,
+                    )
+                except httpx.ConnectError:
+                    status.update(
+                        label="API instance not running", expanded=False, state="error"
+                    )
+                    st.stop()
+                if not response.is_success:
+                    status.update(
+                        label="Model not present at path", expanded=False, state="error"
+                    )
+                    st.stop()
 
-        # Predict the videos ContentType
-        status.write(":orange[🤔 Predicting the videos ContentType.]")
-        try:
-            response = httpx.post(
-                f"{API_HOST_URL}/ml/ctt/predict",
-                json=df.select("title", "videoId").to_dicts(),
-            )
-        except httpx.ConnectError:
-            status.update(
-                label="API instance not running", expanded=False, state="error"
-            )
-            st.stop()
-        if not response.is_success:
-            status.update(
-                label="Model not present at path", expanded=False, state="error"
-            )
-            st.stop()
+                pred_df = transport.read_frame(response)
+                chunk = chunk.join(pred_df, on="videoId").drop(cs.ends_with("_right"))
+                writer.write(chunk)
 
-        pred_df = pl.DataFrame(response.json())
-        status.write(":green[🎊 Prediction compleated!]")
-        df = df.join(pred_df, on="videoId").drop(cs.ends_with("_right"))
-        df.write_json(INGESTED_YT_HISTORY_DATA_PATH, row_oriented=True)
+        status.write(":orange[🧊 Pre-computing aggregates for the charts.]")
+        cube.materialize_history_cube()
+        RAW_YT_HISTORY_DATA_PATH.unlink()
+        status.write(":green[🎊 Data has been loaded and prediction compleated!]")
         status.update(
-            label="📦 Stored ingested data as JSON.", expanded=False, state="complete"
+            label="📦 Stored ingested data as Parquet.",
+            expanded=False,
+            state="complete",
         )
 
     if st.button("Refresh The Page", type="primary", use_container_width=True):
@@ -83,24 +105,41 @@ sl_analysis = st.selectbox("Select Which Type Of Analysis You Want To See 👀",
 # --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- #
 if sl_analysis == _options[0]:
     l, r = st.columns(2)
+    channel_counts = cube.rollup(history_cube, "channelTitle")
+    res = queries.collect_all(
+        {
+            "time": history_cube.select(
+                pl.col("date").min().alias("min"),
+                pl.col("date").max().alias("max"),
+                pl.col("date").n_unique().alias("nDays"),
+            ),
+            "channelFreq": channel_counts.select(
+                pl.col("count").ge(7).sum().alias("ge"),
+                pl.col("count").is_between(2, 6).sum().alias("lt"),
+            ),
+            "activity": history_cube.select(
+                "fromYtSearchHistActivity",
+                "fromYtWatchHistActivity",
+                "fromWebAppActivity",
+            ).sum(),
+            "topChannels": channel_counts.select("channelTitle", "count")
+            .sort("count", descending=True)
+            .head(7),
+        }
+    )
 
     # Dataset time range
+    time_range = res["time"].row(0, named=True)
     l.metric(
         "Time Range of Dataset",
-        f'{df["time"].min():%b, %y} — {df["time"].max():%b, %y}',
+        f'{time_range["min"]:%b, %y} — {time_range["max"]:%b, %y}',
     )
-    r.metric("No. of Days of Data Present", df["time"].dt.date().n_unique())
+    r.metric("No. of Days of Data Present", time_range["nDays"])
 
     # No. Of Channels You Watches Frequently
     threshold = 7
     fig = px.pie(
-        values=df["channelTitle"]
-        .value_counts()
-        .select(
-            pl.col("count").ge(7).sum().alias("ge"),
-            pl.col("count").is_between(2, 6).sum().alias("lt"),
-        )
-        .row(0),
+        values=res["channelFreq"].row(0),
         names=["Frequently Watched Channel (>=7)", "Non Freq. Channel [2,6]"],
         title="% of channels you watches frequently",
     )
@@ -113,9 +152,7 @@ if sl_analysis == _options[0]:
         )
 
     # Count Of Video Watched From Different Activity
-    temp = df.select(
-        "fromYtSearchHistActivity", "fromYtWatchHistActivity", "fromWebAppActivity"
-    ).sum()
+    temp = res["activity"]
     fig = px.pie(
         values=temp.row(0),
         names=temp.columns,
@@ -129,7 +166,7 @@ if sl_analysis == _options[0]:
 
     # Top 7 Channel
     fig = px.bar(
-        df["channelTitle"].value_counts(sort=True).head(7),
+        res["topChannels"],
         "channelTitle",
         "count",
         title="Top 7 channels you have watched",
@@ -151,7 +188,7 @@ if sl_analysis == _options[1]:
     L, R = st.columns(2)
     sl_year = L.selectbox(
         "Select Year",
-        [None, *df["time"].dt.year().unique().sort()],
+        [None, *queries.unique_years(history_cube)],
         format_func=lambda x: x if x else "All",
     )
     sl_month = R.selectbox(
@@ -161,21 +198,20 @@ if sl_analysis == _options[1]:
     )
     st.divider()
 
-    filter_queries = []
-    if sl_year:
-        filter_queries.append(pl.col("time").dt.year().eq(sl_year))
-    if sl_month:
-        filter_queries.append(pl.col("time").dt.month().eq(sl_month))
-    if not filter_queries:
-        filter_queries.append(True)
+    filtered_cube = queries.filter_by_time(history_cube, year=sl_year, month=sl_month)
+    res = queries.collect_all(
+        {
+            "contentTypeDaytime": cube.rollup(
+                filtered_cube, "contentTypePred", "daytime"
+            ).sort("count", descending=True),
+            "contentTypeChannel": cube.rollup(
+                filtered_cube, "contentTypePred", "daytime", "channelTitle"
+            ).filter(pl.col("count").gt(20 if not sl_month else 1)),
+        }
+    )
 
     fig = px.bar(
-        (
-            df.filter(filter_queries)
-            .group_by("contentTypePred", "daytime")
-            .count()
-            .sort("count", descending=True)
-        ),
+        res["contentTypeDaytime"],
         x="contentTypePred",
         y="count",
         color="daytime",
@@ -194,12 +230,7 @@ if sl_analysis == _options[1]:
 
     L, R = st.columns(2)
     fig = px.sunburst(
-        (
-            df.filter(filter_queries)
-            .group_by("contentTypePred", "daytime", "channelTitle")
-            .count()
-            .filter(pl.col("count").gt(20 if not sl_month else 1))
-        ),
+        res["contentTypeChannel"],
         path=["contentTypePred", "channelTitle", "daytime"],
         values="count",
         title="User's watching behavior during contentTypePred",
@@ -219,15 +250,16 @@ if sl_analysis == _options[1]:
 # --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- #
 @st.cache_resource
 def generate_cloud():
-    title = df.filter(
-        pl.col("isShorts").eq(False),
-    )
     text: str = (
-        title["title"]
-        .str.replace_all(r"\b\w{1,3}\b", " ")
-        .str.replace_all(r"\s+", " ")
-        .implode()
-        .list.join(" ")
+        lf.filter(pl.col("isShorts").eq(False))
+        .select(
+            pl.col("title")
+            .str.replace_all(r"\b\w{1,3}\b", " ")
+            .str.replace_all(r"\s+", " ")
+            .implode()
+            .list.join(" ")
+        )
+        .collect()
         .item()
     )
     cloud = WordCloud(width=800, height=800, stopwords=STOPWORDS).generate(text)
@@ -251,11 +283,14 @@ if sl_analysis == _options[2]:
 
     # WordCloud of titleTags
     tags_text = " ".join(
-        df["titleTags"]
-        .explode()
-        .drop_nulls()
-        .str.strip_prefix("#")
-        .str.to_lowercase()
+        lf.select(
+            pl.col("titleTags")
+            .explode()
+            .drop_nulls()
+            .str.strip_prefix("#")
+            .str.to_lowercase()
+        )
+        .collect()["titleTags"]
         .to_list()
     )
     cloud = WordCloud(height=800, width=800).generate(tags_text)
@@ -275,9 +310,21 @@ if sl_analysis == _options[2]:
 # --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- #
 if sl_analysis == _options[3]:
     l, r = st.columns(2)
+    res = queries.collect_all(
+        {
+            "contentType": cube.rollup(history_cube, "contentTypePred").sort(
+                "count", descending=True
+            ),
+            "contentTypeChannel": cube.rollup(
+                history_cube.drop_nulls("channelTitle"),
+                "contentTypePred",
+                "channelTitle",
+            ).filter(pl.col("count") > 30),
+        }
+    )
 
     fig = px.pie(
-        df["contentTypePred"].value_counts(sort=True),
+        res["contentType"],
         "contentTypePred",
         "count",
         title="Different ContentType Consumption",
@@ -292,10 +339,7 @@ if sl_analysis == _options[3]:
         )
 
     fig = px.sunburst(
-        df.drop_nulls("channelTitle")
-        .group_by("contentTypePred", "channelTitle")
-        .count()
-        .filter(pl.col("count") > 30),
+        res["contentTypeChannel"],
         path=["contentTypePred", "channelTitle"],
         values="count",
         title="Consumption of Content Type with Channel",
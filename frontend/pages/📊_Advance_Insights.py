@@ -2,9 +2,9 @@
 ##### 🤔 How do our app fetch data and show `📊 Advance Insights` on this page at the same time?
   - Filter out the videoIds from the dataset with the constraints.
   - Exclude the videoIds which are already present the database.
-  - Fetch video details from YouTube API using the videoIds which are not available in database.
-  - Push those video details into database.
-  - Push the Channel's videoIds data into database.
+  - Backend fetches video details from YouTube API using the videoIds which are not
+    available in database, and pushes them (and the Channel's videoIds) into database
+    while streaming the progress back.
   - Finally, fetch all the videos details using `total_ids` from database and store
     them into a JSON file.
 ###### 🤩 Now, show the Advance Insights by merging both datasets.
@@ -13,18 +13,19 @@
 from __future__ import annotations
 
 import json
-from io import BytesIO
 from typing import Any, NoReturn
 
 import httpx
-import numpy as np
 import polars as pl
 import streamlit as st
 from plotly import express as px
 
+import cube
+import queries
 import st_utils
-from configs import API_HOST_URL, VIDEO_DETAILS_JSON_PATH, YT_API_KEY
-from youtube import VideoDetails
+import storage
+import transport
+from configs import API_HOST_URL, YT_API_KEY
 
 st.set_page_config("Advance Insights", "😃", "wide", "expanded")
 DETAILS_ABOUT_PAGE = """
@@ -39,9 +40,8 @@ There are **no YouTube shorts video** data being fetched by the API.
 > 👀 Also, Keep in mind that we manage a database of videos details and we filter out those
 videoIds which are already available in our database.
 """
-
-# User history dataframe
-df = st_utils.get_ingested_yt_history_df()
+# Session state of the fetch which can be resumed (when API key's quota exhausted)
+RESUME_STORE_KEY = "resumeStore"
 
 
 # --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- #
@@ -78,25 +78,78 @@ def __request(
     if r.status_code == 204:
         return None
     elif r.is_success:
-        return r.json()
+        return transport.read_frame(r) if transport.is_arrow_response(r) else r.json()
     set_status_as_error(r)
 
 
+def __stream_store_video_details(
+    client: httpx.Client,
+    ids: list[str],
+    api_key: str,
+    pbar: Any,
+    resume_token: str | None = None,
+) -> dict[str, Any]:
+    """
+    Returns the last progress streamed by the backend. With `resume_token`, backend
+    fetches the ids which were pending (instead of `ids`).
+    """
+    progress = {}
+    try:
+        with client.stream(
+            "POST",
+            "/yt/video/store",
+            json=ids,
+            params={"resume_token": resume_token} if resume_token else None,
+            headers={"YT-API-KEY": api_key},
+            timeout=None,
+        ) as r:
+            if not r.is_success:
+                r.read()
+                set_status_as_error(r)
+            for line in r.iter_lines():
+                progress = json.loads(line)
+                if "error" in progress:
+                    status.write(progress["error"])
+                    status.update(
+                        label="ERROR OCCURRED!", expanded=False, state="error"
+                    )
+                    st.stop()
+                pbar.progress(
+                    progress["processed"] / max(progress["total"], 1),
+                    ":blue[Fetching videos details using YouTube API and storing "
+                    f"them into database ({progress['processed']}/"
+                    f"{progress['total']}).]",
+                )
+    except httpx.ConnectError:
+        status.write("**:red[Check your network and make sure the API is running.]**")
+        status.update(
+            label="Connection establishment failed.", expanded=False, state="error"
+        )
+        st.stop()
+    return progress
+
+
 def __finally_get_video_details(client: httpx.Client, ids: list[str]) -> None:
     status.write(":green[Finally fetching all videos details.]")
-    video_details = __request(client, method="POST", url="/db/yt/video/", json=ids)
-    if not video_details:
+    video_details = __request(
+        client,
+        method="POST",
+        url="/db/yt/video/",
+        json=ids,
+        headers=transport.ACCEPT_ARROW_HEADERS,
+    )
+    if video_details is None or video_details.is_empty():
         status.write("❌ **:red[No video details found in database (in the end).]**")
         status.update(label="No video details found.", expanded=True, state="error")
         st.stop()
-    with VIDEO_DETAILS_JSON_PATH.open("w") as f:
-        json.dump(video_details, f)
+    storage.write_video_details(video_details)
+    cube.materialize_video_details_cube()
 
 
 # --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- #
 # When videos details not available in local.
 # --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- #
-if not VIDEO_DETAILS_JSON_PATH.exists():
+if not storage.video_details_exists():
     with st.expander("🤔 Details About Page"):
         st.write(__doc__)
         st.divider()
@@ -115,23 +168,30 @@ if not VIDEO_DETAILS_JSON_PATH.exists():
         if not st.form_submit_button(use_container_width=True):
             st.stop()
 
+    # User history dataframe
+    df = st_utils.get_ingested_yt_history_df()
     total_ids = st_utils.get_frequent_ids(df, last_n_days=int(last_n_days))
     total_ids_count = len(total_ids)  # Store count of total ids
     status = st.status("Fetching Data using API key...", expanded=True)
     client = httpx.Client(base_url=API_HOST_URL, timeout=10)
 
     # excludeVideoIds which are present in database
-    data_for_request = BytesIO()
-    df.filter(pl.col("videoId").is_in(total_ids)).write_json(
-        data_for_request, row_oriented=True
+    data_for_request = transport.to_arrow_stream(
+        df.filter(pl.col("videoId").is_in(total_ids)).select(
+            "channelId", "channelTitle", "videoId"
+        )
     )
-    data_for_request.seek(0)
     filtered_ids = __request(
         client,
         method="POST",
         url="/db/yt/channel/video/excludeExistingIds/frame",
-        files={"data": data_for_request},
+        files={
+            "data": ("data.arrow", data_for_request, transport.ARROW_STREAM_MEDIA_TYPE)
+        },
+        headers=transport.ACCEPT_ARROW_HEADERS,
     )
+    if filtered_ids is not None:
+        filtered_ids = filtered_ids["videoId"].to_list()
 
     # When all ids present in database
     if not filtered_ids:
@@ -139,56 +199,31 @@ if not VIDEO_DETAILS_JSON_PATH.exists():
         __finally_get_video_details(client, total_ids)
         st.rerun()
 
-    # Fetch videos details using ids (which are not present in database)
+    # Fetch videos details using ids (which are not present in database), backend
+    # stores them (and channel's videoIds) into database and streams the progress.
     status.write(f"Fetching {len(filtered_ids)} video details from API.")
-    videos_details = []
-    __nums = np.linspace(0, 1, (len(filtered_ids) // 400) + 1)
     __pbar = status.empty()
-    for i, batch in enumerate(st_utils.batch_iter(filtered_ids, 400)):
-        __pbar.progress(
-            __nums[i], ":blue[Fecting videos details using YouTube API in batches.]"
-        )
-        v = __request(
-            client,
-            method="POST",
-            url="/yt/video/?n=400",
-            json=batch,
-            headers={"YT-API-KEY": api_key},
-        )
-        if v:
-            videos_details.extend(v)
-    else:
-        __pbar.empty()
+    progress = __stream_store_video_details(client, filtered_ids, api_key, __pbar)
+    __pbar.empty()
 
     # When no videos details returned by youtube's api
-    if not videos_details:
+    if not progress["fetched"]:
         status.write(":red[No video details returned from YouTube API.]")
         __finally_get_video_details(client, total_ids)
         st.rerun()
-    status.write(f"Fetched {len(videos_details)} video details from API.")
-
-    # Store videos data into database
-    status.write(":orange[Preparing to store fetched data into database.]")
-    status.write(":green[Connecting to database...]")
-    __nums = np.linspace(0, 1, (len(videos_details) // 200) + 1)
-    __pbar = status.empty()
-    for i, batch in enumerate(st_utils.batch_iter(videos_details, 200)):
-        __pbar.progress(
-            __nums[i], ":blue[Storing details in a batch of 200 into database.]"
-        )
-        __request(client, method="PUT", url="/db/yt/video/", json=batch)
-    else:
-        __pbar.empty()
-    status.write(":blue[All Details stored in database.]")
-
-    # Store channel videos data into database
-    __request(
-        client,
-        method="PUT",
-        url="/db/yt/channel/video/usingVideosDetails",
-        json=videos_details,
+    status.write(
+        f"Fetched and stored {progress['fetched']} video details into database."
     )
-    status.write("Channel videos data stored in database.")
+    if progress["pending"]:
+        status.write(
+            f":orange[API key's quota exhausted, {progress['pending']} videos "
+            "details are not fetched. Resume fetching them later.]"
+        )
+        st.session_state[RESUME_STORE_KEY] = {
+            "resumeToken": progress["resumeToken"],
+            "pending": progress["pending"],
+            "ids": total_ids,
+        }
 
     # Finally fetch videos details from database
     __finally_get_video_details(client, total_ids)
@@ -212,7 +247,40 @@ if not VIDEO_DETAILS_JSON_PATH.exists():
 # Button to delete all the user's data
 st_utils.delete_user_data_button()
 
-mdf = VideoDetails().initiate()
+# Resume fetching videos details which were pending when API key's quota exhausted
+if resume_store := st.session_state.get(RESUME_STORE_KEY):
+    with st.form("resume-store"):
+        st.warning(
+            f"**{resume_store['pending']}** videos details are not fetched because "
+            "API key's quota exhausted. Resume with another API key (or the same "
+            "one after its quota resets)."
+        )
+        api_key = st.text_input(
+            "Enter YouTube API Key",
+            YT_API_KEY if YT_API_KEY else "",
+            type="password",
+            placeholder="YouTube Data API Key",
+        )
+        resume = st.form_submit_button("Resume", use_container_width=True)
+    if resume:
+        status = st.status("Resuming fetch using API key...", expanded=True)
+        client = httpx.Client(base_url=API_HOST_URL, timeout=10)
+        __pbar = status.empty()
+        progress = __stream_store_video_details(
+            client, [], api_key, __pbar, resume_store["resumeToken"]
+        )
+        __pbar.empty()
+        if progress["pending"]:
+            resume_store.update(
+                resumeToken=progress["resumeToken"], pending=progress["pending"]
+            )
+        else:
+            del st.session_state[RESUME_STORE_KEY]
+        __finally_get_video_details(client, resume_store["ids"])
+        client.close()
+        st.rerun()
+
+details_cube = cube.scan_video_details_cube()
 
 _options = (
     "Basic Insights",
@@ -222,19 +290,23 @@ _options = (
 sl_analysis = st.selectbox("Select Analysis", options=_options)
 sl_year = st.selectbox(
     "Select Year",
-    [None, *mdf["year"].unique().sort(descending=True).to_list()],
+    [None, *queries.unique_years(details_cube, descending=True)],
 )
 l, r = st.columns(2)
 
-# Filtered DataFrame
-mdf = mdf.filter(pl.col("year") == sl_year) if sl_year else mdf
+# Filtered cube, charts are answered by rolling it up
+details_cube = queries.filter_by_time(details_cube, year=sl_year)
 
 # --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- #
 # Basic Analysis
 # --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- #
 if sl_analysis == _options[0]:
+    res = queries.collect_all(
+        {"categoryChannel": cube.rollup(details_cube, "channelTitle", "categoryName")}
+    )
+
     fig = px.sunburst(
-        mdf.group_by(["channelTitle", "categoryName"]).count(),
+        res["categoryChannel"],
         path=["categoryName", "channelTitle"],
         values="count",
         title="Video Distribution by Category and Channel",
@@ -245,8 +317,15 @@ if sl_analysis == _options[0]:
 # Watchtime Behavior
 # --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- #
 if sl_analysis == _options[1]:
+    res = queries.collect_all(
+        {
+            "daytimeCategory": cube.rollup(details_cube, "daytime", "categoryName"),
+            "monthCategory": cube.rollup(details_cube, "month", "categoryName"),
+        }
+    )
+
     fig = px.sunburst(
-        mdf.group_by(["daytime", "categoryName"]).count(),
+        res["daytimeCategory"],
         path=["daytime", "categoryName"],
         values="count",
         title="User's watching behavior during daytime",
@@ -254,7 +333,7 @@ if sl_analysis == _options[1]:
     l.plotly_chart(fig, True)
 
     fig = px.sunburst(
-        mdf.group_by(["month", "categoryName"]).count(),
+        res["monthCategory"],
         path=["month", "categoryName"],
         values="count",
         title="Watching patterns for months.",
@@ -265,10 +344,29 @@ if sl_analysis == _options[1]:
 # Videos Duration Behavior
 # --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- #
 if sl_analysis == _options[2]:
+    category_channel = cube.rollup(details_cube, "categoryName", "channelTitle")
+    res = queries.collect_all(
+        {
+            "shorts": details_cube.select(
+                pl.col("isShorts").sum().alias("Shorts Video"),
+                (pl.col("count").sum() - pl.col("isShorts").sum()).alias("Long Videos"),
+            ).melt(variable_name="isShorts", value_name="count"),
+            "durationMean": category_channel.select(
+                "categoryName",
+                "channelTitle",
+                pl.when(pl.col("durationCount") > 0)
+                .then(pl.col("durationSum") / pl.col("durationCount"))
+                .cast(int)
+                .alias("durationMean"),
+            ),
+            "shortsCount": category_channel.select(
+                "categoryName", "channelTitle", "isShorts"
+            ),
+        }
+    )
+
     fig = px.pie(
-        mdf["isShorts"]
-        .map_elements(lambda x: "Shorts Video" if x else "Long Videos")
-        .value_counts(),
+        res["shorts"],
         names="isShorts",
         values="count",
         title="Ratio between Shorts and Long Form Video",
@@ -276,9 +374,7 @@ if sl_analysis == _options[2]:
     l.plotly_chart(fig, True)
 
     fig = px.sunburst(
-        mdf.group_by("categoryName", "channelTitle").agg(
-            pl.col("durationInSec").mean().cast(int).alias("durationMean"),
-        ),
+        res["durationMean"],
         path=["categoryName", "channelTitle"],
         values="durationMean",
         title="Average Video Duration by Category and Channel",
@@ -286,9 +382,7 @@ if sl_analysis == _options[2]:
     r.plotly_chart(fig, True)
 
     fig = px.sunburst(
-        mdf.group_by("categoryName", "channelTitle").agg(
-            pl.col("isShorts").sum(),
-        ),
+        res["shortsCount"],
         path=["categoryName", "channelTitle"],
         values="isShorts",
         title="Distribution of Shorts by Channels",
@@ -7,7 +7,7 @@ import polars as pl
 import streamlit as st
 
 import st_utils
-from configs import INGESTED_YT_HISTORY_DATA_PATH, VIDEO_DETAILS_JSON_PATH
+import storage
 from youtube.channel_reco import (
     RecommendChannels,
     add_subscribed_column,
@@ -18,13 +18,13 @@ st.set_page_config("Recommend Channel", "😃", "wide", "expanded")
 st_msg = st.container()
 st_utils.delete_user_data_button()
 
-if not INGESTED_YT_HISTORY_DATA_PATH.exists():
+if not storage.ingested_history_exists():
     st.switch_page("/pages/🐻‍❄️_YT_History_Basic.py")
-if not VIDEO_DETAILS_JSON_PATH.exists():
+if not storage.video_details_exists():
     st_msg.error("First collect data of YouTube Videos.", icon="🤖")
     st.stop()
 ingested_data = st_utils.get_ingested_yt_history_df()
-video_details_data = pl.read_json(VIDEO_DETAILS_JSON_PATH)
+video_details_data = storage.read_video_details()
 
 try:
     check_if_subscribed_column_exists(ingested_data)
@@ -36,8 +36,8 @@ except ValueError:
     if uploaded_file is None:
         st.stop()
     # Update the ingested_data and write into file
-    add_subscribed_column(ingested_data, pl.read_csv(uploaded_file)).write_json(
-        INGESTED_YT_HISTORY_DATA_PATH
+    storage.write_ingested_history(
+        add_subscribed_column(ingested_data, pl.read_csv(uploaded_file))
     )
     st.rerun()
 
@@ -0,0 +1,58 @@
+"""
+Lazy queries over the user's data for the insight pages.
+
+Data is scanned from the Parquet files, so projections and `year`/`month`
+predicates are pushed down to the scan. Pages build every chart aggregation as a
+`pl.LazyFrame` and collect all of them at once with `collect_all`, which lets polars
+share common sub-plans (like the scan itself) between them.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import polars as pl
+
+import storage
+from youtube import VideoDetails
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+
+def scan_history() -> pl.LazyFrame:
+    """Scan ingested history data."""
+    return storage.scan_ingested_history()
+
+
+def scan_history_with_details() -> pl.LazyFrame:
+    """Scan ingested history data joined with the videos details."""
+    return VideoDetails().lazy()
+
+
+def filter_by_time(
+    lf: pl.LazyFrame,
+    *,
+    year: int | None = None,
+    month: int | None = None,
+) -> pl.LazyFrame:
+    """Filter using the pre-computed `year` and `month` columns (if provided)."""
+    predicates = []
+    if year:
+        predicates.append(pl.col("year").eq(year))
+    if month:
+        predicates.append(pl.col("month").eq(month))
+    return lf.filter(predicates) if predicates else lf
+
+
+def unique_years(lf: pl.LazyFrame, *, descending: bool = False) -> list[int]:
+    return (
+        lf.select(pl.col("year").unique().sort(descending=descending))
+        .collect()["year"]
+        .to_list()
+    )
+
+
+def collect_all(plans: Mapping[str, pl.LazyFrame]) -> dict[str, pl.DataFrame]:
+    """Collect all the named query plans in one go."""
+    return dict(zip(plans, pl.collect_all(list(plans.values()))))
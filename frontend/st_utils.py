@@ -7,7 +7,7 @@ from typing import Iterable, Iterator, Literal
 import polars as pl
 import streamlit as st
 
-from configs import INGESTED_YT_HISTORY_DATA_PATH, VIDEO_DETAILS_JSON_PATH
+import storage
 from youtube import IngestYtHistory
 
 UPLOAD_DATASET_URL = "/YT_History_Basic"
@@ -17,7 +17,7 @@ _TimeFreqStr = Literal["weekday", "hour", "month", "year"]
 
 @st.cache_resource
 def get_ingested_yt_history_df() -> pl.DataFrame:
-    if INGESTED_YT_HISTORY_DATA_PATH.exists():
+    if storage.ingested_history_exists():
         return IngestYtHistory.from_ingested_data()
     else:
         st.error("Upload dataset first.", icon="✋")
@@ -55,11 +55,7 @@ def get_frequent_ids(df: pl.DataFrame, *, last_n_days: int) -> list[str]:
 
 def delete_user_data_button():
     if st.sidebar.button("🗂️ Delete User Data", use_container_width=True):
-        all_user_data_paths = (
-            INGESTED_YT_HISTORY_DATA_PATH,
-            VIDEO_DETAILS_JSON_PATH,
-        )
-        [i.unlink() for i in all_user_data_paths if i.exists()]
+        storage.delete_user_data()
 
         # Clear streamlit's caches
         st.cache_resource.clear()
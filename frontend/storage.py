@@ -0,0 +1,229 @@
+"""
+Storage layer for the user's data.
+
+Ingested history and videos details are persisted as typed, compressed Parquet
+files, so that nested (list/struct) columns and datetimes are kept as they are and
+need not to be re-parsed on every load. Older JSON files are migrated automatically.
+"""
+
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+from typing import TYPE_CHECKING, Self
+
+import polars as pl
+
+from configs import (
+    HISTORY_CUBE_DATA_PATH,
+    INGESTED_YT_HISTORY_DATA_PATH,
+    LEGACY_INGESTED_YT_HISTORY_JSON_PATH,
+    LEGACY_VIDEO_DETAILS_JSON_PATH,
+    RAW_YT_HISTORY_DATA_PATH,
+    VIDEO_DETAILS_CUBE_DATA_PATH,
+    VIDEO_DETAILS_DATA_PATH,
+)
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+PARQUET_COMPRESSION = "zstd"
+# Small row groups with statistics let scans skip row groups using predicates
+# (e.g. on `year` or `month`) instead of reading the whole file.
+PARQUET_ROW_GROUP_SIZE = 50_000
+
+
+def read_json_records(path: str | Path) -> pl.DataFrame:
+    """Read a row-oriented JSON or a newline-delimited JSON file as DataFrame."""
+    with Path(path).open(encoding="utf-8") as f:
+        first_char = f.read(64).lstrip()[:1]
+    if first_char == "[":
+        return pl.read_json(path)
+    return pl.read_ndjson(path)
+
+
+def _str_to_datetime(df: pl.DataFrame, column: str) -> pl.DataFrame:
+    if column in df.columns and df.schema[column] == pl.Utf8:
+        df = df.with_columns(pl.col(column).str.to_datetime())
+    return df
+
+
+def _write_parquet(df: pl.DataFrame, path: Path) -> None:
+    """Write atomically, so that a failed write never leaves a corrupt file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    df.write_parquet(
+        tmp_path,
+        compression=PARQUET_COMPRESSION,
+        statistics=True,
+        row_group_size=PARQUET_ROW_GROUP_SIZE,
+    )
+    tmp_path.replace(path)
+
+
+def _invalidate(*paths: Path) -> None:
+    """Delete data derived from the data which is being re-written."""
+    [i.unlink() for i in paths if i.exists()]
+
+
+def migrate_legacy_json() -> None:
+    """Convert JSON files written by older versions of the app into Parquet."""
+    if LEGACY_INGESTED_YT_HISTORY_JSON_PATH.exists():
+        df = read_json_records(LEGACY_INGESTED_YT_HISTORY_JSON_PATH)
+        write_ingested_history(df)
+        LEGACY_INGESTED_YT_HISTORY_JSON_PATH.unlink()
+    if LEGACY_VIDEO_DETAILS_JSON_PATH.exists():
+        df = pl.read_json(LEGACY_VIDEO_DETAILS_JSON_PATH)
+        write_video_details(df)
+        LEGACY_VIDEO_DETAILS_JSON_PATH.unlink()
+
+
+# --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- #
+# Ingested YouTube History
+# --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- #
+def ingested_history_exists() -> bool:
+    migrate_legacy_json()
+    return INGESTED_YT_HISTORY_DATA_PATH.exists()
+
+
+def read_ingested_history() -> pl.DataFrame:
+    migrate_legacy_json()
+    return pl.read_parquet(INGESTED_YT_HISTORY_DATA_PATH)
+
+
+def scan_ingested_history() -> pl.LazyFrame:
+    migrate_legacy_json()
+    return pl.scan_parquet(INGESTED_YT_HISTORY_DATA_PATH)
+
+
+def write_ingested_history(df: pl.DataFrame) -> None:
+    _write_parquet(_str_to_datetime(df, "time"), INGESTED_YT_HISTORY_DATA_PATH)
+    _invalidate(HISTORY_CUBE_DATA_PATH, VIDEO_DETAILS_CUBE_DATA_PATH)
+
+
+class IngestedHistoryWriter:
+    """
+    Write the ingested history chunk by chunk. Chunks are stored as separate
+    Parquet parts and compacted into a single file (with streaming engine) when the
+    context exits without any error.
+
+    ```python
+    with IngestedHistoryWriter() as writer:
+        for chunk in IngestYtHistory(path).iter_initiate():
+            writer.write(chunk)
+    ```
+    """
+
+    def __init__(self, path: Path = INGESTED_YT_HISTORY_DATA_PATH) -> None:
+        self.path = path
+        self.parts_dir = path.with_suffix(".parts")
+        self.n_parts = 0
+
+    def __enter__(self) -> Self:
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+        self.parts_dir.mkdir(parents=True)
+        return self
+
+    def write(self, df: pl.DataFrame) -> None:
+        df.write_parquet(
+            self.parts_dir / f"part-{self.n_parts:05d}.parquet",
+            compression=PARQUET_COMPRESSION,
+        )
+        self.n_parts += 1
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        try:
+            if exc_type is None and self.n_parts:
+                tmp_path = self.path.with_suffix(".tmp")
+                pl.scan_parquet(self.parts_dir / "*.parquet").sink_parquet(
+                    tmp_path,
+                    compression=PARQUET_COMPRESSION,
+                    statistics=True,
+                    row_group_size=PARQUET_ROW_GROUP_SIZE,
+                )
+                tmp_path.replace(self.path)
+                _invalidate(HISTORY_CUBE_DATA_PATH, VIDEO_DETAILS_CUBE_DATA_PATH)
+        finally:
+            shutil.rmtree(self.parts_dir, ignore_errors=True)
+
+
+# --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- #
+# Videos Details
+# --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- #
+def _invalidate_stale_video_details() -> None:
+    """
+    Delete details stored by older versions (without `durationInSec`), so that they
+    are fetched again from backend which sends `durationInSec` with them.
+    """
+    if (
+        VIDEO_DETAILS_DATA_PATH.exists()
+        and "durationInSec" not in pl.read_parquet_schema(VIDEO_DETAILS_DATA_PATH)
+    ):
+        _invalidate(VIDEO_DETAILS_DATA_PATH, VIDEO_DETAILS_CUBE_DATA_PATH)
+
+
+def video_details_exists() -> bool:
+    migrate_legacy_json()
+    _invalidate_stale_video_details()
+    return VIDEO_DETAILS_DATA_PATH.exists()
+
+
+def read_video_details() -> pl.DataFrame:
+    migrate_legacy_json()
+    return pl.read_parquet(VIDEO_DETAILS_DATA_PATH)
+
+
+def scan_video_details() -> pl.LazyFrame:
+    migrate_legacy_json()
+    return pl.scan_parquet(VIDEO_DETAILS_DATA_PATH)
+
+
+def write_video_details(data: pl.DataFrame | list[dict]) -> None:
+    df = data if isinstance(data, pl.DataFrame) else pl.DataFrame(data)
+    _write_parquet(_str_to_datetime(df, "publishedAt"), VIDEO_DETAILS_DATA_PATH)
+    _invalidate(VIDEO_DETAILS_CUBE_DATA_PATH)
+
+
+# --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- #
+# Aggregate Cubes (see `cube` module)
+# --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- --- #
+def history_cube_exists() -> bool:
+    return HISTORY_CUBE_DATA_PATH.exists()
+
+
+def scan_history_cube() -> pl.LazyFrame:
+    return pl.scan_parquet(HISTORY_CUBE_DATA_PATH)
+
+
+def write_history_cube(df: pl.DataFrame) -> None:
+    _write_parquet(df, HISTORY_CUBE_DATA_PATH)
+
+
+def video_details_cube_exists() -> bool:
+    return VIDEO_DETAILS_CUBE_DATA_PATH.exists()
+
+
+def scan_video_details_cube() -> pl.LazyFrame:
+    return pl.scan_parquet(VIDEO_DETAILS_CUBE_DATA_PATH)
+
+
+def write_video_details_cube(df: pl.DataFrame) -> None:
+    _write_parquet(df, VIDEO_DETAILS_CUBE_DATA_PATH)
+
+
+def delete_user_data() -> None:
+    all_user_data_paths = (
+        RAW_YT_HISTORY_DATA_PATH,
+        INGESTED_YT_HISTORY_DATA_PATH,
+        LEGACY_INGESTED_YT_HISTORY_JSON_PATH,
+        VIDEO_DETAILS_DATA_PATH,
+        LEGACY_VIDEO_DETAILS_JSON_PATH,
+        HISTORY_CUBE_DATA_PATH,
+        VIDEO_DETAILS_CUBE_DATA_PATH,
+    )
+    _invalidate(*all_user_data_paths)
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+import storage
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+_DATA_PATHS = (
+    "HISTORY_CUBE_DATA_PATH",
+    "INGESTED_YT_HISTORY_DATA_PATH",
+    "LEGACY_INGESTED_YT_HISTORY_JSON_PATH",
+    "LEGACY_VIDEO_DETAILS_JSON_PATH",
+    "RAW_YT_HISTORY_DATA_PATH",
+    "VIDEO_DETAILS_CUBE_DATA_PATH",
+    "VIDEO_DETAILS_DATA_PATH",
+)
+
+
+@pytest.fixture()
+def data_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Point all the data paths of `storage` into a temporary directory."""
+    for name in _DATA_PATHS:
+        path = getattr(storage, name)
+        monkeypatch.setattr(storage, name, tmp_path / path.name)
+    return tmp_path
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+import polars as pl
+
+import cube
+
+TIMES = [
+    datetime(2023, 1, 1, 10),
+    datetime(2023, 1, 1, 10, 30),
+    datetime(2023, 1, 8, 10),
+    datetime(2023, 2, 1, 20),
+]
+
+
+def _history() -> pl.LazyFrame:
+    times = pl.Series("time", TIMES)
+    return pl.LazyFrame(
+        {
+            "time": times,
+            "year": times.dt.year(),
+            "month": times.dt.month(),
+            "weekday": times.dt.weekday(),
+            "hour": times.dt.hour(),
+            "daytime": ["Morning", "Morning", "Morning", "Night"],
+            "contentTypePred": ["Music", "Music", "Music", "Tech"],
+            "channelTitle": ["A", "A", "A", "B"],
+            "isShorts": [True, False, False, True],
+            "fromWebAppActivity": [True] * 4,
+        }
+    )
+
+
+def test_cube_has_time_range_and_no_of_days():
+    history_cube = cube.build_cube(_history(), cube.HISTORY_CUBE_DIMENSIONS)
+    time_range = history_cube.select(
+        pl.col("date").min().alias("min"),
+        pl.col("date").max().alias("max"),
+        pl.col("date").n_unique().alias("nDays"),
+    ).collect()
+    assert time_range.row(0) == (date(2023, 1, 1), date(2023, 2, 1), 3)
+
+
+def test_rollup_sums_measures():
+    history_cube = cube.build_cube(_history(), cube.HISTORY_CUBE_DIMENSIONS)
+    df = cube.rollup(history_cube, "channelTitle").sort("channelTitle").collect()
+    assert df.columns == ["channelTitle", "count", "isShorts", "fromWebAppActivity"]
+    assert df.rows() == [("A", 3, 1, 3), ("B", 1, 1, 1)]
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from youtube import IngestYtHistory
+from youtube._utils import iter_batches, iter_json_array
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _record(i: int) -> dict:
+    record = {
+        "header": "YouTube",
+        "title": f"Watched Video {i} #shorts 😀" if i % 3 else f"Watched Video {i}",
+        "titleUrl": f"https://www.youtube.com/watch?v=video{i:05d}",
+        "subtitles": [
+            {
+                "name": f"Channel {i % 7}",
+                "url": f"https://www.youtube.com/channel/UC{i % 7:05d}",
+            }
+        ],
+        "time": f"2023-{i % 12 + 1:02d}-01T{i % 24:02d}:00:00.000Z",
+        "products": ["YouTube"],
+        "activityControls": ["YouTube watch history"],
+    }
+    if i % 5 == 0:
+        record["details"] = [{"name": "From Google Ads"}]
+    if i % 11 == 0:  # Video removed from YouTube
+        del record["subtitles"]
+    return record
+
+
+@pytest.fixture()
+def takeout_path(tmp_path: Path) -> Path:
+    path = tmp_path / "watch-history.json"
+    path.write_text(json.dumps([_record(i) for i in range(250)], indent=2))
+    return path
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 64, 1 << 20])
+def test_iter_json_array_yields_all_items(takeout_path: Path, block_size: int):
+    items = list(iter_json_array(takeout_path, block_size=block_size))
+    assert items == json.loads(takeout_path.read_text())
+
+
+@pytest.mark.parametrize("content", ["[]", "  [ ]  ", "[\n]\n"])
+def test_iter_json_array_empty(tmp_path: Path, content: str):
+    path = tmp_path / "empty.json"
+    path.write_text(content)
+    assert list(iter_json_array(path)) == []
+
+
+def test_iter_json_array_not_an_array(tmp_path: Path):
+    path = tmp_path / "object.json"
+    path.write_text('{"a": 1}')
+    with pytest.raises(ValueError, match="does not contain a JSON array"):
+        list(iter_json_array(path))
+
+
+def test_iter_json_array_truncated(tmp_path: Path):
+    path = tmp_path / "truncated.json"
+    path.write_text('[{"a": 1}, {"b": ')
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(path, block_size=4))
+
+
+def test_iter_batches():
+    assert list(iter_batches(iter(range(5)), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(iter_batches([], 2)) == []
+
+
+@pytest.mark.parametrize("chunk_size", [1, 40, 10_000])
+def test_iter_initiate_equals_initiate(takeout_path: Path, chunk_size: int):
+    ingest = IngestYtHistory(str(takeout_path))
+    progress = []
+    with pl.StringCache():  # Compare categorical `daytime` column of chunks
+        expected = ingest.initiate()
+        chunks = list(
+            ingest.iter_initiate(
+                chunk_size, on_progress=lambda n, _: progress.append(n)
+            )
+        )
+
+        assert_frame_equal(pl.concat(chunks), expected, check_column_order=False)
+
+    assert all(len(i) <= chunk_size for i in chunks)
+    assert progress[-1] == 250
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import polars as pl
+import pytest
+
+import storage
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+HISTORY = [
+    {
+        "title": "Video 1",
+        "videoId": "video1",
+        "channelId": "UC1",
+        "time": "2023-01-01T10:00:00.000Z",
+        "titleTags": ["#shorts"],
+    },
+    {
+        "title": "Video 2",
+        "videoId": "video2",
+        "channelId": "UC2",
+        "time": "2023-02-01T20:30:00.000Z",
+        "titleTags": [],
+    },
+]
+VIDEO_DETAILS = [
+    {
+        "id": "video1",
+        "duration": "PT1M",
+        "durationInSec": 60,
+        "publishedAt": "2022-12-31T00:00:00Z",
+        "tags": ["a", "b"],
+    },
+]
+
+
+@pytest.mark.parametrize("ndjson", [False, True])
+def test_migrate_legacy_ingested_history(data_dir: Path, ndjson: bool):
+    legacy_path = storage.LEGACY_INGESTED_YT_HISTORY_JSON_PATH
+    if ndjson:
+        legacy_path.write_text("\n".join(json.dumps(i) for i in HISTORY))
+    else:
+        legacy_path.write_text(json.dumps(HISTORY))
+
+    storage.migrate_legacy_json()
+
+    assert not legacy_path.exists()
+    df = storage.read_ingested_history()
+    assert df["videoId"].to_list() == ["video1", "video2"]
+    assert df["time"].dtype == pl.Datetime
+    assert df["time"][0] == datetime.fromisoformat("2023-01-01T10:00:00+00:00")
+    assert df["titleTags"].to_list() == [["#shorts"], []]
+
+
+def test_migrate_legacy_video_details(data_dir: Path):
+    legacy_path = storage.LEGACY_VIDEO_DETAILS_JSON_PATH
+    legacy_path.write_text(json.dumps(VIDEO_DETAILS))
+
+    storage.migrate_legacy_json()
+
+    assert not legacy_path.exists()
+    df = storage.read_video_details()
+    assert df["publishedAt"].dtype == pl.Datetime
+    assert df["tags"].to_list() == [["a", "b"]]
+
+
+def test_migrate_legacy_json_without_legacy_files(data_dir: Path):
+    storage.migrate_legacy_json()
+    assert list(data_dir.iterdir()) == []
+    assert not storage.ingested_history_exists()
+    assert not storage.video_details_exists()
+
+
+def test_migrate_legacy_json_keeps_parquet(data_dir: Path):
+    storage.write_ingested_history(pl.DataFrame(HISTORY))
+    storage.migrate_legacy_json()
+    assert storage.read_ingested_history().height == len(HISTORY)
+
+
+def test_write_invalidates_cubes(data_dir: Path):
+    for path in (storage.HISTORY_CUBE_DATA_PATH, storage.VIDEO_DETAILS_CUBE_DATA_PATH):
+        path.touch()
+    storage.write_video_details(VIDEO_DETAILS)
+    assert storage.HISTORY_CUBE_DATA_PATH.exists()
+    assert not storage.VIDEO_DETAILS_CUBE_DATA_PATH.exists()
+
+    storage.write_ingested_history(pl.DataFrame(HISTORY))
+    assert not storage.HISTORY_CUBE_DATA_PATH.exists()
+
+
+def test_video_details_without_duration_in_sec_are_stale(data_dir: Path):
+    storage.write_video_details([{"id": "video1", "duration": "PT1M"}])
+    assert not storage.video_details_exists()
+    assert not storage.VIDEO_DETAILS_DATA_PATH.exists()
+
+    storage.write_video_details(VIDEO_DETAILS)
+    assert storage.video_details_exists()
+
+
+def test_ingested_history_writer(data_dir: Path):
+    history = pl.DataFrame(HISTORY)
+    chunks = [history[:1], history[1:]]
+    with storage.IngestedHistoryWriter(storage.INGESTED_YT_HISTORY_DATA_PATH) as w:
+        for chunk in chunks:
+            w.write(chunk)
+
+    assert not w.parts_dir.exists()
+    assert storage.read_ingested_history().equals(pl.concat(chunks))
+
+
+def test_ingested_history_writer_keeps_old_data_on_error(data_dir: Path):
+    storage.write_ingested_history(pl.DataFrame(HISTORY))
+    path = storage.INGESTED_YT_HISTORY_DATA_PATH
+    with pytest.raises(RuntimeError), storage.IngestedHistoryWriter(path) as w:
+        w.write(pl.DataFrame(HISTORY))
+        raise RuntimeError
+
+    assert not w.parts_dir.exists()
+    assert storage.read_ingested_history().height == len(HISTORY)
@@ -0,0 +1,41 @@
+"""
+Move tables to and from the backend as Apache Arrow IPC streams.
+
+Backend routes which take or return tables understand Arrow when it is set in the
+`Content-Type`/`Accept` headers, which is much cheaper than row-oriented JSON for
+both sides. Responses in JSON (e.g. errors) are still read as usual.
+"""
+
+from __future__ import annotations
+
+from io import BytesIO
+from typing import TYPE_CHECKING, Final
+
+import polars as pl
+
+if TYPE_CHECKING:
+    import httpx
+
+ARROW_STREAM_MEDIA_TYPE: Final = "application/vnd.apache.arrow.stream"
+ACCEPT_ARROW_HEADERS: Final = {"Accept": f"{ARROW_STREAM_MEDIA_TYPE}, application/json"}
+ARROW_HEADERS: Final = {
+    **ACCEPT_ARROW_HEADERS,
+    "Content-Type": ARROW_STREAM_MEDIA_TYPE,
+}
+
+
+def to_arrow_stream(df: pl.DataFrame) -> bytes:
+    buffer = BytesIO()
+    df.write_ipc_stream(buffer)
+    return buffer.getvalue()
+
+
+def is_arrow_response(r: httpx.Response) -> bool:
+    return r.headers.get("content-type", "").startswith(ARROW_STREAM_MEDIA_TYPE)
+
+
+def read_frame(r: httpx.Response) -> pl.DataFrame:
+    """Read response as DataFrame, either from an Arrow IPC stream or a JSON list."""
+    if is_arrow_response(r):
+        return pl.read_ipc_stream(BytesIO(r.content))
+    return pl.DataFrame(r.json())
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import json
+import re
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+_SEPARATOR_RE = re.compile(r"[\s,]*")
+
+
+def iter_json_array(
+    path: str | Path,
+    *,
+    block_size: int = 1 << 20,
+) -> Iterator[Any]:
+    """
+    Incrementally yield the items of a top level JSON array stored in a file.
+
+    Only about `block_size` characters are held in memory at a time, so the memory
+    usage does not depend on the size of the file.
+    """
+    decoder = json.JSONDecoder()
+    with Path(path).open(encoding="utf-8") as f:
+        buffer = f.read(block_size).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"{path!s} does not contain a JSON array.")
+        pos, eof = 1, False
+
+        while True:
+            pos = _SEPARATOR_RE.match(buffer, pos).end()  # type: ignore
+            if buffer.startswith("]", pos):
+                return
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                block = f.read(block_size)
+                eof = not block
+                buffer, pos = buffer[pos:] + block, 0
+                continue
+            yield item
+
+
+def iter_batches(iterable: Iterable, n: int, /) -> Iterator[list]:
+    """Batch items of any iterable (even without `len`) into lists of `n` items."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, n)):
+        yield batch
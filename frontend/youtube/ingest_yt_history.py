@@ -1,12 +1,52 @@
+from __future__ import annotations
+
+import re
+import time
+from functools import cache, cached_property
+from typing import Callable, Iterator
+
 import emoji
 import polars as pl
 
-from configs import INGESTED_YT_HISTORY_DATA_PATH
+import storage
+from configs import RAW_YT_HISTORY_DATA_PATH
+
+from ._utils import iter_batches, iter_json_array
+
+# Schema of the records of Google Takeout's `watch-history.json` file. Used while
+# streaming so that every chunk has the same columns even if some keys are absent.
+TAKEOUT_SCHEMA = {
+    "header": pl.Utf8,
+    "title": pl.Utf8,
+    "titleUrl": pl.Utf8,
+    "subtitles": pl.List(pl.Struct({"name": pl.Utf8, "url": pl.Utf8})),
+    "time": pl.Utf8,
+    "products": pl.List(pl.Utf8),
+    "activityControls": pl.List(pl.Utf8),
+    "details": pl.List(pl.Struct({"name": pl.Utf8})),
+    "description": pl.Utf8,
+}
+
+
+@cache
+def emoji_pattern() -> str:
+    """
+    Regex which matches any emoji known to `emoji` package. Built only once.
+
+    Longer emojis come first in the alternation, so that sequences (like ZWJ,
+    skin-tone and flags) are matched as a whole instead of their parts.
+    """
+    emojis = sorted(emoji.EMOJI_DATA, key=len, reverse=True)
+    return "|".join(re.escape(i) for i in emojis)
 
 
 class IngestYtHistory:
     def __init__(self, path: str | None = None) -> None:
-        self.df = pl.read_json(path if path else INGESTED_YT_HISTORY_DATA_PATH)
+        self.path = path if path else RAW_YT_HISTORY_DATA_PATH
+
+    @cached_property
+    def df(self) -> pl.DataFrame:
+        return pl.read_json(self.path)
 
     def _preprocess_data(self, df: pl.DataFrame) -> pl.DataFrame:
         df = (
@@ -61,7 +101,7 @@ class IngestYtHistory:
                 pl.col("time").str.to_datetime(),
                 pl.col("title").str.extract_all(r"#\w+").alias("titleTags"),
                 pl.col("title")
-                .map_elements(lambda x: [e["emoji"] for e in emoji.emoji_list(x)])
+                .str.extract_all(emoji_pattern())
                 .alias("titleEmojis"),  # List of emoji from title
             )
             .with_columns(
@@ -93,7 +133,7 @@ class IngestYtHistory:
             "titleUrl",
         ]
         drop_cols.append("description") if "description" in df.columns else ...
-        return df.drop(drop_cols)
+        return df.drop([i for i in drop_cols if i in df.columns])
 
     def initiate(self) -> pl.DataFrame:
         """
@@ -104,10 +144,34 @@ class IngestYtHistory:
         df = self._drop_cols(df)
         return df
 
+    def iter_initiate(
+        self,
+        chunk_size: int = 20_000,
+        *,
+        on_progress: Callable[[int, float], None] | None = None,
+    ) -> Iterator[pl.DataFrame]:
+        """
+        Streaming version of `initiate`. Parse the Takeout JSON array incrementally
+        and yield the processed data in chunks of (at most) `chunk_size` rows.
+
+        Args:
+            chunk_size (int): No. of raw records processed at a time.
+            on_progress (Callable): Called after every chunk with the no. of raw
+                records processed so far and the throughput in rows per second.
+        """
+        start, n_rows = time.perf_counter(), 0
+        for records in iter_batches(iter_json_array(self.path), chunk_size):
+            df = pl.from_dicts(records, schema=TAKEOUT_SCHEMA)
+            df = self._preprocess_data(df)
+            df = self._feature_extraction(df)
+            df = self._drop_cols(df)
+
+            n_rows += len(records)
+            if on_progress is not None:
+                on_progress(n_rows, n_rows / (time.perf_counter() - start))
+            if not df.is_empty():
+                yield df
+
     @classmethod
     def from_ingested_data(cls) -> pl.DataFrame:
-        df = pl.read_json(INGESTED_YT_HISTORY_DATA_PATH)
-        df = df.with_columns(
-            pl.col("time").str.to_datetime(),
-        )
-        return df
+        return storage.read_ingested_history()
@@ -1,9 +1,7 @@
-import re
-
 import polars as pl
 import polars.selectors as cs
 
-from configs import INGESTED_YT_HISTORY_DATA_PATH, VIDEO_DETAILS_JSON_PATH
+import storage
 
 CATEGORY_ID_MAP = {
     "1": "Film & Animation",
@@ -47,42 +45,27 @@ class VideoDetails:
         ingested_history_data_path: str | None = None,
         video_details_data_path: str | None = None,
     ) -> None:
-        ingested_hist_df = pl.read_json(
-            ingested_history_data_path
+        ingested_hist_lf = (
+            pl.scan_parquet(ingested_history_data_path)
             if ingested_history_data_path
-            else INGESTED_YT_HISTORY_DATA_PATH
+            else storage.scan_ingested_history()
         )
-        video_details_df = pl.read_json(
-            video_details_data_path
+        video_details_lf = (
+            pl.scan_parquet(video_details_data_path)
             if video_details_data_path
-            else VIDEO_DETAILS_JSON_PATH
+            else storage.scan_video_details()
         )
         category_id_df = pl.DataFrame._from_dict(CATEGORY_ID_MAP).transpose(
             include_header=True,
             header_name="categoryId",
             column_names=["categoryName"],
         )
-        self.df = ingested_hist_df.join(
-            video_details_df, left_on="videoId", right_on="id"
-        ).join(category_id_df, on="categoryId")
-
-    def __handle_duration(self, x: str):
-        total_sec = 0
-        hr = re.search(r"(\d+)H", x)  # Hours
-        total_sec += int(hr.group(1)) * 3600 if hr else 0
-        min = re.search(r"(\d+)M", x)  # Minutes
-        total_sec += int(min.group(1)) * 60 if min else 0
-        sec = re.search(r"(\d+)S", x)  # Seconds
-        total_sec += int(sec.group(1)) if sec else 0
-        return total_sec
+        self.lf = ingested_hist_lf.join(
+            video_details_lf, left_on="videoId", right_on="id"
+        ).join(category_id_df.lazy(), on="categoryId")
 
-    def _data_cleaning(self, df: pl.DataFrame) -> pl.DataFrame:
+    def _data_cleaning(self, df: pl.LazyFrame) -> pl.LazyFrame:
         df = df.with_columns(
-            pl.col("publishedAt").str.to_datetime(),
-            pl.col("duration")
-            .map_elements(self.__handle_duration, pl.Int64)
-            .alias("durationInSec"),
-            pl.col("duration").str.contains("D").alias("durationHasDay"),
             pl.col("tags")
             .is_null()
             .add(pl.col("isShorts"))
@@ -92,7 +75,7 @@ class VideoDetails:
 
         return df
 
-    def _drop_cols(self, df: pl.DataFrame) -> pl.DataFrame:
+    def _drop_cols(self, df: pl.LazyFrame) -> pl.LazyFrame:
         drop_cols = [
             "duration",
             "categoryId",
@@ -100,7 +83,11 @@ class VideoDetails:
         ]
         return df.drop(drop_cols)
 
+    def lazy(self) -> pl.LazyFrame:
+        """Build the cleaned videos details query without collecting it."""
+        lf = self._data_cleaning(self.lf)
+        lf = self._drop_cols(lf)
+        return lf
+
     def initiate(self) -> pl.DataFrame:
-        df = self._data_cleaning(self.df)
-        df = self._drop_cols(df)
-        return df
+        return self.lazy().collect()